@@ -0,0 +1,102 @@
+"""partition audit_logs by month (PostgreSQL only)
+
+Revision ID: 006
+Revises: 005
+Create Date: 2026-10-17
+"""
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "006"
+down_revision = "005"
+branch_labels = None
+depends_on = None
+
+COLUMNS = "id, user_id, action, table_name, record_id, old_values, new_values, timestamp"
+
+
+def _month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        # SQLite installs keep the plain table; retention still archives by timestamp
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_legacy")
+    op.execute("ALTER INDEX IF EXISTS ix_audit_logs_timestamp RENAME TO ix_audit_logs_legacy_timestamp")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    # The partition key has to be part of the primary key
+    op.execute(
+        """
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id INTEGER REFERENCES users(id),
+            action VARCHAR(255) NOT NULL,
+            table_name VARCHAR(50),
+            record_id INTEGER,
+            old_values JSON,
+            new_values JSON,
+            timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+        """
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute("CREATE TABLE audit_logs_default PARTITION OF audit_logs DEFAULT")
+
+    oldest = bind.execute(sa.text("SELECT min(timestamp) FROM audit_logs_legacy")).scalar()
+    today = date.today()
+    month = _month_start(oldest.date() if oldest else today)
+    # Existing history plus a few months ahead; the retention job keeps creating upcoming ones
+    last = _next_month(_next_month(_next_month(_month_start(today))))
+    while month <= last:
+        upper = _next_month(month)
+        op.execute(
+            f"CREATE TABLE audit_logs_p{month:%Y%m} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+        )
+        month = upper
+
+    op.execute(
+        f"INSERT INTO audit_logs ({COLUMNS}) "
+        f"SELECT {COLUMNS.replace('timestamp', 'coalesce(timestamp, now())')} FROM audit_logs_legacy"
+    )
+    op.execute("DROP TABLE audit_logs_legacy")
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+
+    op.execute("ALTER TABLE audit_logs RENAME TO audit_logs_partitioned")
+    op.execute("ALTER INDEX IF EXISTS ix_audit_logs_timestamp RENAME TO ix_audit_logs_partitioned_timestamp")
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE")
+    op.execute(
+        """
+        CREATE TABLE audit_logs (
+            id INTEGER NOT NULL DEFAULT nextval('audit_logs_id_seq') PRIMARY KEY,
+            user_id INTEGER REFERENCES users(id),
+            action VARCHAR(255) NOT NULL,
+            table_name VARCHAR(50),
+            record_id INTEGER,
+            old_values JSON,
+            new_values JSON,
+            timestamp TIMESTAMP WITHOUT TIME ZONE DEFAULT now()
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id")
+    op.execute(f"INSERT INTO audit_logs ({COLUMNS}) SELECT {COLUMNS} FROM audit_logs_partitioned")
+    op.execute("DROP TABLE audit_logs_partitioned CASCADE")
+    op.create_index("ix_audit_logs_timestamp", "audit_logs", ["timestamp"])
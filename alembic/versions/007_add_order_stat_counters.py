@@ -0,0 +1,39 @@
+"""add order_stat_counters with backfill
+
+Revision ID: 007
+Revises: 006
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "007"
+down_revision = "006"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "order_stat_counters",
+        sa.Column("scope", sa.String(20), primary_key=True),
+        sa.Column("ref_id", sa.Integer(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False, server_default="0"),
+    )
+    op.create_index("ix_order_stat_counters_scope_count", "order_stat_counters", ["scope", "count"])
+
+    op.execute("INSERT INTO order_stat_counters (scope, ref_id, count) SELECT 'orders', 0, count(*) FROM orders")
+    op.execute("INSERT INTO order_stat_counters (scope, ref_id, count) SELECT 'items', 0, count(*) FROM order_items")
+    op.execute(
+        "INSERT INTO order_stat_counters (scope, ref_id, count) "
+        "SELECT 'dish', dish_id, count(*) FROM order_items WHERE dish_id IS NOT NULL GROUP BY dish_id"
+    )
+    op.execute(
+        "INSERT INTO order_stat_counters (scope, ref_id, count) "
+        "SELECT 'user', user_id, count(*) FROM order_items WHERE user_id IS NOT NULL GROUP BY user_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_order_stat_counters_scope_count")
+    op.drop_table("order_stat_counters")
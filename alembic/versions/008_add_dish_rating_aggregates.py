@@ -0,0 +1,32 @@
+"""add dishes.rating_sum / rating_count with backfill
+
+Revision ID: 008
+Revises: 007
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "008"
+down_revision = "007"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column("dishes", sa.Column("rating_sum", sa.Integer(), nullable=False, server_default="0"))
+    op.add_column("dishes", sa.Column("rating_count", sa.Integer(), nullable=False, server_default="0"))
+    op.execute(
+        """
+        UPDATE dishes SET
+            rating_sum = (SELECT coalesce(sum(rating), 0) FROM order_items
+                          WHERE order_items.dish_id = dishes.id AND rating IS NOT NULL),
+            rating_count = (SELECT count(rating) FROM order_items
+                            WHERE order_items.dish_id = dishes.id AND rating IS NOT NULL)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("dishes", "rating_count")
+    op.drop_column("dishes", "rating_sum")
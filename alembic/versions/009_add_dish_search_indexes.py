@@ -0,0 +1,65 @@
+"""dish search: pg_trgm GIN indexes (PostgreSQL) / FTS5 bigram table (SQLite)
+
+Revision ID: 009
+Revises: 008
+Create Date: 2026-10-17
+"""
+import re
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "009"
+down_revision = "008"
+branch_labels = None
+depends_on = None
+
+# Frozen copies of app.search as of this revision, so later edits there cannot change what this migration does
+FTS_TABLE = "dish_search"
+_CJK = "\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+
+
+def _is_cjk(run: str) -> bool:
+    return "\u3400" <= run[0] <= "\u9fff" or "\uf900" <= run[0] <= "\ufaff"
+
+
+def index_terms(value: str | None) -> str:
+    terms = []
+    for run in _TOKEN_RE.findall(value or ""):
+        if _is_cjk(run):
+            terms.extend(run)
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run.lower())
+    return " ".join(terms)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        op.execute("CREATE INDEX IF NOT EXISTS ix_dishes_name_trgm ON dishes USING gin (name gin_trgm_ops)")
+        op.execute(
+            "CREATE INDEX IF NOT EXISTS ix_dishes_description_trgm ON dishes USING gin (description gin_trgm_ops)"
+        )
+    elif bind.dialect.name == "sqlite":
+        op.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+        )
+        rows = bind.execute(sa.text("SELECT id, name, description FROM dishes WHERE is_active")).all()
+        for dish_id, name, description in rows:
+            bind.execute(
+                sa.text(f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (:id, :name, :description)"),
+                {"id": dish_id, "name": index_terms(name), "description": index_terms(description)},
+            )
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_dishes_description_trgm")
+        op.execute("DROP INDEX IF EXISTS ix_dishes_name_trgm")
+    elif bind.dialect.name == "sqlite":
+        op.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
@@ -0,0 +1,33 @@
+"""add upload_refs with backfill from dishes.image_url
+
+Revision ID: 010
+Revises: 009
+Create Date: 2026-10-17
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "010"
+down_revision = "009"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "upload_refs",
+        sa.Column("image_url", sa.String(512), primary_key=True),
+        sa.Column("ref_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("updated_at", sa.DateTime(), server_default=sa.func.now()),
+    )
+    op.create_index("ix_upload_refs_ref_count", "upload_refs", ["ref_count"])
+
+    op.execute(
+        "INSERT INTO upload_refs (image_url, ref_count) "
+        "SELECT image_url, count(*) FROM dishes WHERE image_url IS NOT NULL AND image_url <> '' GROUP BY image_url"
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_upload_refs_ref_count")
+    op.drop_table("upload_refs")
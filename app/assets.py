@@ -0,0 +1,136 @@
+"""Content-fingerprinted static asset URLs with long-lived caching.
+
+At startup the static tree is scanned once (uploads and the ``.br`` / ``.gz``
+siblings excluded). Each file gets a ``name.<hash>.ext`` alias from the first
+12 hex digits of its SHA-256. Templates link assets through the
+``asset_url()`` Jinja global, so every deploy that changes a file also
+changes its URL. AssetStaticFiles maps the alias back to the real file (the
+precompressed siblings still apply) and serves it ``immutable`` for a year.
+Content-addressed uploads (``<sha256><ext>`` and their derivatives, see
+app.uploads) get the same treatment. Older uuid-named uploads do not:
+process_images.py rewrites them in place, so they are revalidated on every
+use. Plain un-fingerprinted CSS/JS URLs keep a one-day max-age.
+
+Outside production, asset_url() re-hashes a file whose mtime changed, so a
+Tailwind watch build shows up without a restart.
+"""
+import hashlib
+import os
+import re
+import threading
+
+from starlette.responses import Response
+
+from .compression import PRECOMPRESSED_SUFFIXES, PrecompressedStaticFiles
+from .security import is_production
+
+STATIC_DIR = "static"
+SKIP_DIRS = {"uploads"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+SHORT_CACHE = {"css/": "public, max-age=86400", "js/": "public, max-age=86400"}
+REVALIDATE = "public, no-cache"
+HASHED_UPLOAD = re.compile(r"^uploads/[0-9a-f]{64}(\.w\d+\.webp|\.[A-Za-z0-9]+)$")
+HASH_LENGTH = 12
+
+_lock = threading.Lock()
+_urls: dict[str, tuple[int, str]] = {}  # "css/app.css" -> (mtime_ns, "css/app.<hash>.css")
+_originals: dict[str, str] = {}  # "css/app.<hash>.css" -> "css/app.css"
+_loaded = False
+
+
+def fingerprint(path: str, digest: str) -> str:
+    stem, ext = os.path.splitext(path)
+    return f"{stem}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def _hash_file(full_path: str) -> str:
+    sha256 = hashlib.sha256()
+    with open(full_path, "rb") as f:
+        while chunk := f.read(1024 * 1024):
+            sha256.update(chunk)
+    return sha256.hexdigest()
+
+
+def _add(path: str, full_path: str, mtime_ns: int):
+    old = _urls.get(path)
+    if old:
+        _originals.pop(old[1], None)
+    hashed = fingerprint(path, _hash_file(full_path))
+    _urls[path] = (mtime_ns, hashed)
+    _originals[hashed] = path
+
+
+def build_manifest(directory: str = STATIC_DIR) -> dict[str, str]:
+    """(Re)scan the static tree; returns {path: fingerprinted path}."""
+    global _loaded
+    skipped_suffixes = tuple(suffix for _, suffix in PRECOMPRESSED_SUFFIXES)
+    with _lock:
+        _urls.clear()
+        _originals.clear()
+        for root, dirs, files in os.walk(directory):
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS and not d.startswith(".")]
+            for name in files:
+                if name.startswith(".") or name.endswith(skipped_suffixes):
+                    continue
+                full_path = os.path.join(root, name)
+                path = os.path.relpath(full_path, directory).replace(os.sep, "/")
+                _add(path, full_path, os.stat(full_path).st_mtime_ns)
+        _loaded = True
+        return {path: hashed for path, (_, hashed) in _urls.items()}
+
+
+def _ensure_loaded():
+    if not _loaded:
+        build_manifest()
+
+
+def asset_url(path: str) -> str:
+    """Jinja global: fingerprinted URL for ``css/app.css`` (or ``static/css/app.css``); unknown paths pass through."""
+    path = path.lstrip("/").removeprefix(f"{STATIC_DIR}/")
+    _ensure_loaded()
+    entry = _urls.get(path)
+    if entry is not None and not is_production():
+        full_path = os.path.join(STATIC_DIR, path)
+        try:
+            mtime_ns = os.stat(full_path).st_mtime_ns
+        except FileNotFoundError:
+            return f"/{STATIC_DIR}/{path}"
+        if mtime_ns != entry[0]:
+            with _lock:
+                _add(path, full_path, mtime_ns)
+            entry = _urls[path]
+    if entry is None:
+        return f"/{STATIC_DIR}/{path}"
+    return f"/{STATIC_DIR}/{entry[1]}"
+
+
+def original_path(path: str) -> str | None:
+    _ensure_loaded()
+    return _originals.get(path)
+
+
+def reset():
+    global _loaded
+    with _lock:
+        _urls.clear()
+        _originals.clear()
+        _loaded = False
+
+
+class AssetStaticFiles(PrecompressedStaticFiles):
+    """Serves fingerprinted aliases and sets Cache-Control on successful static responses only."""
+
+    async def get_response(self, path: str, scope) -> Response:
+        url_path = path.replace(os.sep, "/")
+        original = original_path(url_path)
+        response = await super().get_response(original.replace("/", os.sep) if original else path, scope)
+        if response.status_code in (200, 304):
+            if original or HASHED_UPLOAD.match(url_path):
+                response.headers["Cache-Control"] = IMMUTABLE
+            elif url_path.startswith("uploads/"):
+                response.headers["Cache-Control"] = REVALIDATE
+            else:
+                for prefix, cache_control in SHORT_CACHE.items():
+                    if url_path.startswith(prefix):
+                        response.headers["Cache-Control"] = cache_control
+        return response
@@ -0,0 +1,80 @@
+"""Awaitable mirror of app.crud.
+
+Each function takes the same arguments as its crud counterpart. With an
+AsyncSession the call runs through ``run_sync`` on the async engine
+(asyncpg / aiosqlite), so the event loop is never blocked on the socket.
+With a plain Session (DB_ASYNC off, tests) it calls crud directly, which
+lets the same handler code serve both paths.
+"""
+import functools
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import crud
+
+
+def _mirror(fn):
+    @functools.wraps(fn)
+    async def wrapper(db, *args, **kwargs):
+        if isinstance(db, AsyncSession):
+            return await db.run_sync(fn, *args, **kwargs)
+        return fn(db, *args, **kwargs)
+    return wrapper
+
+
+create_audit_log = _mirror(crud.create_audit_log)
+
+# User
+get_user = _mirror(crud.get_user)
+get_user_by_name = _mirror(crud.get_user_by_name)
+authenticate_user = _mirror(crud.authenticate_user)
+get_users = _mirror(crud.get_users)
+get_user_directory = _mirror(crud.get_user_directory)
+create_user = _mirror(crud.create_user)
+update_user = _mirror(crud.update_user)
+delete_user = _mirror(crud.delete_user)
+
+# Dish
+get_dishes = _mirror(crud.get_dishes)
+search_dishes = _mirror(crud.search_dishes)
+get_typeahead_rows = _mirror(crud.get_typeahead_rows)
+get_dish_categories = _mirror(crud.get_dish_categories)
+get_dish = _mirror(crud.get_dish)
+get_dish_revision = _mirror(crud.get_dish_revision)
+get_menu_revision = _mirror(crud.get_menu_revision)
+create_dish = _mirror(crud.create_dish)
+update_dish = _mirror(crud.update_dish)
+delete_dish = _mirror(crud.delete_dish)
+release_upload = _mirror(crud.release_upload)
+get_unreferenced_uploads = _mirror(crud.get_unreferenced_uploads)
+rebuild_upload_refs = _mirror(crud.rebuild_upload_refs)
+
+# Order
+get_current_order = _mirror(crud.get_current_order)
+get_current_order_revision = _mirror(crud.get_current_order_revision)
+get_open_order_items = _mirror(crud.get_open_order_items)
+get_or_create_current_order = _mirror(crud.get_or_create_current_order)
+create_order = _mirror(crud.create_order)
+add_order_item = _mirror(crud.add_order_item)
+get_order_item = _mirror(crud.get_order_item)
+update_order_item = _mirror(crud.update_order_item)
+delete_order_item = _mirror(crud.delete_order_item)
+delete_order = _mirror(crud.delete_order)
+complete_order = _mirror(crud.complete_order)
+get_order_history = _mirror(crud.get_order_history)
+get_order_history_count = _mirror(crud.get_order_history_count)
+get_order_history_page = _mirror(crud.get_order_history_page)
+get_order_history_count_cached = _mirror(crud.get_order_history_count_cached)
+get_audit_logs = _mirror(crud.get_audit_logs)
+get_user_top_dishes = _mirror(crud.get_user_top_dishes)
+get_user_item_count = _mirror(crud.get_user_item_count)
+get_last_item_preference = _mirror(crud.get_last_item_preference)
+get_dish_rating = _mirror(crud.get_dish_rating)
+rate_dish = _mirror(crud.rate_dish)
+get_order_stats = _mirror(crud.get_order_stats)
+rebuild_order_stats = _mirror(crud.rebuild_order_stats)
+
+# Recipe
+get_recipe_by_dish = _mirror(crud.get_recipe_by_dish)
+get_recipe_revision = _mirror(crud.get_recipe_revision)
+create_or_update_recipe = _mirror(crud.create_or_update_recipe)
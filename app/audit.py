@@ -0,0 +1,171 @@
+"""Write-behind sink for audit_logs.
+
+Critical mutations keep writing their AuditLog row inside the request
+transaction (``SYNC``). High-volume, low-stakes events such as login attempts
+are marked ``ASYNC``: they go onto a bounded in-memory queue and a background
+thread batch-inserts them with a single executemany per batch. When the sink
+is not running (tests, scripts) or the queue is full, callers fall back to the
+inline write, so an audit row is never silently dropped.
+"""
+import logging
+import queue
+import threading
+import time
+from datetime import datetime, timezone
+
+from . import models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+SYNC = "sync"
+ASYNC = "async"
+
+_STOP = object()
+
+
+class AuditSink:
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: queue.Queue = queue.Queue(maxsize=maxsize)
+        self._thread: threading.Thread | None = None
+        self._session_factory = None
+        self._lock = threading.Lock()
+        self.enqueued = 0
+        self.written = 0
+        self.batches = 0
+        self.rejected = 0
+        self.failed = 0
+        self.last_batch_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, session_factory):
+        if self.running:
+            return
+        self._session_factory = session_factory
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        """Drain everything queued so far, then stop the writer."""
+        if not self.running:
+            return
+        self._queue.put(_STOP)
+        self._thread.join(timeout)
+        self._thread = None
+
+    def flush(self, timeout: float = 10.0):
+        """Block until every row queued before the call has been written."""
+        if not self.running:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait(timeout)
+
+    def submit(self, row: dict) -> bool:
+        """Queue a row for the writer; False means the caller must write it inline."""
+        if not self.running:
+            return False
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._lock:
+                self.rejected += 1
+            return False
+        with self._lock:
+            self.enqueued += 1
+        return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "running": self.running,
+                "depth": self._queue.qsize(),
+                "capacity": self._queue.maxsize,
+                "enqueued": self.enqueued,
+                "written": self.written,
+                "batches": self.batches,
+                "rejected": self.rejected,
+                "failed": self.failed,
+                "last_batch_ms": round(self.last_batch_ms, 3),
+            }
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            batch, markers, stop = [], [], False
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if item is _STOP:
+                    stop = True
+                elif isinstance(item, threading.Event):
+                    markers.append(item)
+                else:
+                    batch.append(item)
+                if stop or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if stop:
+                # Shutdown: take whatever is still queued behind the sentinel
+                while True:
+                    try:
+                        item = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if isinstance(item, threading.Event):
+                        markers.append(item)
+                    elif item is not _STOP:
+                        batch.append(item)
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+            if stop:
+                return
+
+    def _write(self, batch: list):
+        start = time.perf_counter()
+        table = models.AuditLog.__table__
+        db = self._session_factory()
+        try:
+            db.execute(table.insert(), batch)
+            db.commit()
+            written = len(batch)
+        except Exception:
+            db.rollback()
+            logger.exception("Audit batch of %d rows failed; retrying row by row", len(batch))
+            written = 0
+            for row in batch:
+                try:
+                    db.execute(table.insert(), [row])
+                    db.commit()
+                    written += 1
+                except Exception:
+                    db.rollback()
+                    logger.exception("Dropping audit row: %s", row.get("action"))
+        finally:
+            db.close()
+        with self._lock:
+            self.batches += 1
+            self.written += written
+            self.failed += len(batch) - written
+            self.last_batch_ms = (time.perf_counter() - start) * 1000
+
+
+def event_time() -> datetime:
+    # Queued rows are written later; stamp them with when the event happened (naive UTC, like the column)
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+sink = AuditSink(
+    maxsize=settings.AUDIT_QUEUE_SIZE,
+    batch_size=settings.AUDIT_BATCH_SIZE,
+    flush_interval=settings.AUDIT_FLUSH_INTERVAL_MS / 1000,
+)
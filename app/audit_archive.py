@@ -0,0 +1,174 @@
+"""Audit log retention: cold archive to gzip JSONL and monthly partitions.
+
+Rows older than AUDIT_RETENTION_DAYS are written to a compressed JSONL file
+under AUDIT_ARCHIVE_DIR first, and removed from the hot table only after the
+file is safely renamed into place. On PostgreSQL, audit_logs is range
+partitioned by month (migration 006). Expired partitions are dropped whole
+instead of deleted row by row, and upcoming ones are created ahead of time.
+"""
+import gzip
+import json
+import logging
+import os
+import re
+from datetime import date, datetime, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from . import models
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_NAME_RE = re.compile(r"^audit_logs-\d{8}T\d{6}\.jsonl\.gz$")
+PARTITION_NAME_RE = re.compile(r"^audit_logs_p(\d{4})(\d{2})$")
+FETCH_SIZE = 1000
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + (d.month == 12), d.month % 12 + 1, 1)
+
+
+def _serialize(log: models.AuditLog) -> dict:
+    return {
+        "id": log.id,
+        "user_id": log.user_id,
+        "action": log.action,
+        "table_name": log.table_name,
+        "record_id": log.record_id,
+        "old_values": log.old_values,
+        "new_values": log.new_values,
+        "timestamp": log.timestamp.isoformat() if log.timestamp else None,
+    }
+
+
+def _is_postgres(db: Session) -> bool:
+    return db.get_bind().dialect.name == "postgresql"
+
+
+def ensure_partitions(db: Session, months_ahead: int = 3) -> list[str]:
+    """Create monthly partitions from this month up to months_ahead (PostgreSQL only)."""
+    if not _is_postgres(db):
+        return []
+    created = []
+    month = date.today().replace(day=1)
+    for _ in range(months_ahead + 1):
+        upper = _next_month(month)
+        name = f"audit_logs_p{month:%Y%m}"
+        exists = db.execute(text("SELECT to_regclass(:name)"), {"name": name}).scalar()
+        if not exists:
+            try:
+                db.execute(text(
+                    f"CREATE TABLE {name} PARTITION OF audit_logs "
+                    f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{upper:%Y-%m-%d}')"
+                ))
+                db.commit()
+                created.append(name)
+            except Exception:
+                # Rows for that month already sit in the default partition; leave them there
+                db.rollback()
+                logger.exception("Could not create audit partition %s", name)
+        month = upper
+    return created
+
+
+def _drop_expired_partitions(db: Session, cutoff: datetime) -> list[str]:
+    rows = db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_logs'"
+    )).scalars().all()
+    dropped = []
+    for name in rows:
+        match = PARTITION_NAME_RE.match(name)
+        if not match:
+            continue
+        upper = _next_month(date(int(match.group(1)), int(match.group(2)), 1))
+        if datetime(upper.year, upper.month, upper.day) <= cutoff:
+            db.execute(text(f"DROP TABLE {name}"))
+            dropped.append(name)
+    db.commit()
+    return dropped
+
+
+def archive_old_logs(db: Session, days: int | None = None, archive_dir: str | None = None, dry_run: bool = False) -> dict:
+    """Move audit rows older than `days` into a gzip JSONL archive and out of the hot table."""
+    days = settings.AUDIT_RETENTION_DAYS if days is None else days
+    archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    cutoff = now - timedelta(days=days)
+    old = db.query(models.AuditLog).filter(models.AuditLog.timestamp < cutoff)
+    result = {"cutoff": cutoff.isoformat(), "archived": 0, "archive": None, "dropped_partitions": []}
+    if dry_run:
+        result["archived"] = old.count()
+        return result
+
+    os.makedirs(archive_dir, exist_ok=True)
+    name = f"audit_logs-{now:%Y%m%dT%H%M%S}.jsonl.gz"
+    path = os.path.join(archive_dir, name)
+    tmp_path = path + ".tmp"
+    count = 0
+    max_id = 0
+    with gzip.open(tmp_path, "wt", encoding="utf-8") as out:
+        for log in old.order_by(models.AuditLog.id).yield_per(FETCH_SIZE):
+            out.write(json.dumps(_serialize(log), ensure_ascii=False) + "\n")
+            count += 1
+            max_id = max(max_id, log.id)
+    db.expunge_all()
+    if not count:
+        os.remove(tmp_path)
+        ensure_partitions(db)
+        return result
+    os.replace(tmp_path, path)
+
+    # Only rows that made it into the file are removed
+    if _is_postgres(db):
+        result["dropped_partitions"] = _drop_expired_partitions(db, cutoff)
+    db.query(models.AuditLog).filter(
+        models.AuditLog.timestamp < cutoff, models.AuditLog.id <= max_id,
+    ).delete(synchronize_session=False)
+    db.commit()
+    ensure_partitions(db)
+    result.update(archived=count, archive=name)
+    logger.info("Archived %d audit rows older than %s to %s", count, cutoff, path)
+    return result
+
+
+def list_archives(archive_dir: str | None = None) -> list[dict]:
+    archive_dir = archive_dir or settings.AUDIT_ARCHIVE_DIR
+    if not os.path.isdir(archive_dir):
+        return []
+    archives = []
+    with os.scandir(archive_dir) as entries:
+        for entry in entries:
+            if entry.is_file() and ARCHIVE_NAME_RE.match(entry.name):
+                stat = entry.stat()
+                archives.append({
+                    "name": entry.name,
+                    "size": stat.st_size,
+                    "modified": datetime.fromtimestamp(stat.st_mtime),
+                })
+    return sorted(archives, key=lambda a: a["name"], reverse=True)
+
+
+def archive_path(name: str, archive_dir: str | None = None) -> str | None:
+    """Resolve an archive name from a URL; None for anything that is not one of ours."""
+    if not ARCHIVE_NAME_RE.match(name):
+        return None
+    path = os.path.join(archive_dir or settings.AUDIT_ARCHIVE_DIR, name)
+    return path if os.path.isfile(path) else None
+
+
+def iter_archive(path: str, chunk_lines: int = 500):
+    """Yield decompressed JSONL in chunks so large archives stream with flat memory."""
+    with gzip.open(path, "rt", encoding="utf-8") as src:
+        chunk = []
+        for line in src:
+            chunk.append(line)
+            if len(chunk) >= chunk_lines:
+                yield "".join(chunk)
+                chunk = []
+        if chunk:
+            yield "".join(chunk)
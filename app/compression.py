@@ -0,0 +1,183 @@
+"""gzip / brotli for responses, and precompressed static assets.
+
+CompressionMiddleware compresses text responses (pages, HTMX fragments, JSON)
+at or above COMPRESSION_MIN_SIZE. Brotli is preferred when the client
+accepts it and the ``brotli`` package is installed; gzip is used otherwise.
+Streamed bodies are compressed chunk by chunk and flushed after each chunk,
+so the browser still gets the first bytes early.
+
+Static assets are not compressed per request. compress_static.py writes
+``.br`` / ``.gz`` siblings at build time, and PrecompressedStaticFiles serves
+the best one the client accepts with the original content type. The
+middleware leaves anything that already has a Content-Encoding alone.
+"""
+import mimetypes
+import os
+import zlib
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_TYPES = (
+    "text/html", "text/css", "text/plain", "text/javascript",
+    "application/json", "application/javascript", "image/svg+xml",
+)
+# Served in this order of preference when the client accepts it
+PRECOMPRESSED_SUFFIXES = (("br", ".br"), ("gzip", ".gz"))
+
+
+def accepted_encodings(header: str) -> set[str]:
+    encodings = set()
+    for part in header.split(","):
+        name, _, params = part.strip().partition(";")
+        q = params.strip()
+        if q.startswith("q="):
+            try:
+                if float(q[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        if name:
+            encodings.add(name.strip().lower())
+    return encodings
+
+
+def choose_encoding(header: str) -> str | None:
+    accepted = accepted_encodings(header)
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality)
+        else:
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)  # wbits 31 = gzip container
+
+    def chunk(self, data: bytes, final: bool) -> bytes:
+        if self.encoding == "br":
+            out = self._brotli.process(data)
+            return out + (self._brotli.finish() if final else self._brotli.flush())
+        out = self._zlib.compress(data)
+        return out + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+def _weaken_etag(headers: MutableHeaders):
+    # Same content, different bytes: a compressed representation only matches weakly
+    etag = headers.get("etag")
+    if etag and not etag.startswith("W/"):
+        headers["ETag"] = f"W/{etag}"
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = 1024, gzip_level: int = 6, brotli_quality: int = 4):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        compressor = None
+        passthrough = False
+        buffered = b""
+
+        async def send_wrapper(message):
+            nonlocal start_message, compressor, passthrough, buffered
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or passthrough:
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if compressor is None:
+                # Other middleware re-streams even small bodies; hold chunks until the size is known
+                buffered += body
+                if more_body and len(buffered) < self.minimum_size:
+                    return
+                body, buffered = buffered, b""
+                headers = MutableHeaders(raw=start_message["headers"])
+                content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+                if start_message["status"] == 304 and "accept-encoding" not in headers.get("vary", "").lower():
+                    # The 200 this revalidates went out compressed with a weakened ETag; repeat that one
+                    _weaken_etag(headers)
+                if (
+                    "content-encoding" in headers
+                    or start_message["status"] in (204, 304)
+                    or content_type not in COMPRESSIBLE_TYPES
+                    or len(body) < self.minimum_size
+                ):
+                    passthrough = True
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body, "more_body": more_body})
+                    return
+                compressor = _Compressor(encoding, self.gzip_level, self.brotli_quality)
+                headers["Content-Encoding"] = encoding
+                headers.add_vary_header("Accept-Encoding")
+                _weaken_etag(headers)
+                if not more_body:
+                    compressed = compressor.chunk(body, final=True)
+                    headers["Content-Length"] = str(len(compressed))
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": compressed})
+                    return
+                if "content-length" in headers:
+                    del headers["content-length"]
+                await send(start_message)
+            await send({
+                "type": "http.response.body",
+                "body": compressor.chunk(body, final=not more_body),
+                "more_body": more_body,
+            })
+
+        await self.app(scope, receive, send_wrapper)
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that answers with a build-time ``.br`` / ``.gz`` sibling when the client accepts one."""
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200):
+        request_headers = Headers(scope=scope)
+        accepted = accepted_encodings(request_headers.get("accept-encoding", ""))
+        for encoding, suffix in PRECOMPRESSED_SUFFIXES:
+            if encoding not in accepted:
+                continue
+            try:
+                variant_stat = os.stat(f"{full_path}{suffix}")
+            except OSError:
+                continue
+            if variant_stat.st_mtime < stat_result.st_mtime:
+                continue  # stale sibling from an older build
+            response = FileResponse(
+                f"{full_path}{suffix}", status_code=status_code, stat_result=variant_stat,
+                media_type=mimetypes.guess_type(str(full_path))[0] or "application/octet-stream",
+                headers={"Content-Encoding": encoding, "Vary": "Accept-Encoding"},
+            )
+            if self.is_not_modified(response.headers, request_headers):
+                return NotModifiedResponse(response.headers)
+            return response
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        response.headers["Vary"] = "Accept-Encoding"
+        return response
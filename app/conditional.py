@@ -0,0 +1,53 @@
+"""Conditional GET (ETag / 304) for polled pages and HTMX fragments.
+
+Routes compute a strong ETag from a few cheap revision columns (updated_at,
+counts, max ids) before loading or rendering anything. If the browser's
+If-None-Match still matches, they answer 304 with an empty body. The tag also
+covers who is asking (id, role, theme, session generation) and their CSRF
+token, because both are rendered into the page. ``private, no-cache`` lets the
+browser keep the copy but forces it to revalidate on every use.
+
+Polled fragments use the same token as a ``?v=`` query parameter instead: the
+rendered region carries the version it shows, and an unchanged poll gets 204.
+"""
+import hashlib
+
+from fastapi import Request, Response
+
+from .csrf import get_csrf_token
+
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_version(request: Request, user, *parts) -> str:
+    """Opaque token for what this caller would see; also the version polled fragments echo back."""
+    identity = (user.id, user.role, user.theme_color, user.session_generation or 0)
+    return hashlib.sha256(repr((identity, get_csrf_token(request), parts)).encode()).hexdigest()[:32]
+
+
+def make_etag(request: Request, user, *parts) -> str:
+    return f'"{make_version(request, user, *parts)}"'
+
+
+def unchanged_poll(request: Request, version: str) -> Response | None:
+    """204 when a polling fragment already shows this version; htmx leaves the region alone on 204."""
+    if request.query_params.get("v") == version:
+        return Response(status_code=204)
+    return None
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    """A 304 for the caller to return as-is, or None when the page has to be rendered."""
+    header = request.headers.get("if-none-match")
+    if not header or request.method not in ("GET", "HEAD"):
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return None
+
+
+def tag(response: Response, etag: str) -> Response:
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return response
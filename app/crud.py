@@ -1,10 +1,14 @@
+import json
+import time
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict
 
-from sqlalchemy import func
-from sqlalchemy.orm import Session, selectinload
+from sqlalchemy import String, func, literal, text, tuple_
+from sqlalchemy.orm import Session, joinedload, selectinload
 
-from . import models, schemas, security
+from . import audit, menu_cache, models, schemas, search, security, typeahead, user_directory
+from .config import settings
 
 SENSITIVE_FIELDS = {"password", "token", "secret"}
 
@@ -25,8 +29,9 @@ def json_serializable(data: Dict[str, Any]):
 def create_audit_log(
     db: Session, user_id: int, action: str, table_name: str, record_id: int,
     old_values: Dict[str, Any] = None, new_values: Dict[str, Any] = None, commit: bool = True,
+    durability: str = audit.SYNC,
 ):
-    db_log = models.AuditLog(
+    row = dict(
         user_id=user_id,
         action=action,
         table_name=table_name,
@@ -34,7 +39,12 @@ def create_audit_log(
         old_values=json_serializable(old_values),
         new_values=json_serializable(new_values)
     )
-    db.add(db_log)
+    # ASYNC rows go to the write-behind sink; it hands them back when stopped or full
+    if durability == audit.ASYNC and settings.AUDIT_WRITE_BEHIND and audit.sink.submit(
+        {**row, "timestamp": audit.event_time()}
+    ):
+        return
+    db.add(models.AuditLog(**row))
     if commit:
         db.commit()
 
@@ -56,6 +66,16 @@ def authenticate_user(db: Session, name: str, password: str):
 def get_users(db: Session, limit: int = 100):
     return db.query(models.User).limit(limit).all()
 
+def get_user_directory(db: Session, limit: int = 100):
+    """Lightweight (id, name, theme_color, role, session_generation) rows for app.user_directory."""
+    return (
+        db.query(
+            models.User.id, models.User.name, models.User.theme_color, models.User.role,
+            models.User.session_generation,
+        )
+        .order_by(models.User.id).limit(limit).all()
+    )
+
 def create_user(db: Session, user: schemas.UserCreate, actor_id: int = 0):
     hashed_password = security.get_password_hash(user.password)
     db_user = models.User(name=user.name, password=hashed_password)
@@ -63,6 +83,7 @@ def create_user(db: Session, user: schemas.UserCreate, actor_id: int = 0):
     db.flush() # Get ID before commit
     create_audit_log(db, actor_id or db_user.id, "创建用户", "users", db_user.id, None, {"name": db_user.name}, commit=False)
     db.commit()
+    user_directory.invalidate()
     db.refresh(db_user)
     return db_user
 
@@ -81,6 +102,9 @@ def update_user(db: Session, user_id: int, user_data: Dict[str, Any], actor_id:
     for key, value in user_data.items():
         if hasattr(db_user, key):
             setattr(db_user, key, value)
+    # Role or password changes revoke every session issued before them
+    if "password" in user_data or db_user.role != old_values["role"]:
+        db_user.session_generation = (db_user.session_generation or 0) + 1
 
     new_values = {c.name: getattr(db_user, c.name) for c in db_user.__table__.columns}
 
@@ -90,6 +114,7 @@ def update_user(db: Session, user_id: int, user_data: Dict[str, Any], actor_id:
 
     create_audit_log(db, actor_id, "更新用户", "users", user_id, old_values, new_values, commit=False)
     db.commit()
+    user_directory.invalidate()
     db.refresh(db_user)
     return db_user
 
@@ -103,6 +128,7 @@ def delete_user(db: Session, user_id: int, actor_id: int):
     db.delete(db_user)
     create_audit_log(db, actor_id, "删除用户", "users", user_id, old_values, None, commit=False)
     db.commit()
+    user_directory.invalidate()
     return True
 
 # Dish CRUD
@@ -111,12 +137,41 @@ def get_dishes(db: Session):
 
 
 def search_dishes(db: Session, query: str, category: str = ""):
+    """Active dishes matching query over name and description, most relevant first."""
     stmt = db.query(models.Dish).options(selectinload(models.Dish.recipe)).filter(models.Dish.is_active)
-    if query:
-        stmt = stmt.filter(models.Dish.name.ilike(f"%{query}%"))
     if category:
         stmt = stmt.filter(models.Dish.category == category)
-    return stmt.all()
+    query = query.strip()
+    if not query:
+        return stmt.all()
+    ranked_ids = search.ranked_dish_ids(db, query)
+    if ranked_ids is None:
+        pattern = f"%{query}%"
+        return stmt.filter(models.Dish.name.ilike(pattern) | models.Dish.description.ilike(pattern)).all()
+    if not ranked_ids:
+        return []
+    rank = {dish_id: i for i, dish_id in enumerate(ranked_ids)}
+    return sorted(stmt.filter(models.Dish.id.in_(ranked_ids)).all(), key=lambda d: rank[d.id])
+
+
+def get_typeahead_rows(db: Session):
+    """(id, name) rows of active dishes for app.typeahead."""
+    return db.query(models.Dish.id, models.Dish.name).filter(models.Dish.is_active).all()
+
+
+def get_dish_revision(db: Session, dish_id: int):
+    """Change marker for a dish and its recipe (one indexed lookup); None if the dish does not exist."""
+    return (
+        db.query(models.Dish.updated_at, models.Dish.is_active, models.Recipe.id, models.Recipe.updated_at)
+        .outerjoin(models.Recipe, models.Recipe.dish_id == models.Dish.id)
+        .filter(models.Dish.id == dish_id)
+        .first()
+    )
+
+
+def get_menu_revision(db: Session):
+    """Change marker for the dish list: any insert, edit, rating or removal moves it."""
+    return db.query(func.count(models.Dish.id), func.max(models.Dish.id), func.max(models.Dish.updated_at)).one()
 
 
 def get_dish_categories(db: Session):
@@ -147,11 +202,15 @@ def create_dish(db: Session, dish: schemas.DishCreate):
     db_dish = models.Dish(**dish.model_dump(), created_at=now)
     db.add(db_dish)
     db.flush()
+    bump_upload_refs(db, {db_dish.image_url: 1})
+    search.index_dish(db, db_dish)
     create_audit_log(
         db, dish.created_by, f"创造了新菜《{db_dish.name}》", "dishes", db_dish.id, None, dish.model_dump(), commit=False,
     )
     db.commit()
     db.refresh(db_dish)
+    menu_cache.invalidate()
+    typeahead.upsert(db_dish.id, db_dish.name)
     return db_dish
 
 def update_dish(db: Session, dish_id: int, dish_data: Dict[str, Any], user_id: int):
@@ -162,11 +221,16 @@ def update_dish(db: Session, dish_id: int, dish_data: Dict[str, Any], user_id: i
     old_values = {c.name: getattr(db_dish, c.name) for c in db_dish.__table__.columns}
     for key, value in dish_data.items():
         setattr(db_dish, key, value)
+    if db_dish.image_url != old_values["image_url"]:
+        bump_upload_refs(db, {old_values["image_url"]: -1, db_dish.image_url: 1})
 
     new_values = {c.name: getattr(db_dish, c.name) for c in db_dish.__table__.columns}
     create_audit_log(db, user_id, f"修改了菜品《{db_dish.name}》", "dishes", dish_id, old_values, new_values, commit=False)
+    search.index_dish(db, db_dish)
     db.commit()
     db.refresh(db_dish)
+    menu_cache.invalidate()
+    typeahead.upsert(db_dish.id, db_dish.name, db_dish.is_active)
     return db_dish
 
 def delete_dish(db: Session, dish_id: int, user_id: int):
@@ -183,12 +247,54 @@ def delete_dish(db: Session, dish_id: int, user_id: int):
 
     old_values = {c.name: getattr(db_dish, c.name) for c in db_dish.__table__.columns}
     db_dish.is_active = False
+    search.index_dish(db, db_dish)
     create_audit_log(
         db, user_id, f"下架了菜品《{db_dish.name}》", "dishes", dish_id, old_values, {"is_active": False}, commit=False,
     )
     db.commit()
+    menu_cache.invalidate()
+    typeahead.upsert(dish_id, db_dish.name, active=False)
     return db_dish
 
+def bump_upload_refs(db: Session, deltas: Dict[str, int]):
+    """Apply {image_url: delta} to upload_refs inside the caller's transaction."""
+    rows = [{"image_url": url, "ref_count": delta} for url, delta in deltas.items() if url and delta]
+    if rows:
+        now = datetime.now(timezone.utc).replace(tzinfo=None)
+        _add_to_counters(db, models.UploadRef, ("image_url",), "ref_count", rows, touch={"updated_at": now})
+
+
+def release_upload(db: Session, image_url: str) -> bool:
+    """Drop the upload_refs row of an upload nothing points at any more; True when a row was removed."""
+    deleted = db.query(models.UploadRef).filter(
+        models.UploadRef.image_url == image_url, models.UploadRef.ref_count <= 0,
+    ).delete(synchronize_session=False)
+    db.commit()
+    return deleted > 0
+
+
+def get_unreferenced_uploads(db: Session) -> list[str]:
+    return [url for (url,) in db.query(models.UploadRef.image_url).filter(models.UploadRef.ref_count <= 0).all()]
+
+
+def iter_referenced_upload_urls(db: Session, batch_size: int = 1000):
+    """Stream the image URLs at least one dish points at, according to upload_refs."""
+    query = db.query(models.UploadRef.image_url).filter(models.UploadRef.ref_count > 0)
+    for (url,) in query.yield_per(batch_size):
+        yield url
+
+
+def rebuild_upload_refs(db: Session) -> int:
+    """Recompute upload_refs from dishes.image_url (repair)."""
+    db.query(models.UploadRef).delete(synchronize_session=False)
+    rows = db.query(models.Dish.image_url, func.count(models.Dish.id)).filter(
+        models.Dish.image_url.isnot(None), models.Dish.image_url != "",
+    ).group_by(models.Dish.image_url).all()
+    db.add_all(models.UploadRef(image_url=url, ref_count=count) for url, count in rows)
+    db.commit()
+    return len(rows)
+
+
 # Order CRUD
 def get_current_order(db: Session):
     return db.query(models.Order).options(
@@ -196,6 +302,38 @@ def get_current_order(db: Session):
         selectinload(models.Order.items).selectinload(models.OrderItem.user),
     ).filter(models.Order.status == "open").order_by(models.Order.created_at.desc()).first()
 
+def get_current_order_revision(db: Session):
+    """Change marker for the open order, its items and their dishes; None when there is no open order."""
+    order = (
+        db.query(models.Order.id, models.Order.updated_at)
+        .filter(models.Order.status == "open").order_by(models.Order.created_at.desc()).first()
+    )
+    if not order:
+        return None
+    items = (
+        db.query(
+            func.count(models.OrderItem.id), func.max(models.OrderItem.id),
+            func.max(models.OrderItem.updated_at), func.max(models.Dish.updated_at),
+        )
+        .outerjoin(models.Dish, models.Dish.id == models.OrderItem.dish_id)
+        .filter(models.OrderItem.order_id == order.id)
+        .one()
+    )
+    return (*order, *items)
+
+def get_open_order_items(db: Session, order_id: int):
+    """Items of one order with just the dish and member names, for the polled order fragments."""
+    return (
+        db.query(models.OrderItem)
+        .options(
+            joinedload(models.OrderItem.dish).load_only(models.Dish.id, models.Dish.name),
+            joinedload(models.OrderItem.user).load_only(models.User.id, models.User.name),
+        )
+        .filter(models.OrderItem.order_id == order_id)
+        .order_by(models.OrderItem.id)
+        .all()
+    )
+
 def get_or_create_current_order(db: Session, user_id: int):
     order = get_current_order(db)
     if not order:
@@ -210,8 +348,11 @@ def get_or_create_current_order(db: Session, user_id: int):
         create_audit_log(
             db, user_id, "创建订单", "orders", order.id, None, {"status": "open", "created_by": user_id}, commit=False,
         )
+        bump_order_stats(db, {("orders", 0): 1})
         db.commit()
-        db.refresh(order)
+        invalidate_order_history_count()
+        # Reload with items eager-loaded so templates never lazy-load on an async session
+        order = get_current_order(db) or order
     return order
 
 def create_order(db: Session, order: schemas.OrderCreate):
@@ -219,7 +360,9 @@ def create_order(db: Session, order: schemas.OrderCreate):
     db.add(db_order)
     db.flush()
     create_audit_log(db, order.created_by, "创建订单", "orders", db_order.id, None, order.model_dump(), commit=False)
+    bump_order_stats(db, {("orders", 0): 1})
     db.commit()
+    invalidate_order_history_count()
     db.refresh(db_order)
     return db_order
 
@@ -249,6 +392,7 @@ def add_order_item(db: Session, item: schemas.OrderItemCreate):
     new_values["dish_name"] = dish_name
 
     create_audit_log(db, item.user_id, f"点了《{dish_name}》", "order_items", db_item.id, None, new_values, commit=False)
+    bump_order_stats(db, _item_stat_deltas([(item.dish_id, item.user_id)], 1))
     db.commit()
     db.refresh(db_item)
     return db_item
@@ -291,8 +435,12 @@ def delete_order_item(db: Session, item_id: int, user_id: int):
     old_values["dish_name"] = dish_name
 
     db.delete(db_item)
+    _unrate_items(db, [(db_item.dish_id, db_item.rating)])
     create_audit_log(db, user_id, f"取消了《{dish_name}》", "order_items", item_id, old_values, None, commit=False)
+    bump_order_stats(db, _item_stat_deltas([(db_item.dish_id, db_item.user_id)], -1))
     db.commit()
+    if db_item.rating is not None:
+        menu_cache.invalidate()
     return True
 
 def delete_order(db: Session, order_id: int, user_id: int):
@@ -301,10 +449,19 @@ def delete_order(db: Session, order_id: int, user_id: int):
         return None
 
     old_values = {c.name: getattr(db_order, c.name) for c in db_order.__table__.columns}
+    items = (
+        db.query(models.OrderItem.dish_id, models.OrderItem.user_id, models.OrderItem.rating)
+        .filter(models.OrderItem.order_id == order_id).all()
+    )
     db.query(models.OrderItem).filter(models.OrderItem.order_id == order_id).delete()
+    _unrate_items(db, [(dish_id, rating) for dish_id, _, rating in items])
     db.delete(db_order)
     create_audit_log(db, user_id, "删除订单", "orders", order_id, old_values, None, commit=False)
+    bump_order_stats(db, {("orders", 0): -1, **_item_stat_deltas([(d, u) for d, u, _ in items], -1)})
     db.commit()
+    invalidate_order_history_count()
+    if any(rating is not None for _, _, rating in items):
+        menu_cache.invalidate()
     return True
 
 def complete_order(db: Session, order_id: int, user_id: int):
@@ -338,8 +495,100 @@ def get_order_history(db: Session, page: int = 1, limit: int = None):
 def get_order_history_count(db: Session) -> int:
     return db.query(models.Order).count()
 
+
+def encode_history_cursor(order: models.Order) -> str:
+    raw = json.dumps([order.created_at.isoformat(), order.id]).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_history_cursor(cursor: str):
+    """Opaque cursor -> (created_at, id); None for anything malformed."""
+    try:
+        created_at, order_id = json.loads(urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+        return datetime.fromisoformat(created_at), int(order_id)
+    except (ValueError, TypeError):
+        return None
+
+
+def _created_at_bind(db: Session, value: datetime):
+    # SQLite stores server_default timestamps as text without microseconds; compare in the same format
+    if db.get_bind().dialect.name == "sqlite":
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return literal(value.strftime(fmt), String)
+    return literal(value, models.Order.created_at.type)
+
+
+def get_order_history_page(db: Session, after: str = None, before: str = None, limit: int = None):
+    """Keyset page of orders on (created_at, id), newest first.
+
+    Returns (orders, next_cursor, prev_cursor); cursors are None at either end.
+    """
+    fetch_limit = limit or PAGE_SIZE
+    key = tuple_(models.Order.created_at, models.Order.id)
+    stmt = db.query(models.Order).options(
+        selectinload(models.Order.items).selectinload(models.OrderItem.dish),
+        selectinload(models.Order.items).selectinload(models.OrderItem.user),
+    )
+    before_key = decode_history_cursor(before) if before else None
+    after_key = decode_history_cursor(after) if after and not before_key else None
+    if before_key:
+        stmt = stmt.filter(key > tuple_(_created_at_bind(db, before_key[0]), literal(before_key[1])))
+        stmt = stmt.order_by(models.Order.created_at.asc(), models.Order.id.asc())
+    else:
+        if after_key:
+            stmt = stmt.filter(key < tuple_(_created_at_bind(db, after_key[0]), literal(after_key[1])))
+        stmt = stmt.order_by(models.Order.created_at.desc(), models.Order.id.desc())
+    orders = stmt.limit(fetch_limit + 1).all()
+    has_more = len(orders) > fetch_limit
+    orders = orders[:fetch_limit]
+    if before_key:
+        orders.reverse()
+        has_next, has_prev = True, has_more
+    else:
+        has_next, has_prev = has_more, after_key is not None
+    next_cursor = encode_history_cursor(orders[-1]) if orders and has_next else None
+    prev_cursor = encode_history_cursor(orders[0]) if orders and has_prev else None
+    return orders, next_cursor, prev_cursor
+
+
+_history_count_cache = {"value": None, "at": 0.0}
+
+
+def invalidate_order_history_count():
+    _history_count_cache["value"] = None
+
+
+def get_order_history_count_cached(db: Session) -> int:
+    """Order total for the admin pager, served from a short in-process cache.
+
+    Large PostgreSQL tables use the planner's reltuples estimate instead of COUNT(*).
+    """
+    now = time.monotonic()
+    if _history_count_cache["value"] is not None and now - _history_count_cache["at"] < settings.ORDER_COUNT_CACHE_SECONDS:
+        return _history_count_cache["value"]
+    count = None
+    if db.get_bind().dialect.name == "postgresql":
+        estimate = db.execute(text("SELECT reltuples::bigint FROM pg_class WHERE relname = 'orders'")).scalar()
+        if estimate is not None and estimate >= settings.ORDER_COUNT_ESTIMATE_THRESHOLD:
+            count = int(estimate)
+    if count is None:
+        count = get_order_history_count(db)
+    _history_count_cache.update(value=count, at=now)
+    return count
+
 def get_audit_logs(db: Session, limit: int = 100):
-    return db.query(models.AuditLog).order_by(models.AuditLog.timestamp.desc()).limit(limit).all()
+    return (
+        db.query(models.AuditLog)
+        .options(selectinload(models.AuditLog.user))
+        .order_by(models.AuditLog.timestamp.desc())
+        .limit(limit)
+        .all()
+    )
+
+def get_user_item_count(db: Session, user_id: int) -> int:
+    row = db.query(models.OrderStatCounter.count).filter_by(scope="user", ref_id=user_id).first()
+    return row[0] if row else 0
+
 
 def get_user_top_dishes(db: Session, user_id: int, limit: int = 5):
     from sqlalchemy import func as sqlfunc
@@ -362,15 +611,57 @@ def get_last_item_preference(db: Session, user_id: int, dish_id: int):
         .first()
 
 
+def _adjust_dish_rating(db: Session, dish_id: int, delta_sum: int, delta_count: int):
+    if dish_id is None or not (delta_sum or delta_count):
+        return
+    db.query(models.Dish).filter(models.Dish.id == dish_id).update(
+        {
+            models.Dish.rating_sum: models.Dish.rating_sum + delta_sum,
+            models.Dish.rating_count: models.Dish.rating_count + delta_count,
+        },
+        synchronize_session=False,
+    )
+
+
+def _unrate_items(db: Session, items):
+    """Take removed items' ratings back out of their dishes' aggregates."""
+    for dish_id, rating in items:
+        if rating is not None:
+            _adjust_dish_rating(db, dish_id, -rating, -1)
+
+
 def get_dish_rating(db: Session, dish_id: int):
-    result = db.query(func.avg(models.OrderItem.rating), func.count(models.OrderItem.rating))\
-        .filter(models.OrderItem.dish_id == dish_id, models.OrderItem.rating.isnot(None))\
-        .first()
+    result = db.query(models.Dish.rating_sum, models.Dish.rating_count).filter(models.Dish.id == dish_id).first()
     if result and result[1] > 0:
-        return {"avg": round(result[0], 1), "count": result[1]}
+        return {"avg": round(result[0] / result[1], 1), "count": result[1]}
     return None
 
 
+def bayesian_rating(rating_sum: int, rating_count: int, prior_mean: float, prior_weight: float) -> float:
+    """Rating pulled towards prior_mean so one 5-star vote does not outrank twenty 4.5s."""
+    return (prior_weight * prior_mean + rating_sum) / (prior_weight + rating_count)
+
+
+def get_dish_ratings(dishes) -> Dict[int, Dict[str, Any]]:
+    """Bulk {dish_id: {"avg", "count", "score"}} from already-loaded dishes; no extra queries."""
+    total_sum = sum(d.rating_sum or 0 for d in dishes)
+    total_count = sum(d.rating_count or 0 for d in dishes)
+    prior_mean = total_sum / total_count if total_count else settings.RATING_PRIOR_MEAN
+    ratings = {}
+    for dish in dishes:
+        count = dish.rating_count or 0
+        ratings[dish.id] = {
+            "avg": round((dish.rating_sum or 0) / count, 1) if count else None,
+            "count": count,
+            "score": bayesian_rating(dish.rating_sum or 0, count, prior_mean, settings.RATING_PRIOR_WEIGHT),
+        }
+    return ratings
+
+
+def sort_dishes_by_rating(dishes, ratings: Dict[int, Dict[str, Any]]):
+    return sorted(dishes, key=lambda d: (ratings[d.id]["score"], ratings[d.id]["count"]), reverse=True)
+
+
 def rate_dish(db: Session, item_id: int, rating: int, user_id: int):
     db_item = db.query(models.OrderItem).filter(models.OrderItem.id == item_id).first()
     if not db_item:
@@ -381,12 +672,18 @@ def rate_dish(db: Session, item_id: int, rating: int, user_id: int):
         return None
     old_rating = db_item.rating
     db_item.rating = rating
+    # A re-rate only shifts the sum; a first rating also counts a new vote
+    if old_rating is None:
+        _adjust_dish_rating(db, db_item.dish_id, rating, 1)
+    else:
+        _adjust_dish_rating(db, db_item.dish_id, rating - old_rating, 0)
     dish_name = db_item.dish.name if db_item.dish else "未知菜品"
     create_audit_log(
         db, user_id, f"给《{dish_name}》评分{rating}星", "order_items", item_id,
         {"rating": old_rating}, {"rating": rating}, commit=False,
     )
     db.commit()
+    menu_cache.invalidate()
     db.refresh(db_item)
     return db_item
 
@@ -394,6 +691,9 @@ def rate_dish(db: Session, item_id: int, rating: int, user_id: int):
 def get_recipe_by_dish(db: Session, dish_id: int):
     return db.query(models.Recipe).filter(models.Recipe.dish_id == dish_id).first()
 
+def get_recipe_revision(db: Session, dish_id: int):
+    return db.query(models.Recipe.id, models.Recipe.updated_at).filter(models.Recipe.dish_id == dish_id).first()
+
 def create_or_update_recipe(db: Session, dish_id: int, content: dict, user_id: int):
     existing = get_recipe_by_dish(db, dish_id)
     dish = get_dish(db, dish_id)
@@ -415,36 +715,89 @@ def create_or_update_recipe(db: Session, dish_id: int, content: dict, user_id: i
             None, {"content": content}, commit=False,
         )
     db.commit()
+    menu_cache.invalidate()
     db.refresh(existing)
     return existing
 
 
-def get_order_stats(db: Session):
-    """Get order statistics using SQL aggregation instead of loading all records."""
-    total_orders = db.query(func.count(models.Order.id)).scalar() or 0
-    total_items = db.query(func.count(models.OrderItem.id)).scalar() or 0
+def _add_to_counters(db: Session, model, keys: tuple, column: str, rows: list, touch: Dict[str, Any] = None):
+    """Insert each row or add its ``column`` value onto the existing one, inside the caller's transaction."""
+    table = model.__table__
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        for row in rows:
+            stmt = insert(table).values(**row, **(touch or {}))
+            db.execute(stmt.on_conflict_do_update(
+                index_elements=[table.c[key] for key in keys],
+                set_={column: table.c[column] + stmt.excluded[column], **(touch or {})},
+            ))
+        return
+    for row in rows:
+        updated = db.query(model).filter_by(**{key: row[key] for key in keys}).update(
+            {getattr(model, column): getattr(model, column) + row[column], **(touch or {})},
+            synchronize_session=False,
+        )
+        if not updated:
+            db.add(model(**row, **(touch or {})))
+
+
+def bump_order_stats(db: Session, deltas: Dict[tuple, int]):
+    """Apply {(scope, ref_id): delta} to order_stat_counters inside the caller's transaction."""
+    rows = [{"scope": scope, "ref_id": ref_id, "count": delta} for (scope, ref_id), delta in deltas.items() if delta]
+    if rows:
+        _add_to_counters(db, models.OrderStatCounter, ("scope", "ref_id"), "count", rows)
+
+
+def _item_stat_deltas(items, sign: int) -> Dict[tuple, int]:
+    deltas: Dict[tuple, int] = {}
+    for dish_id, user_id in items:
+        deltas[("items", 0)] = deltas.get(("items", 0), 0) + sign
+        deltas[("dish", dish_id)] = deltas.get(("dish", dish_id), 0) + sign
+        deltas[("user", user_id)] = deltas.get(("user", user_id), 0) + sign
+    return deltas
+
+
+def rebuild_order_stats(db: Session) -> int:
+    """Recompute order_stat_counters from orders/order_items (backfill or repair)."""
+    db.query(models.OrderStatCounter).delete(synchronize_session=False)
+    counters = [
+        models.OrderStatCounter(scope="orders", ref_id=0, count=db.query(func.count(models.Order.id)).scalar() or 0),
+        models.OrderStatCounter(scope="items", ref_id=0, count=db.query(func.count(models.OrderItem.id)).scalar() or 0),
+    ]
+    for scope, column in (("dish", models.OrderItem.dish_id), ("user", models.OrderItem.user_id)):
+        for ref_id, count in db.query(column, func.count(models.OrderItem.id)).group_by(column).all():
+            if ref_id is not None:
+                counters.append(models.OrderStatCounter(scope=scope, ref_id=ref_id, count=count))
+    db.add_all(counters)
+    db.commit()
+    return len(counters)
 
-    top_dishes = (
-        db.query(models.Dish.name, func.count(models.OrderItem.id).label("count"))
-        .join(models.OrderItem, models.OrderItem.dish_id == models.Dish.id)
-        .group_by(models.Dish.name)
-        .order_by(func.count(models.OrderItem.id).desc())
-        .limit(5)
-        .all()
-    )
 
-    active_users = (
-        db.query(models.User.name, func.count(models.OrderItem.id).label("count"))
-        .join(models.OrderItem, models.OrderItem.user_id == models.User.id)
-        .group_by(models.User.name)
-        .order_by(func.count(models.OrderItem.id).desc())
-        .limit(5)
+def get_order_stats(db: Session):
+    """Read precomputed order statistics from order_stat_counters."""
+    totals = dict(
+        db.query(models.OrderStatCounter.scope, models.OrderStatCounter.count)
+        .filter(models.OrderStatCounter.scope.in_(("orders", "items")), models.OrderStatCounter.ref_id == 0)
         .all()
     )
 
+    def top(model, scope):
+        return (
+            db.query(model.name, models.OrderStatCounter.count)
+            .join(model, model.id == models.OrderStatCounter.ref_id)
+            .filter(models.OrderStatCounter.scope == scope, models.OrderStatCounter.count > 0)
+            .order_by(models.OrderStatCounter.count.desc())
+            .limit(5)
+            .all()
+        )
+
     return {
-        "total_orders": total_orders,
-        "total_items": total_items,
-        "top_dishes": [(name, count) for name, count in top_dishes],
-        "active_users": [(name, count) for name, count in active_users],
+        "total_orders": totals.get("orders", 0),
+        "total_items": totals.get("items", 0),
+        "top_dishes": [(name, count) for name, count in top(models.Dish, "dish")],
+        "active_users": [(name, count) for name, count in top(models.User, "user")],
     }
@@ -1,19 +1,44 @@
+import time
+
+from fastapi import Depends, Request
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base, sessionmaker
 
+from . import db_profile
 from .config import settings
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_size=5,
-    max_overflow=10,
-    pool_recycle=3600,
-    pool_pre_ping=True,
+engine = db_profile.install(
+    create_engine(settings.DATABASE_URL, **db_profile.engine_options(settings.DATABASE_URL)),
+    "primary",
 )
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+replica_engine = None
+ReplicaSessionLocal = None
+if settings.DATABASE_REPLICA_URL:
+    replica_engine = db_profile.install(
+        create_engine(settings.DATABASE_REPLICA_URL, **db_profile.engine_options(settings.DATABASE_REPLICA_URL)),
+        "replica",
+    )
+    ReplicaSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=replica_engine)
+
 Base = declarative_base()
 
+# Async drivers for each sync dialect in DATABASE_URL
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+# Set after a write so the same browser keeps reading from the primary until the replica catches up
+PRIMARY_PIN_COOKIE = "db_primary_until"
+# Session.info key under which a replica session keeps the request's primary session
+PRIMARY_SESSION_KEY = "primary"
+
+_async_engines: dict = {}
+_async_session_factories: dict = {}
+
 
 def get_db():
     db = SessionLocal()
@@ -21,3 +46,76 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def to_async_url(url: str) -> str:
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for database backend: {backend}")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+def get_async_sessionmaker(replica: bool = False):
+    """Create the async engine on first use so asyncpg/aiosqlite stay optional in sync mode."""
+    name = "replica_async" if replica else "primary_async"
+    if name not in _async_session_factories:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        url = settings.DATABASE_REPLICA_URL if replica else settings.DATABASE_URL
+        async_engine = db_profile.install(
+            create_async_engine(to_async_url(url), **db_profile.engine_options(url, is_async=True)),
+            name,
+        )
+        _async_engines[name] = async_engine
+        # Objects outlive the commit inside templates; expiring them would force lazy IO outside the greenlet
+        _async_session_factories[name] = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    return _async_session_factories[name]
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine():
+    for async_engine in _async_engines.values():
+        await async_engine.dispose()
+
+
+# Session dependency for handlers ported to app.async_crud; DB_ASYNC switches the whole path at startup
+get_session = get_async_db if settings.DB_ASYNC else get_db
+
+
+def reads_pinned_to_primary(request: Request) -> bool:
+    try:
+        return float(request.cookies.get(PRIMARY_PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+async def get_read_db(request: Request, db=Depends(get_session)):
+    """Session for read-only handlers: the replica when configured, unless this browser wrote recently."""
+    if ReplicaSessionLocal is None or reads_pinned_to_primary(request):
+        yield db
+        return
+    if settings.DB_ASYNC:
+        async with get_async_sessionmaker(replica=True)() as replica_db:
+            replica_db.info[PRIMARY_SESSION_KEY] = db
+            yield replica_db
+    else:
+        replica_db = ReplicaSessionLocal()
+        replica_db.info[PRIMARY_SESSION_KEY] = db
+        try:
+            yield replica_db
+        finally:
+            replica_db.close()
+
+
+def primary_session(db):
+    """The primary session behind a get_read_db session (the session itself when it already is one).
+
+    Process-wide caches (menu snapshot, user directory) are filled from here: a lagging replica
+    would otherwise re-cache stale rows under the version a write just bumped, for every reader.
+    """
+    return db.info.get(PRIMARY_SESSION_KEY, db)
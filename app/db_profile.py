@@ -0,0 +1,168 @@
+"""Dialect-aware engine profile: pool sizing, per-connection tuning and pool statistics.
+
+Everything is driven by Settings so a single-box SQLite install and a pooled
+Postgres deployment can share the same code path.
+"""
+import threading
+import time
+
+from sqlalchemy import event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import settings
+
+_engines: dict = {}
+
+
+class PoolStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.peak_checked_out = 0
+
+    def record(self, wait_ms: float, checked_out: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_ms_total += wait_ms
+            self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_ms_avg": round(self.wait_ms_total / attempts, 3) if attempts else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3),
+                "peak_checked_out": self.peak_checked_out,
+            }
+
+
+class _InstrumentedPoolMixin:
+    """Times every checkout (queue wait + connect + pre-ping) and counts pool timeouts."""
+
+    _stats: PoolStats | None = None
+
+    @property
+    def stats(self) -> PoolStats:
+        if self._stats is None:
+            self._stats = PoolStats()
+        return self._stats
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            conn = super().connect()
+        except exc.TimeoutError:
+            self.stats.record((time.perf_counter() - start) * 1000, self.checkedout(), timed_out=True)
+            raise
+        self.stats.record((time.perf_counter() - start) * 1000, self.checkedout())
+        return conn
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep the counters across it
+        pool = super().recreate()
+        pool._stats = self._stats
+        return pool
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    pass
+
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def _is_memory_sqlite(url) -> bool:
+    return url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:")
+
+
+def engine_options(database_url: str, is_async: bool = False) -> dict:
+    url = make_url(database_url)
+    if _is_memory_sqlite(url):
+        # In-memory SQLite uses a single shared connection; pool sizing does not apply
+        return {}
+    return {
+        "poolclass": InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": True,
+    }
+
+
+def connect_statements(backend: str) -> list[str]:
+    """Session-level settings applied to every new DBAPI connection."""
+    if backend == "postgresql":
+        statements = []
+        if settings.DB_APPLICATION_NAME:
+            name = settings.DB_APPLICATION_NAME.replace("'", "''")
+            statements.append(f"SET application_name = '{name}'")
+        if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+            statements.append(f"SET statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+        return statements
+    if backend == "sqlite":
+        return [
+            "PRAGMA journal_mode=WAL",
+            "PRAGMA synchronous=NORMAL",
+            f"PRAGMA busy_timeout={int(settings.SQLITE_BUSY_TIMEOUT_MS)}",
+            f"PRAGMA mmap_size={int(settings.SQLITE_MMAP_SIZE)}",
+            # Negative cache_size is in KiB rather than pages
+            f"PRAGMA cache_size=-{int(settings.SQLITE_CACHE_SIZE_KB)}",
+        ]
+    return []
+
+
+def install(engine, name: str):
+    """Register connect-time tuning and expose the engine's pool in pool_stats()."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    backend = sync_engine.dialect.name
+    statements = connect_statements(backend)
+    if backend == "sqlite" and _is_memory_sqlite(sync_engine.url):
+        statements = [s for s in statements if "journal_mode" not in s and "mmap_size" not in s]
+
+    if statements:
+        @event.listens_for(sync_engine, "connect")
+        def _apply_profile(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            try:
+                for statement in statements:
+                    cursor.execute(statement)
+            finally:
+                cursor.close()
+            if backend == "postgresql":
+                # SET runs inside the implicit transaction psycopg opens; make it stick
+                dbapi_connection.commit()
+
+    _engines[name] = sync_engine
+    return engine
+
+
+def pool_stats() -> dict:
+    stats = {}
+    for name, engine in _engines.items():
+        pool = engine.pool
+        entry = {"pool": type(pool).__name__}
+        if isinstance(pool, QueuePool):
+            entry.update({
+                "size": pool.size(),
+                "checked_in": pool.checkedin(),
+                "checked_out": pool.checkedout(),
+                "overflow": max(0, pool.overflow()),
+                "max_overflow": settings.DB_MAX_OVERFLOW,  # engine_options() sizes every QueuePool we build
+                "timeout": pool.timeout(),
+            })
+        if isinstance(pool, _InstrumentedPoolMixin):
+            entry.update(pool.stats.snapshot())
+        stats[name] = entry
+    return stats
@@ -1,3 +1,5 @@
+import asyncio
+import hashlib
 import os
 import uuid
 from typing import Optional
@@ -7,26 +9,76 @@ from fastapi import Cookie, Depends, HTTPException, Request, UploadFile
 from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 
-from . import crud, models, security
+from . import assets, async_crud, crud, images, menu_cache, models, security, templating, user_directory
 from .csrf import csrf_guard, get_csrf_token
-from .database import get_db
+from .database import get_session, primary_session
+from .uploads import MAX_UPLOAD_SIZE, PART_PREFIX, SpooledUpload, place, too_large
 
-templates = Jinja2Templates(directory="templates")
+templates = Jinja2Templates(env=templating.build_environment())
+templates.env.filters["image_variant"] = images.image_variant
+templates.env.filters["image_srcset"] = images.image_srcset
+templates.env.globals["asset_url"] = assets.asset_url
+templates.env.globals["stream_flush"] = templating.stream_flush
 
 SUPPORTED_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
 SUPPORTED_CONTENT_TYPES = {"image/jpeg", "image/png", "image/gif", "image/webp"}
 SUPPORTED_MSG = "支持的格式: JPG, JPEG, PNG, GIF, WebP"
-MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
 
 
-async def get_current_user(db: Session = Depends(get_db), user_id: Optional[str] = Cookie(None)):
+def stream_template(request: Request, name: str, context: dict) -> templating.StreamingTemplateResponse:
+    """templates.TemplateResponse for long list pages: sent in chunks while it renders."""
+    return templating.StreamingTemplateResponse(templates.env, request, name, context)
+
+
+async def get_user_directory(db: Session):
+    version, users = user_directory.lookup()
+    if users is None:
+        users = user_directory.store(version, await async_crud.get_user_directory(primary_session(db)))
+    return users
+
+
+async def get_menu(db: Session) -> menu_cache.MenuSnapshot:
+    version, menu = menu_cache.lookup()
+    if menu is None:
+        dishes = [menu_cache.to_menu_dish(dish) for dish in await async_crud.get_dishes(primary_session(db))]
+        categories = list(dict.fromkeys(dish.category for dish in dishes if dish.category))
+        ratings = crud.get_dish_ratings(dishes)
+        menu = menu_cache.store(version, dishes, categories, ratings, crud.sort_dishes_by_rating(dishes, ratings))
+    return menu
+
+
+def set_session_cookie(response, request: Request, user):
+    response.set_cookie(
+        key="user_id",
+        value=security.issue_session_token(user.id, user.role, user.session_generation or 0),
+        httponly=True, samesite="lax", max_age=security.SESSION_MAX_AGE,
+        secure=request.url.scheme == "https",
+    )
+
+
+async def get_current_user(db: Session = Depends(get_session), user_id: Optional[str] = Cookie(None)):
+    """Resolve the session cookie to the caller.
+
+    v2 tokens are checked against the in-process user directory, so the warm path
+    never queries the database. Legacy id-only cookies carry neither an expiry nor a
+    session generation, so they cannot be revoked and are rejected (the user logs in again).
+    """
     if not user_id:
         return None
     try:
         verified = security.verify_cookie_value(user_id)
         if verified is None:
             return None
-        user = crud.get_user(db, int(verified))
+        claims = security.parse_session_claims(verified)
+        if claims is None:
+            return None  # legacy id-only, expired or malformed token
+        user = user_directory.find(await get_user_directory(db), claims.user_id)
+        if user is None or (user.session_generation or 0) != claims.generation:
+            # Beyond the directory's row limit, or the directory predates a generation bump made
+            # by another process: the primary row decides
+            user = await async_crud.get_user(db, claims.user_id)
+        if user is None or (user.session_generation or 0) != claims.generation:
+            return None
         return user
     except (ValueError, TypeError):
         return None
@@ -45,8 +97,8 @@ async def require_admin(user: models.User = Depends(login_required)):
     return user
 
 
-def get_common_context(request: Request, db: Session, current_user: Optional[models.User] = None):
-    users = crud.get_users(db)
+async def get_common_context(request: Request, db: Session, current_user: Optional[models.User] = None):
+    users = await get_user_directory(db)
     return {
         "users": users,
         "current_user": current_user,
@@ -62,31 +114,28 @@ async def save_upload_file(file: UploadFile, destination_dir: str) -> str:
     if file.content_type and file.content_type not in SUPPORTED_CONTENT_TYPES:
         raise HTTPException(status_code=400, detail=f"不支持的文件类型: {file.content_type}. {SUPPORTED_MSG}")
     os.makedirs(destination_dir, exist_ok=True)
-    filename = f"{uuid.uuid4()}{ext}"
-    filepath = os.path.join(destination_dir, filename)
-    total_size = 0
-    try:
-        async with aiofiles.open(filepath, "wb") as out_file:
-            while content := await file.read(1024 * 1024):
-                total_size += len(content)
-                if total_size > MAX_UPLOAD_SIZE:
-                    raise HTTPException(status_code=413, detail=f"文件大小超过限制（最大 {MAX_UPLOAD_SIZE // 1024 // 1024}MB）")
-                await out_file.write(content)
-    except HTTPException:
-        if os.path.exists(filepath):
-            os.remove(filepath)
-        raise
+    if isinstance(file, SpooledUpload):
+        # Already on disk, size-checked and hashed while the body streamed in
+        filepath = os.path.join(destination_dir, f"{await file.hexdigest()}{ext}")
+        stored = await file.claim(filepath)
+    else:
+        tmp_path = os.path.join(destination_dir, f"{PART_PREFIX}{uuid.uuid4().hex}")
+        sha256 = hashlib.sha256()
+        total_size = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as out_file:
+                while content := await file.read(1024 * 1024):
+                    total_size += len(content)
+                    if total_size > MAX_UPLOAD_SIZE:
+                        raise too_large()
+                    sha256.update(content)
+                    await out_file.write(content)
+        except HTTPException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        filepath = os.path.join(destination_dir, f"{sha256.hexdigest()}{ext}")
+        stored = await asyncio.to_thread(place, tmp_path, filepath)
+    if stored or not images.has_derivatives(filepath):
+        await images.process_upload(filepath)
     return f"/{filepath}"
-
-
-def delete_old_image(image_url: Optional[str]):
-    if image_url and image_url.startswith("/static/uploads/"):
-        relative_path = os.path.normpath(image_url.lstrip("/"))
-        # Ensure normalized path is still within uploads directory (prevent path traversal)
-        if not relative_path.startswith("static/uploads/"):
-            return
-        if os.path.exists(relative_path):
-            try:
-                os.remove(relative_path)
-            except Exception:
-                pass
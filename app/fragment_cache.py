@@ -0,0 +1,106 @@
+"""In-process LRU cache of rendered template fragments.
+
+The dish list renders one card per active dish on every home page load, menu
+refresh and search, yet a card only changes when its dish, recipe, rating or
+photo derivatives do. Templates wrap such markup in
+
+    {% cache dish.id, dish.updated_at, dish.recipe.updated_at if dish.recipe %}
+        ...
+    {% endcache %}
+
+The listed values plus the tag's identity form the key, so any edit
+produces a new key and the old entry simply ages out. Entries are evicted
+least-recently-used once their total size passes FRAGMENT_CACHE_MAX_BYTES
+(0 disables caching). Everything a fragment shows must be covered by its key.
+"""
+import sys
+import threading
+import uuid
+from collections import OrderedDict
+
+from jinja2 import nodes
+from jinja2.ext import Extension
+
+from .config import settings
+
+_lock = threading.Lock()
+_entries: "OrderedDict[tuple, str]" = OrderedDict()
+_bytes = 0
+_hits = 0
+_misses = 0
+_evictions = 0
+
+
+def get(key: tuple):
+    global _hits, _misses
+    with _lock:
+        value = _entries.get(key)
+        if value is None:
+            _misses += 1
+            return None
+        _entries.move_to_end(key)
+        _hits += 1
+        return value
+
+
+def put(key: tuple, value: str):
+    global _bytes, _evictions
+    size = sys.getsizeof(value)
+    limit = settings.FRAGMENT_CACHE_MAX_BYTES
+    if size > limit:
+        return
+    with _lock:
+        old = _entries.pop(key, None)
+        if old is not None:
+            _bytes -= sys.getsizeof(old)
+        _entries[key] = value
+        _bytes += size
+        while _bytes > limit:
+            _, evicted = _entries.popitem(last=False)
+            _bytes -= sys.getsizeof(evicted)
+            _evictions += 1
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "entries": len(_entries),
+            "bytes": _bytes,
+            "max_bytes": settings.FRAGMENT_CACHE_MAX_BYTES,
+            "hits": _hits,
+            "misses": _misses,
+            "evictions": _evictions,
+        }
+
+
+def reset():
+    global _bytes, _hits, _misses, _evictions
+    with _lock:
+        _entries.clear()
+        _bytes = _hits = _misses = _evictions = 0
+
+
+class FragmentCacheExtension(Extension):
+    """``{% cache key, ... %}...{% endcache %}``: render the body once per distinct key."""
+
+    tags = {"cache"}
+
+    def parse(self, parser):
+        lineno = next(parser.stream).lineno
+        # Unique per compile: two tags never share entries, and an edited template starts afresh
+        fragment = nodes.Const(f"{parser.name}:{lineno}:{uuid.uuid4().hex[:8]}")
+        key = parser.parse_tuple(with_condexpr=True)
+        if not isinstance(key, nodes.Tuple):
+            key = nodes.Tuple([key], "load")
+        body = parser.parse_statements(("name:endcache",), drop_needle=True)
+        return nodes.CallBlock(self.call_method("_render", [fragment, key]), [], [], body).set_lineno(lineno)
+
+    def _render(self, fragment: str, key: tuple, caller):
+        if settings.FRAGMENT_CACHE_MAX_BYTES <= 0:
+            return caller()
+        full_key = (fragment, *key)
+        value = get(full_key)
+        if value is None:
+            value = caller()
+            put(full_key, value)
+        return value
@@ -0,0 +1,176 @@
+"""Orphaned upload sweeper, run from the app on a timer or by cleanup_images.py.
+
+The live set is streamed from upload_refs rows with a positive count, which
+crud keeps in step with dishes.image_url (yield_per on the ref_count index,
+no ORM objects; cleanup_images.py --rebuild-refs repairs drift). It is
+reduced to file stems, so an original and all of its ``.w<width>.webp``
+derivatives are kept or dropped together. The upload
+directory is walked once with os.scandir, and the stat comes from the
+directory entry. Anything not referenced is an orphan:
+- replaced photos;
+- uploads whose dish was never created;
+- ``.part-*`` files from aborted requests;
+- leftover ``.tmp`` files.
+
+An orphan is only deleted once its mtime is older than the grace period.
+Upload placement refreshes the mtime of a deduplicated file, so a file about
+to be referenced again is not swept in between. Before deleting, the live
+set is read again and each file is stat'ed again, so a reference or reuse
+that lands during the walk still saves it. Deletions run in batches on a
+small thread pool. Afterwards, zero-count upload_refs rows whose file is
+gone are released. Every run returns a JSON-serialisable report.
+"""
+import asyncio
+import logging
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from functools import partial
+
+from sqlalchemy.orm import Session
+
+from . import crud, images, uploads
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+BATCH_SIZE = 64
+WORKERS = 4
+FETCH_SIZE = 1000
+
+_last_report: dict | None = None
+
+
+def _stem(name: str) -> str:
+    if images.is_derivative(name):
+        return images.DERIVATIVE_PATTERN.sub("", name)
+    return os.path.splitext(name)[0]
+
+
+def referenced_stems(db: Session) -> set[str]:
+    prefix = f"/{uploads.UPLOAD_DIR}/"
+    return {
+        _stem(url[len(prefix):])
+        for url in crud.iter_referenced_upload_urls(db, FETCH_SIZE)
+        if url.startswith(prefix)
+    }
+
+
+def find_orphans(directory: str, referenced: set[str], cutoff: float) -> tuple[list[tuple[str, int]], int, int]:
+    """(orphans as (path, size), files skipped for being too recent, files scanned)."""
+    orphans, recent, scanned = [], 0, 0
+    with os.scandir(directory) as entries:
+        for entry in entries:
+            name = entry.name
+            if not entry.is_file(follow_symlinks=False) or (name.startswith(".") and not name.startswith(uploads.PART_PREFIX)):
+                continue  # .gitkeep and friends
+            scanned += 1
+            if not name.startswith(uploads.PART_PREFIX) and _stem(name) in referenced:
+                continue
+            stat = entry.stat(follow_symlinks=False)
+            if stat.st_mtime > cutoff:
+                recent += 1
+                continue
+            orphans.append((entry.path, stat.st_size))
+    return orphans, recent, scanned
+
+
+def _remove_batch(batch: list[tuple[str, int]], cutoff: float) -> tuple[list[str], int, list[str]]:
+    deleted, freed, errors = [], 0, []
+    for path, size in batch:
+        try:
+            # The scan may be minutes old: place() can have reused the file since, refreshing its mtime
+            if os.stat(path, follow_symlinks=False).st_mtime > cutoff:
+                continue
+            os.remove(path)
+        except FileNotFoundError:
+            continue
+        except OSError as exc:
+            errors.append(f"{os.path.basename(path)}: {exc}")
+            continue
+        deleted.append(os.path.basename(path))
+        freed += size
+    return deleted, freed, errors
+
+
+def sweep(db: Session, dry_run: bool = False, grace_seconds: int | None = None, workers: int = WORKERS) -> dict:
+    global _last_report
+    started = time.monotonic()
+    grace = settings.IMAGE_SWEEP_GRACE_SECONDS if grace_seconds is None else grace_seconds
+    directory = uploads.UPLOAD_DIR
+    report = {
+        "started_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "directory": directory,
+        "dry_run": dry_run,
+        "grace_seconds": grace,
+        "referenced": 0,
+        "scanned": 0,
+        "recent_skipped": 0,
+        "orphans": 0,
+        "deleted": 0,
+        "freed_bytes": 0,
+        "refs_released": 0,
+        "errors": [],
+        "files": [],
+    }
+    referenced = referenced_stems(db)
+    report["referenced"] = len(referenced)
+    if os.path.isdir(directory):
+        cutoff = time.time() - grace
+        orphans, report["recent_skipped"], report["scanned"] = find_orphans(directory, referenced, cutoff)
+        if orphans and not dry_run:
+            # Dishes saved while the directory was walked point at files that looked orphaned a moment ago
+            referenced = referenced_stems(db)
+            orphans = [
+                (path, size) for path, size in orphans
+                if os.path.basename(path).startswith(uploads.PART_PREFIX) or _stem(os.path.basename(path)) not in referenced
+            ]
+        report["orphans"] = len(orphans)
+        if dry_run:
+            report["files"] = sorted(os.path.basename(path) for path, _ in orphans)
+            report["freed_bytes"] = sum(size for _, size in orphans)
+        elif orphans:
+            batches = [orphans[i:i + BATCH_SIZE] for i in range(0, len(orphans), BATCH_SIZE)]
+            with ThreadPoolExecutor(max_workers=min(workers, len(batches)), thread_name_prefix="image-sweep") as pool:
+                for deleted, freed, errors in pool.map(partial(_remove_batch, cutoff=cutoff), batches):
+                    report["files"].extend(deleted)
+                    report["freed_bytes"] += freed
+                    report["errors"].extend(errors)
+            report["files"].sort()
+            report["deleted"] = len(report["files"])
+    if not dry_run:
+        prefix = f"/{directory}/"
+        for url in crud.get_unreferenced_uploads(db):
+            # A zero-count file still inside its grace period keeps its row until a later run deletes it
+            still_stored = url.startswith(prefix) and os.path.exists(os.path.join(directory, url[len(prefix):]))
+            if not still_stored and crud.release_upload(db, url):
+                report["refs_released"] += 1
+    report["duration_ms"] = round((time.monotonic() - started) * 1000, 1)
+    _last_report = {key: value for key, value in report.items() if key != "files"}
+    return report
+
+
+def _sweep_once(session_factory) -> dict:
+    db = session_factory()
+    try:
+        return sweep(db)
+    finally:
+        db.close()
+
+
+async def run_periodically(session_factory, interval: int):
+    """Background task started from the app lifespan; cancelled on shutdown."""
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await asyncio.to_thread(_sweep_once, session_factory)
+        except Exception:
+            logger.exception("Image sweep failed")
+            continue
+        if report["deleted"] or report["errors"]:
+            logger.info("Image sweep: %s", {key: value for key, value in report.items() if key != "files"})
+
+
+def stats() -> dict:
+    return {"interval_seconds": settings.IMAGE_SWEEP_INTERVAL_SECONDS, "last_run": _last_report}
@@ -0,0 +1,140 @@
+"""WebP derivatives for uploaded dish photos, generated in a process pool.
+
+Phone photos arrive as multi-megabyte JPEGs with EXIF orientation and GPS
+data. process_image() rotates the pixels upright, rewrites the original
+without EXIF and writes one ``<name>.w<width>.webp`` per DERIVATIVE_WIDTHS
+entry next to it. Pillow work is CPU-bound, so uploads hand it to a
+ProcessPoolExecutor (IMAGE_WORKERS processes, 0 = a worker thread) and the
+event loop keeps serving. process_images.py backfills existing uploads.
+
+Templates call ``image_variant`` / ``image_srcset``. Both fall back to the
+original when derivatives are missing (not processed yet, or not an image
+Pillow can read). Callers that already know the answer, like the menu
+snapshot's ``has_derivatives``, pass it as ``available`` and skip the disk
+check.
+"""
+import asyncio
+import logging
+import multiprocessing
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+# The 64px menu avatar at 2x, and the dish modal on small and large / high-DPI screens
+DERIVATIVE_WIDTHS = {"thumb": 128, "card": 320, "modal": 960}
+DERIVATIVE_PATTERN = re.compile(r"\.w\d+\.webp$")
+WEBP_QUALITY = 80
+JPEG_QUALITY = 90
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def derivative_path(path: str, width: int) -> str:
+    return f"{os.path.splitext(path)[0]}.w{width}.webp"
+
+
+def derivative_paths(path: str) -> list[str]:
+    return [derivative_path(path, width) for width in DERIVATIVE_WIDTHS.values()]
+
+
+def is_derivative(path: str) -> bool:
+    return bool(DERIVATIVE_PATTERN.search(path))
+
+
+def has_derivatives(path: str) -> bool:
+    # The widest one is written last
+    return os.path.exists(derivative_path(path, max(DERIVATIVE_WIDTHS.values())))
+
+
+def _save(image, path: str, **params):
+    tmp_path = f"{path}.tmp"
+    image.save(tmp_path, **params)
+    os.replace(tmp_path, path)
+
+
+def process_image(path: str) -> list[str]:
+    """Orient and strip the original in place and write its WebP derivatives. Runs in a worker process."""
+    from PIL import Image, ImageOps
+
+    with Image.open(path) as source:
+        image_format = source.format
+        animated = getattr(source, "is_animated", False)
+        exif = source.getexif()
+        icc_profile = source.info.get("icc_profile")
+        image = ImageOps.exif_transpose(source)  # always a copy, usable after close
+    if exif and not animated and image_format in ("JPEG", "PNG", "WEBP"):
+        params = {"quality": JPEG_QUALITY, "optimize": True} if image_format == "JPEG" else {}
+        _save(image, path, format=image_format, icc_profile=icc_profile, **params)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if image.has_transparency_data else "RGB")
+
+    written = []
+    for width in sorted(DERIVATIVE_WIDTHS.values()):
+        variant = image
+        if image.width > width:
+            variant = image.resize((width, max(1, round(image.height * width / image.width))), Image.Resampling.LANCZOS)
+        target = derivative_path(path, width)
+        _save(variant, target, format="WEBP", quality=WEBP_QUALITY, method=4, icc_profile=icc_profile)
+        written.append(target)
+    return written
+
+
+def get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        # spawn: the server process has threads (audit sink, anyio) that fork would copy mid-flight
+        _pool = ProcessPoolExecutor(max_workers=settings.IMAGE_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+    return _pool
+
+
+def shutdown():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=True, cancel_futures=True)
+        _pool = None
+
+
+async def process_upload(path: str) -> list[str]:
+    """Derivatives for a freshly stored upload; failures are logged and leave just the original."""
+    try:
+        if settings.IMAGE_WORKERS > 0:
+            return await asyncio.get_running_loop().run_in_executor(get_pool(), process_image, path)
+        return await asyncio.to_thread(process_image, path)
+    except Exception as exc:
+        logger.warning("Image processing failed for %s: %s", path, exc)
+        for target in derivative_paths(path):
+            if os.path.exists(target):
+                os.remove(target)
+        return []
+
+
+def _local_path(image_url: str) -> str | None:
+    if not image_url or not image_url.startswith("/static/uploads/"):
+        return None
+    return image_url.lstrip("/")
+
+
+def url_has_derivatives(image_url: str) -> bool:
+    path = _local_path(image_url)
+    return path is not None and has_derivatives(path)
+
+
+def image_variant(image_url: str, name: str, available: bool | None = None) -> str:
+    """Jinja filter: URL of one derivative, or the original when there is none."""
+    path = _local_path(image_url)
+    if path is None or not (has_derivatives(path) if available is None else available):
+        return image_url
+    return "/" + derivative_path(path, DERIVATIVE_WIDTHS[name])
+
+
+def image_srcset(image_url: str, *names: str, available: bool | None = None) -> str:
+    """Jinja filter: ``srcset`` value over the given derivatives, empty when there are none."""
+    path = _local_path(image_url)
+    if path is None or not (has_derivatives(path) if available is None else available):
+        return ""
+    widths = [DERIVATIVE_WIDTHS[name] for name in names or DERIVATIVE_WIDTHS]
+    return ", ".join(f"/{derivative_path(path, width)} {width}w" for width in sorted(widths))
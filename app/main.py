@@ -5,12 +5,14 @@ from contextlib import asynccontextmanager
 import structlog
 from fastapi import FastAPI, HTTPException, Request
 from fastapi.responses import RedirectResponse
-from fastapi.staticfiles import StaticFiles
 
+from . import assets, audit, image_sweeper, images, templating
+from .assets import AssetStaticFiles
+from .compression import CompressionMiddleware
 from .config import settings
-from .csrf import CSRF_COOKIE_NAME, generate_csrf_token
-from .database import engine
+from .database import SessionLocal, dispose_async_engine, engine
 from .dependencies import templates
+from .middleware import SecurityMiddleware
 from .routers import admin, auth, dishes, history, orders, recipes
 from .routers import settings as settings_page_router
 from .security import is_production
@@ -91,12 +93,24 @@ async def lifespan(app: FastAPI):
             logger.info("AGY CLI is available")
         else:
             logger.warning("AGY CLI is NOT available — AI features disabled")
+        if settings.AUDIT_WRITE_BEHIND:
+            audit.sink.start(SessionLocal)
+    await asyncio.to_thread(assets.build_manifest)
+    await asyncio.to_thread(templating.warm_up, templates.env)
+    sweeper = None
+    if settings.IMAGE_SWEEP_INTERVAL_SECONDS > 0 and not settings.is_testing:
+        sweeper = asyncio.create_task(image_sweeper.run_periodically(SessionLocal, settings.IMAGE_SWEEP_INTERVAL_SECONDS))
     yield
+    if sweeper is not None:
+        sweeper.cancel()
+    await asyncio.to_thread(audit.sink.stop)
+    await asyncio.to_thread(images.shutdown)
+    await dispose_async_engine()
 
 
 app = FastAPI(title="宝宝的私房菜馆", lifespan=lifespan)
 
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", AssetStaticFiles(directory=assets.STATIC_DIR), name="static")
 
 
 @app.get("/health")
@@ -135,46 +149,11 @@ app.include_router(history.router)
 app.include_router(settings_page_router.router)
 
 
-@app.middleware("http")
-async def set_csrf_cookie(request: Request, call_next):
-    if not request.cookies.get(CSRF_COOKIE_NAME):
-        token = generate_csrf_token()
-        request.state.csrf_token = token
-    response = await call_next(request)
-    if not request.cookies.get(CSRF_COOKIE_NAME):
-        token = getattr(request.state, "csrf_token", generate_csrf_token())
-        response.set_cookie(
-            key=CSRF_COOKIE_NAME, value=token,
-            httponly=True, samesite="lax",
-            max_age=86400, secure=request.url.scheme == "https",
-        )
-    return response
-
-
-@app.middleware("http")
-async def security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["X-Content-Type-Options"] = "nosniff"
-    response.headers["X-Frame-Options"] = "DENY"
-    response.headers["X-XSS-Protection"] = "1; mode=block"
-    response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "style-src 'self' 'unsafe-inline' fonts.googleapis.com cdnjs.cloudflare.com unpkg.com; "
-        "font-src fonts.gstatic.com cdnjs.cloudflare.com; "
-        "script-src 'self' 'unsafe-inline' 'unsafe-eval' unpkg.com; "
-        "img-src 'self' data:; "
-        "connect-src 'self'"
-    )
-    if is_production():
-        response.headers["Strict-Transport-Security"] = "max-age=63072000; includeSubDomains"
-    # Static file caching
-    path = request.url.path
-    if path.startswith("/static/css/") or path.startswith("/static/js/"):
-        response.headers["Cache-Control"] = "public, max-age=86400"
-    elif path.startswith("/static/uploads/"):
-        response.headers["Cache-Control"] = "public, max-age=3600"
-    return response
+app.add_middleware(
+    SecurityMiddleware,
+    production=is_production(),
+    replica_sticky_seconds=settings.REPLICA_STICKY_SECONDS if settings.DATABASE_REPLICA_URL else 0,
+)
 
 
 @app.exception_handler(HTTPException)
@@ -193,3 +172,13 @@ async def global_exception_handler(request: Request, exc: Exception):
     logger.error(f"Global error: {exc}", exc_info=True)
     detail = "系统出现意外错误，请稍后再试。" if is_production() else str(exc)
     return templates.TemplateResponse(request, "error.html", {"detail": detail}, status_code=500)
+
+
+# Added last so it wraps every other middleware and sees the final headers
+if settings.COMPRESSION_MIN_SIZE > 0:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=settings.COMPRESSION_MIN_SIZE,
+        gzip_level=settings.COMPRESSION_GZIP_LEVEL,
+        brotli_quality=settings.COMPRESSION_BROTLI_QUALITY,
+    )
@@ -0,0 +1,119 @@
+"""Versioned in-process snapshot of the active menu.
+
+The home page and the order form both render the full list of active dishes,
+and the dishUpdated HTMX trigger re-fetches it after every edit. The menu
+changes far less often than it is read, so it is kept in memory as an
+immutable snapshot: plain tuples rather than ORM rows, with only the recipe
+fields the list shows. crud bumps the version after every committed dish,
+recipe or rating write. MENU_CACHE_TTL bounds staleness when another process
+(seed script, a second worker) edits the menu behind our back.
+"""
+import threading
+import time
+from datetime import datetime
+from typing import NamedTuple, Optional
+
+from . import images
+from .config import settings
+
+# The dish list only shows these recipe fields; the full JSON body stays in the database
+RECIPE_SUMMARY_KEYS = ("cook_time", "difficulty")
+
+
+class MenuRecipe(NamedTuple):
+    content: dict
+    updated_at: Optional[datetime] = None
+
+
+class MenuDish(NamedTuple):
+    id: int
+    name: str
+    description: Optional[str]
+    image_url: Optional[str]
+    category: str
+    rating_sum: int
+    rating_count: int
+    recipe: Optional[MenuRecipe]
+    # Part of the dish card's fragment cache key (app.fragment_cache)
+    updated_at: Optional[datetime] = None
+    # Checked once per snapshot so cached cards never touch the disk
+    has_derivatives: bool = False
+
+
+class MenuSnapshot(NamedTuple):
+    version: int
+    dishes: tuple
+    categories: tuple
+    ratings: dict
+    by_rating: tuple
+
+
+_lock = threading.Lock()
+_version = 0
+_cached_at = 0.0
+_snapshot: Optional[MenuSnapshot] = None
+_hits = 0
+_misses = 0
+
+
+def invalidate():
+    global _version
+    with _lock:
+        _version += 1
+
+
+def lookup():
+    """Return (version, snapshot); snapshot is None when the caller must reload and store()."""
+    global _hits, _misses
+    with _lock:
+        fresh = (
+            _snapshot is not None and _snapshot.version == _version
+            and time.monotonic() - _cached_at < settings.MENU_CACHE_TTL
+        )
+        if fresh:
+            _hits += 1
+            return _version, _snapshot
+        _misses += 1
+        return _version, None
+
+
+def to_menu_dish(dish) -> MenuDish:
+    recipe = None
+    if dish.recipe is not None:
+        content = dish.recipe.content or {}
+        recipe = MenuRecipe({key: content.get(key) for key in RECIPE_SUMMARY_KEYS}, dish.recipe.updated_at)
+    return MenuDish(
+        dish.id, dish.name, dish.description, dish.image_url, dish.category or "",
+        dish.rating_sum or 0, dish.rating_count or 0, recipe, dish.updated_at,
+        images.url_has_derivatives(dish.image_url),
+    )
+
+
+def store(version: int, dishes, categories, ratings: dict, by_rating) -> MenuSnapshot:
+    global _cached_at, _snapshot
+    snapshot = MenuSnapshot(version, tuple(dishes), tuple(categories), ratings, tuple(by_rating))
+    with _lock:
+        # A menu write since lookup() means this data may already be stale; serve it once, don't cache
+        if version == _version:
+            _cached_at = time.monotonic()
+            _snapshot = snapshot
+    return snapshot
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "version": _version,
+            "hits": _hits,
+            "misses": _misses,
+            "size": len(_snapshot.dishes) if _snapshot else 0,
+        }
+
+
+def reset():
+    global _version, _cached_at, _snapshot, _hits, _misses
+    with _lock:
+        _version += 1
+        _cached_at = 0.0
+        _snapshot = None
+        _hits = _misses = 0
@@ -0,0 +1,90 @@
+"""Security headers, the CSRF cookie and the replica pin in one pure-ASGI layer.
+
+These used to be three ``@app.middleware("http")`` functions. Every
+BaseHTTPMiddleware layer runs the endpoint in a separate task and re-streams
+its body, and that overhead landed on every static file and every poll. This
+middleware only touches ``http.response.start``: it appends a header block
+that is built once at startup, and adds cookies when they are needed. It
+never wraps the body.
+"""
+import time
+from http.cookies import SimpleCookie
+
+from starlette.datastructures import Headers
+from starlette.requests import cookie_parser
+
+from .csrf import CSRF_COOKIE_NAME, generate_csrf_token
+from .database import PRIMARY_PIN_COOKIE
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "style-src 'self' 'unsafe-inline' fonts.googleapis.com cdnjs.cloudflare.com unpkg.com; "
+    "font-src fonts.gstatic.com cdnjs.cloudflare.com; "
+    "script-src 'self' 'unsafe-inline' 'unsafe-eval' unpkg.com; "
+    "img-src 'self' data:; "
+    "connect-src 'self'"
+)
+CSRF_COOKIE_MAX_AGE = 86400
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+
+def security_headers(production: bool) -> list[tuple[bytes, bytes]]:
+    headers = [
+        ("X-Content-Type-Options", "nosniff"),
+        ("X-Frame-Options", "DENY"),
+        ("X-XSS-Protection", "1; mode=block"),
+        ("Referrer-Policy", "strict-origin-when-cross-origin"),
+        ("Content-Security-Policy", CONTENT_SECURITY_POLICY),
+    ]
+    if production:
+        headers.append(("Strict-Transport-Security", "max-age=63072000; includeSubDomains"))
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+def cookie_header(key: str, value: str, max_age: int, secure: bool) -> tuple[bytes, bytes]:
+    """Set-Cookie header in the same shape as Response.set_cookie(httponly=True, samesite="lax")."""
+    cookie = SimpleCookie()
+    cookie[key] = value
+    cookie[key]["max-age"] = max_age
+    cookie[key]["path"] = "/"
+    cookie[key]["httponly"] = True
+    cookie[key]["samesite"] = "lax"
+    if secure:
+        cookie[key]["secure"] = True
+    return b"set-cookie", cookie.output(header="").strip().encode("latin-1")
+
+
+class SecurityMiddleware:
+    def __init__(self, app, production: bool = False, replica_sticky_seconds: int = 0):
+        self.app = app
+        self.headers = security_headers(production)
+        self.header_names = frozenset(name for name, _ in self.headers)
+        # 0 when there is no replica: writes then need no pin cookie
+        self.replica_sticky_seconds = replica_sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        csrf_token = None
+        if not cookie_parser(Headers(scope=scope).get("cookie", "")).get(CSRF_COOKIE_NAME):
+            # get_csrf_token() renders this same token into forms on this response
+            csrf_token = generate_csrf_token()
+            scope.setdefault("state", {})[CSRF_COOKIE_NAME] = csrf_token
+        secure = scope.get("scheme") == "https"
+        pin = self.replica_sticky_seconds and scope["method"] not in SAFE_METHODS
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                raw = [(name, value) for name, value in message.get("headers", ()) if name.lower() not in self.header_names]
+                raw.extend(self.headers)
+                if csrf_token is not None:
+                    raw.append(cookie_header(CSRF_COOKIE_NAME, csrf_token, CSRF_COOKIE_MAX_AGE, secure))
+                if pin:
+                    until = str(int(time.time()) + self.replica_sticky_seconds)
+                    raw.append(cookie_header(PRIMARY_PIN_COOKIE, until, self.replica_sticky_seconds, secure))
+                message["headers"] = raw
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
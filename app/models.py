@@ -1,10 +1,18 @@
-from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Integer, String, Text
+from datetime import datetime, timezone
+
+from sqlalchemy import JSON, Boolean, Column, DateTime, ForeignKey, Index, Integer, String, Text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 
 from .database import Base
 
 
+def _utcnow():
+    # Set from Python rather than CURRENT_TIMESTAMP, whose whole seconds on SQLite would let two edits share
+    # an updated_at; page ETags (app.conditional) are derived from these columns
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
@@ -12,6 +20,8 @@ class User(Base):
     password = Column(String(255), nullable=False)
     theme_color = Column(String(20), default="#f97316")
     role = Column(String(20), default="user", nullable=False)
+    # Bumped on role/password changes; session tokens carrying an older value are rejected
+    session_generation = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, server_default=func.now())
 
     dishes = relationship("Dish", back_populates="creator")
@@ -30,8 +40,11 @@ class Dish(Base):
     category = Column(String(50), default="", server_default="")
     created_by = Column(Integer, ForeignKey("users.id"), index=True)
     is_active = Column(Boolean, default=True)
+    # Denormalized from order_items.rating; maintained by crud.rate_dish and item deletes
+    rating_sum = Column(Integer, default=0, server_default="0", nullable=False)
+    rating_count = Column(Integer, default=0, server_default="0", nullable=False)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=_utcnow)
 
     creator = relationship("User", back_populates="dishes")
     items = relationship("OrderItem", back_populates="dish")
@@ -45,7 +58,7 @@ class Recipe(Base):
     content = Column(JSON, nullable=False)
     generated_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=_utcnow)
 
     dish = relationship("Dish", back_populates="recipe")
     generator = relationship("User", back_populates="recipes")
@@ -57,7 +70,7 @@ class Order(Base):
     status = Column(String(50), default="open", index=True)
     created_by = Column(Integer, ForeignKey("users.id"), index=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=_utcnow)
 
     creator = relationship("User", back_populates="orders")
     items = relationship("OrderItem", back_populates="order")
@@ -77,7 +90,7 @@ class OrderItem(Base):
     rating = Column(Integer)
     status = Column(String(50), default="pending", index=True)
     created_at = Column(DateTime, server_default=func.now())
-    updated_at = Column(DateTime, server_default=func.now(), onupdate=func.now())
+    updated_at = Column(DateTime, server_default=func.now(), onupdate=_utcnow)
 
     order = relationship("Order", back_populates="items")
     dish = relationship("Dish", back_populates="items")
@@ -96,3 +109,25 @@ class AuditLog(Base):
     timestamp = Column(DateTime, server_default=func.now())
 
     user = relationship("User", back_populates="audit_logs")
+
+
+class OrderStatCounter(Base):
+    """Running totals behind /history, kept in step with orders/order_items by crud."""
+    __tablename__ = "order_stat_counters"
+    # scope: "orders" / "items" (ref_id 0), "dish" / "user" (ref_id = dish or user id)
+    scope = Column(String(20), primary_key=True)
+    ref_id = Column(Integer, primary_key=True, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (Index("ix_order_stat_counters_scope_count", "scope", "count"),)
+
+
+class UploadRef(Base):
+    """How many dishes point at each stored upload; kept in step with dishes.image_url by crud."""
+    __tablename__ = "upload_refs"
+    image_url = Column(String(512), primary_key=True)
+    ref_count = Column(Integer, nullable=False, default=0)
+    # Last time the count changed; zero-count rows only become deletable after a grace period
+    updated_at = Column(DateTime, default=_utcnow, onupdate=_utcnow)
+
+    __table_args__ = (Index("ix_upload_refs_ref_count", "ref_count"),)
@@ -1,12 +1,25 @@
 import re
 
-from fastapi import APIRouter, Depends, Form, Request
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import APIRouter, Depends, Form, HTTPException, Request
+from fastapi.responses import HTMLResponse, RedirectResponse, StreamingResponse
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
-from ..database import get_db
-from ..dependencies import get_common_context, require_admin, templates
+from .. import (
+    async_crud,
+    audit,
+    audit_archive,
+    crud,
+    db_profile,
+    fragment_cache,
+    image_sweeper,
+    menu_cache,
+    models,
+    schemas,
+    typeahead,
+    user_directory,
+)
+from ..database import get_db, get_read_db, primary_session
+from ..dependencies import get_common_context, require_admin, set_session_cookie, stream_template
 
 router = APIRouter(tags=["admin"])
 
@@ -14,27 +27,75 @@ router = APIRouter(tags=["admin"])
 @router.get("/admin", response_class=HTMLResponse)
 async def admin_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(require_admin),
     page: int = 1,
+    after: str = "",
+    before: str = "",
 ):
     page = max(1, page)
-    context = get_common_context(request, db, current_user)
-    orders = crud.get_order_history(db, page=page)
-    total_orders = crud.get_order_history_count(db)
-    total_pages = max(1, (total_orders + crud.PAGE_SIZE - 1) // crud.PAGE_SIZE)
-    logs = crud.get_audit_logs(db)
-
-    return templates.TemplateResponse(request, "admin.html", {
-        "users": context["users"],
+    context = await get_common_context(request, db, current_user)
+    if page > 1 and not (after or before):
+        # Old ?page=N links: fall back to OFFSET once; the pager below hands out cursors from here on
+        orders = await async_crud.get_order_history(db, page=page)
+        next_cursor = crud.encode_history_cursor(orders[-1]) if len(orders) == crud.PAGE_SIZE else None
+        prev_cursor = crud.encode_history_cursor(orders[0]) if orders else None
+    else:
+        orders, next_cursor, prev_cursor = await async_crud.get_order_history_page(db, after=after, before=before)
+    if not prev_cursor:
+        page = 1
+    total_orders = await async_crud.get_order_history_count_cached(primary_session(db))
+    total_pages = max(page, (total_orders + crud.PAGE_SIZE - 1) // crud.PAGE_SIZE)
+    logs = await async_crud.get_audit_logs(db)
+    # The member table shows created_at, which the user directory does not carry
+    users = await async_crud.get_users(db)
+
+    return stream_template(request, "admin.html", {
+        **context,
+        "users": users,
         "orders": orders,
         "logs": logs,
         "page": page,
         "total_pages": total_pages,
-        **context
+        "next_cursor": next_cursor,
+        "prev_cursor": prev_cursor,
+        "archives": audit_archive.list_archives(),
     })
 
 
+@router.get("/admin/metrics")
+async def admin_metrics(current_user: models.User = Depends(require_admin)):
+    return {
+        "db_pools": db_profile.pool_stats(),
+        "user_directory": user_directory.stats(),
+        "menu_cache": menu_cache.stats(),
+        "fragment_cache": fragment_cache.stats(),
+        "typeahead": typeahead.stats(),
+        "audit": audit.sink.stats(),
+        "image_sweeper": image_sweeper.stats(),
+    }
+
+
+@router.get("/admin/audit-archives")
+async def audit_archives(current_user: models.User = Depends(require_admin)):
+    return [
+        {**archive, "modified": archive["modified"].isoformat()}
+        for archive in audit_archive.list_archives()
+    ]
+
+
+@router.get("/admin/audit-archives/{name}")
+async def audit_archive_download(name: str, current_user: models.User = Depends(require_admin)):
+    path = audit_archive.archive_path(name)
+    if not path:
+        raise HTTPException(status_code=404, detail="Archive not found")
+    return StreamingResponse(
+        audit_archive.iter_archive(path),
+        media_type="application/x-ndjson; charset=utf-8",
+        headers={"Content-Disposition": f'inline; filename="{name.removesuffix(".gz")}"'},
+    )
+
+
 @router.get("/users")
 async def users_redirect():
     return RedirectResponse(url="/admin", status_code=303)
@@ -54,6 +115,7 @@ async def create_user(
 
 @router.post("/update-user/{target_user_id}")
 async def update_user(
+    request: Request,
     target_user_id: int,
     name: str = Form(None),
     password: str = Form(None),
@@ -80,8 +142,11 @@ async def update_user(
         if role not in ("admin", "user"):
             return RedirectResponse(url="/admin?msg=无效的角色", status_code=303)
         update_data["role"] = role
-    crud.update_user(db, target_user_id, update_data, current_user.id)
-    return RedirectResponse(url="/admin?msg=信息已更新", status_code=303)
+    user = crud.update_user(db, target_user_id, update_data, current_user.id)
+    response = RedirectResponse(url="/admin?msg=信息已更新", status_code=303)
+    if target_user_id == current_user.id:
+        set_session_cookie(response, request, user)
+    return response
 
 
 @router.post("/delete-user/{target_user_id}")
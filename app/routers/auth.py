@@ -2,12 +2,11 @@ from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from .. import crud
+from .. import audit, crud
 from ..csrf import csrf_guard, get_csrf_token
 from ..database import get_db
-from ..dependencies import templates
+from ..dependencies import set_session_cookie, templates
 from ..rate_limit import login_rate_limit
-from ..security import sign_cookie_value
 
 router = APIRouter(tags=["auth"])
 
@@ -30,20 +29,14 @@ async def login(
     await csrf_guard(request)
     user = crud.get_user_by_name(db, name)
     if not user:
-        crud.create_audit_log(db, 0, f"登录失败(用户不存在): {name}", "users", 0)
+        crud.create_audit_log(db, 0, f"登录失败(用户不存在): {name}", "users", 0, durability=audit.ASYNC)
         return RedirectResponse(url="/login?error=invalid_credentials", status_code=303)
     if not crud.authenticate_user(db, name, password):
-        crud.create_audit_log(db, user.id, "登录失败(密码错误)", "users", user.id)
+        crud.create_audit_log(db, user.id, "登录失败(密码错误)", "users", user.id, durability=audit.ASYNC)
         return RedirectResponse(url="/login?error=invalid_credentials", status_code=303)
-    crud.create_audit_log(db, user.id, "登录成功", "users", user.id)
+    crud.create_audit_log(db, user.id, "登录成功", "users", user.id, durability=audit.ASYNC)
     response = RedirectResponse(url="/", status_code=303)
-    secure = request.url.scheme == "https"
-    response.set_cookie(
-        key="user_id",
-        value=sign_cookie_value(str(user.id)),
-        httponly=True, samesite="lax", max_age=86400,
-        secure=secure,
-    )
+    set_session_cookie(response, request, user)
     return response
 
 
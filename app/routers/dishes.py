@@ -2,14 +2,15 @@ from fastapi import APIRouter, Depends, File, Form, Request, UploadFile
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
+from .. import async_crud, conditional, crud, menu_cache, models, schemas, typeahead
 from ..ai_client import ai_client
 from ..csrf import get_csrf_token
-from ..database import get_db
-from ..dependencies import delete_old_image, get_common_context, login_required, save_upload_file, templates
+from ..database import get_db, get_read_db, primary_session
+from ..dependencies import get_common_context, get_menu, login_required, save_upload_file, templates
 from ..recipe_utils import save_recipe_form
+from ..uploads import UPLOAD_DIR, UploadRoute
 
-router = APIRouter(tags=["dishes"])
+router = APIRouter(tags=["dishes"], route_class=UploadRoute)
 
 
 @router.get("/", response_class=HTMLResponse)
@@ -17,24 +18,48 @@ async def read_root(
     request: Request,
     q: str = "",
     cat: str = "",
-    db: Session = Depends(get_db),
+    sort: str = "",
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(login_required),
 ):
-    context = get_common_context(request, db, current_user)
-    dishes = crud.search_dishes(db, q, cat) if (q or cat) else crud.get_dishes(db)
-    categories = crud.get_dish_categories(db)
-    current_order = crud.get_current_order(db)
+    context = await get_common_context(request, db, current_user)
+    menu = await get_menu(db)
+    sort = "rating" if sort == "rating" else ""
+    if q.strip():
+        # Ranked search still goes to the index; browsing and category filters are served from the snapshot
+        dishes = [menu_cache.to_menu_dish(dish) for dish in await async_crud.search_dishes(db, q, cat)]
+        ratings = crud.get_dish_ratings(dishes)
+        if sort:
+            dishes = crud.sort_dishes_by_rating(dishes, ratings)
+    else:
+        dishes = menu.by_rating if sort else menu.dishes
+        if cat:
+            dishes = [dish for dish in dishes if dish.category == cat]
+        ratings = menu.ratings
     return templates.TemplateResponse(request, "index.html", {
         "dishes": dishes,
-        "categories": categories,
-        "current_order": current_order,
+        "ratings": ratings,
+        "categories": menu.categories,
         "ai_available": await ai_client.check_available(),
         "search_query": q,
         "current_category": cat,
+        "current_sort": sort,
         **context,
     })
 
 
+@router.get("/api/dishes/suggest")
+async def suggest_dishes(
+    q: str = "",
+    limit: int = 8,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(login_required),
+):
+    if not typeahead.is_fresh():
+        typeahead.load(await async_crud.get_typeahead_rows(primary_session(db)))
+    return {"query": q, "suggestions": typeahead.suggest(q, max(1, min(limit, 20)))}
+
+
 @router.get("/dish-detail/{dish_id}", response_class=HTMLResponse)
 async def dish_detail(
     request: Request,
@@ -42,13 +67,17 @@ async def dish_detail(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(login_required),
 ):
-    dish = crud.get_dish(db, dish_id)
-    if not dish:
+    revision = crud.get_dish_revision(db, dish_id)
+    if not revision:
         return RedirectResponse(url="/?msg=菜品不存在", status_code=303)
-    return templates.TemplateResponse(request, "dish_detail_modal.html", {
+    etag = conditional.make_etag(request, current_user, tuple(revision))
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+    dish = crud.get_dish(db, dish_id)
+    return conditional.tag(templates.TemplateResponse(request, "dish_detail_modal.html", {
         "dish": dish,
         "csrf_token": get_csrf_token(request),
-    })
+    }), etag)
 
 
 @router.post("/create-dish")
@@ -67,7 +96,7 @@ async def create_dish(
 ):
     image_url = None
     if file and file.filename:
-        image_url = await save_upload_file(file, "static/uploads")
+        image_url = await save_upload_file(file, UPLOAD_DIR)
     dish_data = schemas.DishCreate(
         name=name,
         description=description,
@@ -75,9 +104,8 @@ async def create_dish(
         category=category,
         created_by=current_user.id,
     )
+    # An upload left unused (idempotent replay) is swept later, see app.image_sweeper
     dish = crud.create_dish(db, dish_data)
-    if dish.image_url and dish.image_url != image_url and image_url:
-        delete_old_image(image_url)
     if recipe_ingredients or recipe_steps:
         save_recipe_form(
             db, dish.id, recipe_ingredients, recipe_steps,
@@ -128,10 +156,9 @@ async def update_dish(
     if description is not None:
         dish_data["description"] = description
     if file and file.filename:
-        if dish.image_url:
-            delete_old_image(dish.image_url)
-        image_url = await save_upload_file(file, "static/uploads")
-        dish_data["image_url"] = image_url
+        dish_data["image_url"] = await save_upload_file(file, UPLOAD_DIR)
+    # A replaced image whose count drops to zero is left to app.image_sweeper: deleting it here could race an
+    # identical upload that place() is about to reuse for another dish
     crud.update_dish(db, dish_id, dish_data, current_user.id)
     if recipe_ingredients or recipe_steps:
         save_recipe_form(
@@ -4,9 +4,9 @@ from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse
 from sqlalchemy.orm import Session
 
-from .. import crud, models
-from ..database import get_db
-from ..dependencies import get_common_context, login_required, templates
+from .. import async_crud, models
+from ..database import get_read_db
+from ..dependencies import get_common_context, login_required, stream_template
 
 router = APIRouter(tags=["history"])
 
@@ -17,13 +17,13 @@ VALID_VIEWS = {"list", "timeline"}
 async def history_page(
     request: Request,
     view: str = "list",
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(login_required),
 ):
-    context = get_common_context(request, db, current_user)
-    stats = crud.get_order_stats(db)
+    context = await get_common_context(request, db, current_user)
+    stats = await async_crud.get_order_stats(db)
     view = view if view in VALID_VIEWS else "list"
-    orders = crud.get_order_history(db, limit=50)
+    orders = await async_crud.get_order_history(db, limit=50)
 
     timeline = []
     if view == "timeline":
@@ -45,7 +45,7 @@ async def history_page(
                 "total": len(items_summary),
             })
 
-    return templates.TemplateResponse(request, "history.html", {
+    return stream_template(request, "history.html", {
         "stats": stats,
         "orders": orders if view == "list" else [],
         "timeline": timeline if view == "timeline" else [],
@@ -5,29 +5,67 @@ from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from .. import crud, models, schemas
-from ..database import get_db
-from ..dependencies import get_common_context, login_required, require_admin, templates
+from .. import async_crud, conditional, crud, models, schemas
+from ..csrf import get_csrf_token
+from ..database import get_db, get_read_db, get_session
+from ..dependencies import get_common_context, get_menu, get_user_directory, login_required, require_admin, templates
 
 router = APIRouter(tags=["orders"])
 
 
+async def _poll_version(request: Request, db: Session, user, region: str, order_revision) -> str:
+    return conditional.make_version(request, user, region, order_revision, await get_user_directory(db))
+
+
 @router.get("/order")
 async def order_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_session),
+    read_db: Session = Depends(get_read_db),
     current_user: models.User = Depends(login_required),
 ):
-    context = get_common_context(request, db, current_user)
-    current_order = crud.get_or_create_current_order(db, current_user.id)
-    dishes = crud.get_dishes(db)
-    top_dishes = crud.get_user_top_dishes(db, current_user.id)
-    return templates.TemplateResponse(request, "order.html", {
+    order_revision = await async_crud.get_current_order_revision(read_db)
+    etag = None
+    if order_revision:
+        # Without an open order this request creates one, so it is never answered with 304
+        etag = conditional.make_etag(
+            request, current_user, order_revision,
+            tuple(await async_crud.get_menu_revision(read_db)),
+            await async_crud.get_user_item_count(read_db, current_user.id),
+            await get_user_directory(read_db),
+        )
+        if not_modified := conditional.not_modified(request, etag):
+            return not_modified
+    context = await get_common_context(request, read_db, current_user)
+    current_order = await async_crud.get_current_order(read_db)
+    if not current_order:
+        current_order = await async_crud.get_or_create_current_order(db, current_user.id)
+    menu = await get_menu(read_db)
+    top_dishes = await async_crud.get_user_top_dishes(read_db, current_user.id)
+    response = templates.TemplateResponse(request, "order.html", {
         "current_order": current_order,
-        "dishes": dishes,
+        "poll_version": await _poll_version(request, read_db, current_user, "summary", order_revision),
+        "dishes": menu.dishes,
+        "ratings": menu.ratings,
         "top_dishes": top_dishes,
         **context,
     })
+    return conditional.tag(response, etag) if etag else response
+
+
+@router.get("/order/summary", response_class=HTMLResponse)
+async def order_summary_fragment(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(login_required),
+):
+    """Polled by the summary card on /order; renders only that card."""
+    order_revision = await async_crud.get_current_order_revision(db)
+    version = await _poll_version(request, db, current_user, "summary", order_revision)
+    if unchanged := conditional.unchanged_poll(request, version):
+        return unchanged
+    items = await async_crud.get_open_order_items(db, order_revision[0]) if order_revision else []
+    return templates.TemplateResponse(request, "_order_summary.html", {"items": items, "poll_version": version})
 
 
 @router.post("/add-item")
@@ -63,14 +101,38 @@ async def add_item(
 @router.get("/my-orders")
 async def my_orders_page(
     request: Request,
-    db: Session = Depends(get_db),
+    db: Session = Depends(get_read_db),
     current_user: models.User = Depends(login_required),
 ):
-    context = get_common_context(request, db, current_user)
-    current_order = crud.get_current_order(db)
-    return templates.TemplateResponse(request, "my_orders.html", {
+    order_revision = await async_crud.get_current_order_revision(db)
+    etag = conditional.make_etag(request, current_user, order_revision, await get_user_directory(db))
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+    context = await get_common_context(request, db, current_user)
+    current_order = await async_crud.get_current_order(db)
+    return conditional.tag(templates.TemplateResponse(request, "my_orders.html", {
         "current_order": current_order,
+        "poll_version": await _poll_version(request, db, current_user, "items", order_revision),
         **context,
+    }), etag)
+
+
+@router.get("/my-orders/items", response_class=HTMLResponse)
+async def my_order_items_fragment(
+    request: Request,
+    db: Session = Depends(get_read_db),
+    current_user: models.User = Depends(login_required),
+):
+    """Polled by the item list on /my-orders; renders only that list."""
+    order_revision = await async_crud.get_current_order_revision(db)
+    version = await _poll_version(request, db, current_user, "items", order_revision)
+    if unchanged := conditional.unchanged_poll(request, version):
+        return unchanged
+    items = await async_crud.get_open_order_items(db, order_revision[0]) if order_revision else []
+    return templates.TemplateResponse(request, "_my_order_items.html", {
+        "items": items,
+        "poll_version": version,
+        "csrf_token": get_csrf_token(request),
     })
 
 
@@ -219,7 +281,7 @@ async def shopping_list(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(login_required),
 ):
-    context = get_common_context(request, db, current_user)
+    context = await get_common_context(request, db, current_user)
     order = crud.get_current_order(db)
 
     aggregated = defaultdict(lambda: {"qty": 0, "unit": "", "dishes": set()})
@@ -4,7 +4,7 @@ from fastapi import APIRouter, Depends, Form, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
 from sqlalchemy.orm import Session
 
-from .. import crud, models
+from .. import conditional, crud, models
 from ..ai_client import ai_client
 from ..csrf import get_csrf_token
 from ..database import get_db
@@ -24,17 +24,22 @@ async def recipe_editor(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(login_required),
 ):
-    dish = crud.get_dish(db, dish_id)
-    if not dish:
+    revision = crud.get_dish_revision(db, dish_id)
+    if not revision:
         return RedirectResponse(url="/?msg=菜品不存在", status_code=303)
+    ai_available = await ai_client.check_available()
+    etag = conditional.make_etag(request, current_user, tuple(revision), bool(edit), ai_available)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
+    dish = crud.get_dish(db, dish_id)
     recipe = crud.get_recipe_by_dish(db, dish_id)
-    return templates.TemplateResponse(request, "recipe_modal.html", {
+    return conditional.tag(templates.TemplateResponse(request, "recipe_modal.html", {
         "dish": dish,
         "recipe": recipe.content if recipe else None,
         "edit_mode": bool(edit),
-        "ai_available": await ai_client.check_available(),
+        "ai_available": ai_available,
         "csrf_token": get_csrf_token(request),
-    })
+    }), etag)
 
 
 @router.post("/update-recipe/{dish_id}", response_class=HTMLResponse)
@@ -216,9 +221,13 @@ async def recipe_content(
     db: Session = Depends(get_db),
     current_user: models.User = Depends(login_required),
 ):
+    revision = crud.get_recipe_revision(db, dish_id)
+    etag = conditional.make_etag(request, current_user, tuple(revision) if revision else None)
+    if not_modified := conditional.not_modified(request, etag):
+        return not_modified
     recipe = crud.get_recipe_by_dish(db, dish_id)
-    return templates.TemplateResponse(request, "_recipe_content.html", {
+    return conditional.tag(templates.TemplateResponse(request, "_recipe_content.html", {
         "recipe": recipe.content if recipe else None,
         "dish_id": dish_id,
         "has_recipe": recipe is not None,
-    })
+    }), etag)
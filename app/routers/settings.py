@@ -7,7 +7,7 @@ from sqlalchemy.orm import Session
 from .. import crud, models
 from ..csrf import get_csrf_token
 from ..database import get_db
-from ..dependencies import login_required, templates
+from ..dependencies import login_required, set_session_cookie, templates
 
 router = APIRouter(tags=["settings"])
 
@@ -43,6 +43,9 @@ async def update_settings(
         update_data["theme_color"] = theme_color
 
     if update_data:
-        crud.update_user(db, current_user.id, update_data, current_user.id)
-        return RedirectResponse(url="/settings?msg=已保存", status_code=303)
+        user = crud.update_user(db, current_user.id, update_data, current_user.id)
+        response = RedirectResponse(url="/settings?msg=已保存", status_code=303)
+        # A password change revokes existing sessions; keep this browser signed in
+        set_session_cookie(response, request, user)
+        return response
     return RedirectResponse(url="/settings", status_code=303)
@@ -0,0 +1,128 @@
+"""Dish search backends, ranked over name and description.
+
+PostgreSQL uses pg_trgm GIN indexes (migration 009) and ranks by
+word_similarity. SQLite keeps a ``dish_search`` FTS5 table whose columns hold
+pre-tokenized text: CJK runs become overlapping bigrams plus unigrams, and
+other words are lowercased. A query like 红烧肉 then matches through an index
+instead of a full ``%q%`` scan. crud keeps the FTS rows in step with dish
+writes inside the same transaction. Any other backend falls back to ILIKE.
+"""
+import re
+
+from sqlalchemy import DDL, event, text
+from sqlalchemy.orm import Session
+
+from . import models
+from .database import Base
+
+FTS_TABLE = "dish_search"
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+MAX_CANDIDATES = 200
+
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(rf"[{_CJK}]+|[^\W_{_CJK}]+")
+
+event.listen(
+    Base.metadata, "after_create",
+    DDL(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+        "USING fts5(name, description, tokenize='unicode61 remove_diacritics 2')"
+    ).execute_if(dialect="sqlite"),
+)
+event.listen(
+    Base.metadata, "before_drop",
+    DDL(f"DROP TABLE IF EXISTS {FTS_TABLE}").execute_if(dialect="sqlite"),
+)
+
+
+def _is_cjk(run: str) -> bool:
+    return "㐀" <= run[0] <= "鿿" or "豈" <= run[0] <= "﫿"
+
+
+def index_terms(value: str | None) -> str:
+    """Space-separated terms stored in the FTS table."""
+    terms = []
+    for run in _TOKEN_RE.findall(value or ""):
+        if _is_cjk(run):
+            terms.extend(run)
+            terms.extend(run[i:i + 2] for i in range(len(run) - 1))
+        else:
+            terms.append(run.lower())
+    return " ".join(terms)
+
+
+def match_query(query: str) -> str | None:
+    """FTS5 MATCH expression requiring every bigram/word of the query; None if nothing searchable."""
+    terms = []
+    for run in _TOKEN_RE.findall(query):
+        if _is_cjk(run):
+            grams = [run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)]
+            terms.extend(f'"{gram}"' for gram in grams)
+        else:
+            word = run.lower().replace('"', '""')
+            terms.append(f'"{word}"*')
+    return " ".join(terms) or None
+
+
+def _dialect(db: Session) -> str:
+    return db.get_bind().dialect.name
+
+
+def index_dish(db: Session, dish: models.Dish):
+    """Upsert one dish's search row; inactive dishes are removed. Runs in the caller's transaction."""
+    if _dialect(db) != "sqlite":
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": dish.id})
+    if dish.is_active:
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, name, description) VALUES (:id, :name, :description)"),
+            {"id": dish.id, "name": index_terms(dish.name), "description": index_terms(dish.description)},
+        )
+
+
+def rebuild_index(db: Session) -> int:
+    if _dialect(db) != "sqlite":
+        return 0
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    dishes = db.query(models.Dish).filter(models.Dish.is_active).all()
+    for dish in dishes:
+        index_dish(db, dish)
+    db.commit()
+    return len(dishes)
+
+
+def ranked_dish_ids(db: Session, query: str) -> list[int] | None:
+    """Dish ids best match first, or None when this backend/query needs the ILIKE fallback."""
+    dialect = _dialect(db)
+    if dialect == "sqlite":
+        expression = match_query(query)
+        if not expression:
+            return None
+        rows = db.execute(
+            text(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :q "
+                f"ORDER BY bm25({FTS_TABLE}, {NAME_WEIGHT}, {DESCRIPTION_WEIGHT}) LIMIT {MAX_CANDIDATES}"
+            ),
+            {"q": expression},
+        )
+        return [row[0] for row in rows]
+    if dialect == "postgresql":
+        rows = db.execute(
+            text(
+                "SELECT id FROM dishes "
+                "WHERE is_active AND (name ILIKE :pattern OR description ILIKE :pattern "
+                "OR :q <% name OR :q <% description) "
+                "ORDER BY greatest(word_similarity(:q, name) * :name_weight, "
+                "word_similarity(:q, coalesce(description, '')) * :description_weight) DESC, id "
+                f"LIMIT {MAX_CANDIDATES}"
+            ),
+            {
+                "q": query,
+                "pattern": f"%{query}%",
+                "name_weight": NAME_WEIGHT,
+                "description_weight": DESCRIPTION_WEIGHT,
+            },
+        )
+        return [row[0] for row in rows]
+    return None
@@ -1,12 +1,16 @@
 import hashlib
 import hmac
+import time
 from base64 import urlsafe_b64decode, urlsafe_b64encode
+from typing import NamedTuple
 
 import bcrypt
 
 from .config import settings
 
 COOKIE_SECRET = settings.COOKIE_SECRET
+SESSION_MAX_AGE = 86400
+SESSION_TOKEN_VERSION = "v2"
 
 
 def is_production():
@@ -46,3 +50,30 @@ def verify_cookie_value(signed: str) -> str | None:
     except Exception:
         pass
     return None
+
+
+class SessionClaims(NamedTuple):
+    user_id: int
+    role: str
+    generation: int
+    expires_at: int
+
+
+def issue_session_token(user_id: int, role: str, generation: int, max_age: int = SESSION_MAX_AGE) -> str:
+    """Signed v2 session token: id, role and session generation, valid for max_age seconds."""
+    expires_at = int(time.time()) + max_age
+    return sign_cookie_value(f"{SESSION_TOKEN_VERSION}:{user_id}:{role}:{generation}:{expires_at}")
+
+
+def parse_session_claims(value: str) -> SessionClaims | None:
+    """Decode the payload of a verified v2 token; None for legacy id-only or expired tokens."""
+    parts = value.split(":")
+    if len(parts) != 5 or parts[0] != SESSION_TOKEN_VERSION:
+        return None
+    try:
+        claims = SessionClaims(int(parts[1]), parts[2], int(parts[3]), int(parts[4]))
+    except ValueError:
+        return None
+    if claims.expires_at <= time.time():
+        return None
+    return claims
@@ -0,0 +1,96 @@
+"""The Jinja environment behind ``dependencies.templates``.
+
+Starlette's default environment compiles each template on first use, in
+every worker, and stats its source on every render to check for edits. In
+production auto_reload is off. Compiled bytecode is kept in
+TEMPLATE_CACHE_DIR, so a restarted worker loads it instead of re-parsing.
+warm_up() runs from the lifespan and compiles every template before the
+first request arrives.
+
+Long list pages (/admin, /history) are streamed with StreamingTemplateResponse
+instead of being rendered into one string. Jinja's generate() output goes out
+in STREAM_CHUNK_SIZE chunks. base.html calls ``stream_flush()`` after the
+head and header, so the browser starts on the stylesheets and the page chrome
+while the lists are still rendering. In an ordinary TemplateResponse the
+call renders nothing.
+"""
+import asyncio
+import logging
+import os
+import time
+
+import jinja2
+from fastapi import Request
+from markupsafe import Markup
+from starlette.responses import StreamingResponse
+
+from .config import settings
+from .fragment_cache import FragmentCacheExtension
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_DIR = "templates"
+STREAM_CHUNK_SIZE = 16 * 1024
+FLUSH = "\x00flush\x00"
+
+
+def build_environment(directory: str = TEMPLATE_DIR) -> jinja2.Environment:
+    bytecode_cache = None
+    if settings.TEMPLATE_CACHE_DIR and not settings.is_testing:
+        os.makedirs(settings.TEMPLATE_CACHE_DIR, exist_ok=True)
+        bytecode_cache = jinja2.FileSystemBytecodeCache(settings.TEMPLATE_CACHE_DIR)
+    return jinja2.Environment(
+        loader=jinja2.FileSystemLoader(directory),
+        autoescape=jinja2.select_autoescape(),
+        auto_reload=not settings.is_production,
+        bytecode_cache=bytecode_cache,
+        extensions=[FragmentCacheExtension],
+    )
+
+
+def warm_up(env: jinja2.Environment) -> list[str]:
+    """Compile every template into the environment's cache; returns the names loaded."""
+    started = time.perf_counter()
+    names = env.list_templates(extensions=["html"])
+    for name in names:
+        env.get_template(name)
+    logger.info("Compiled %d templates in %.0fms", len(names), (time.perf_counter() - started) * 1000)
+    return names
+
+
+def stream_flush() -> str:
+    """Jinja global: a flush point for streamed pages, nothing otherwise."""
+    return ""
+
+
+async def _chunks(template: jinja2.Template, context: dict, chunk_size: int):
+    buffer, size = [], 0
+    for piece in template.generate(context):
+        flush = FLUSH in piece
+        if flush:
+            piece = piece.replace(FLUSH, "")
+        buffer.append(piece)
+        size += len(piece)
+        if flush or size >= chunk_size:
+            yield "".join(buffer).encode()
+            buffer, size = [], 0
+            await asyncio.sleep(0)  # let other requests run between chunks
+    if buffer:
+        yield "".join(buffer).encode()
+
+
+class StreamingTemplateResponse(StreamingResponse):
+    """TemplateResponse that sends the page while it renders. Errors after the first chunk cut the page short."""
+
+    def __init__(
+        self,
+        env: jinja2.Environment,
+        request: Request,
+        name: str,
+        context: dict,
+        status_code: int = 200,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ):
+        self.template = env.get_template(name)
+        self.context = {**context, "request": request, "stream_flush": lambda: Markup(FLUSH)}
+        super().__init__(_chunks(self.template, self.context, chunk_size), status_code=status_code, media_type="text/html")
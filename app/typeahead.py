@@ -0,0 +1,153 @@
+"""In-process typeahead index over active dish names.
+
+Each dish is indexed under its name, its full pinyin and its pinyin initials,
+starting from every character, so 红烧肉 is found by 红烧, 烧肉, hongshao,
+shaorou or hsr. Lookups walk a trie whose nodes remember every dish below them,
+so a suggestion costs one dict hop per typed character and no database round
+trip. crud patches single dishes in after each committed dish write;
+TYPEAHEAD_TTL bounds staleness when another process edits the menu.
+"""
+import heapq
+import threading
+import time
+
+from pypinyin import lazy_pinyin
+
+from .config import settings
+
+
+class _Node:
+    __slots__ = ("children", "dishes")
+
+    def __init__(self):
+        self.children: dict[str, "_Node"] = {}
+        # dish id -> earliest character position the key started at (0 = matches from the start of the name)
+        self.dishes: dict[int, int] = {}
+
+
+_lock = threading.Lock()
+_root = _Node()
+_names: dict[int, str] = {}
+_keys: dict[int, list[tuple[str, int]]] = {}
+_loaded_at = 0.0
+_lookups = 0
+_rebuilds = 0
+
+
+def _normalize(value: str) -> str:
+    return "".join(value.lower().split())
+
+
+def index_keys(name: str) -> list[tuple[str, int]]:
+    """(key, position) pairs: name, pinyin and initials suffixes starting at each character."""
+    chars = _normalize(name)
+    # Convert the whole name so phrases pick the right reading (重庆 -> chongqing), then align one syllable per character
+    full, pos = [], 0
+    for syllable in lazy_pinyin(chars):
+        if chars.startswith(syllable, pos):
+            full.extend(syllable)
+            pos += len(syllable)
+        else:
+            full.append(syllable)
+            pos += 1
+    initials = [s[:1] for s in full]
+    keys = set()
+    for i in range(len(chars)):
+        keys.add((chars[i:], i))
+        keys.add(("".join(full[i:]), i))
+        keys.add(("".join(initials[i:]), i))
+    return [(key, pos) for key, pos in keys if key]
+
+
+def _insert(dish_id: int, name: str):
+    keys = index_keys(name)
+    for key, pos in keys:
+        node = _root
+        for ch in key:
+            node = node.children.setdefault(ch, _Node())
+            if pos < node.dishes.get(dish_id, len(name)):
+                node.dishes[dish_id] = pos
+    _names[dish_id] = name
+    _keys[dish_id] = keys
+
+
+def _remove(dish_id: int):
+    for key, _ in _keys.pop(dish_id, ()):
+        path = [_root]
+        for ch in key:
+            node = path[-1].children.get(ch)
+            if node is None:
+                break
+            node.dishes.pop(dish_id, None)
+            path.append(node)
+        # Prune branches no other dish uses
+        for parent, ch, node in reversed(list(zip(path, key, path[1:]))):
+            if node.dishes or node.children:
+                break
+            del parent.children[ch]
+    _names.pop(dish_id, None)
+
+
+def is_fresh() -> bool:
+    with _lock:
+        return bool(_loaded_at) and time.monotonic() - _loaded_at < settings.TYPEAHEAD_TTL
+
+
+def load(rows):
+    """Rebuild the whole index from (id, name) rows of active dishes."""
+    global _root, _loaded_at, _rebuilds
+    with _lock:
+        _root = _Node()
+        _names.clear()
+        _keys.clear()
+        for dish_id, name in rows:
+            _insert(dish_id, name)
+        _loaded_at = time.monotonic()
+        _rebuilds += 1
+
+
+def upsert(dish_id: int, name: str, active: bool = True):
+    """Apply one committed dish write; a no-op until the index has been loaded."""
+    with _lock:
+        if not _loaded_at:
+            return
+        _remove(dish_id)
+        if active:
+            _insert(dish_id, name)
+
+
+def suggest(query: str, limit: int = 8) -> list[dict]:
+    global _lookups
+    query = _normalize(query)
+    with _lock:
+        _lookups += 1
+        if not query:
+            return []
+        node = _root
+        for ch in query:
+            node = node.children.get(ch)
+            if node is None:
+                return []
+        # Short prefixes match most of the menu; only the top `limit` need ordering
+        ranked = heapq.nsmallest(limit, node.dishes.items(), key=lambda item: (item[1], len(_names[item[0]]), item[0]))
+        return [{"id": dish_id, "name": _names[dish_id]} for dish_id, _ in ranked]
+
+
+def stats() -> dict:
+    with _lock:
+        return {
+            "size": len(_names),
+            "lookups": _lookups,
+            "rebuilds": _rebuilds,
+            "age_seconds": round(time.monotonic() - _loaded_at, 1) if _loaded_at else None,
+        }
+
+
+def reset():
+    global _root, _loaded_at, _lookups, _rebuilds
+    with _lock:
+        _root = _Node()
+        _names.clear()
+        _keys.clear()
+        _loaded_at = 0.0
+        _lookups = _rebuilds = 0
@@ -0,0 +1,177 @@
+"""Single-pass multipart parsing that spools file parts into the upload directory.
+
+Starlette's parser buffers each file part in a SpooledTemporaryFile (1MB in
+memory, then /tmp). save_upload_file then read it back and copied it into
+static/uploads in 1MB chunks, and every chunk went through the threadpool
+twice. Routes on the dishes router use UploadRoute instead: file parts are
+written straight to a hidden ``.part-*`` file next to their final location,
+and the size limit is checked while the body streams in, so an oversized
+upload is rejected before it is written. Writes are batched up to
+WRITE_BUFFER_SIZE per part, which is also the memory ceiling per file, and
+each batch is hashed as it is written.
+
+Uploads are content-addressed: save_upload_file renames the part to
+``<sha256><ext>``, or drops it when that file already exists. Identical
+photos are therefore stored once, and dishes share the file; upload_refs
+counts the dishes pointing at it. The name is the hash of the bytes as
+uploaded. The stored original may differ after app.images strips its EXIF.
+
+The parsed form is cached on the request, so csrf_guard and the route's
+Form/File parameters share one parse. Parts that no route claims are deleted
+when FastAPI closes the form after the response.
+"""
+import hashlib
+import os
+import uuid
+
+from fastapi import HTTPException, Request
+from fastapi.routing import APIRoute
+from starlette.concurrency import run_in_threadpool
+from starlette.datastructures import FormData, UploadFile
+from starlette.formparsers import MultiPartException, MultiPartParser
+from starlette.requests import parse_options_header
+
+UPLOAD_DIR = "static/uploads"
+MAX_UPLOAD_SIZE = 5 * 1024 * 1024  # 5MB
+WRITE_BUFFER_SIZE = 256 * 1024
+PART_PREFIX = ".part-"
+
+
+def too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"文件大小超过限制（最大 {MAX_UPLOAD_SIZE // 1024 // 1024}MB）")
+
+
+def place(tmp_path: str, destination: str) -> bool:
+    """Atomically move a finished upload to its content address; False if the same content is already there."""
+    if os.path.exists(destination):
+        try:
+            # Fresh mtime: the sweeper skips files inside its grace period, so this one stays until a dish points at it
+            os.utime(destination)
+        except FileNotFoundError:
+            pass  # swept since the exists() check: store this copy instead
+        else:
+            os.remove(tmp_path)
+            return False
+    os.replace(tmp_path, destination)
+    return True
+
+
+class SpooledUpload(UploadFile):
+    """A file part already on disk in the upload directory; claim() gives it its final name."""
+
+    def __init__(self, path: str, **kwargs):
+        super().__init__(open(path, "w+b"), size=0, **kwargs)
+        self.path = path
+        self.sha256 = hashlib.sha256()
+        self._pending = bytearray()
+
+    def _flush(self):
+        self.sha256.update(self._pending)
+        self.file.write(self._pending)
+        self.file.flush()
+        self._pending.clear()
+
+    async def write(self, data: bytes) -> None:
+        self.size += len(data)
+        self._pending += data
+        if len(self._pending) >= WRITE_BUFFER_SIZE:
+            await run_in_threadpool(self._flush)
+
+    async def seek(self, offset: int) -> None:
+        if self._pending:
+            await run_in_threadpool(self._flush)
+        await super().seek(offset)
+
+    async def hexdigest(self) -> str:
+        await self.seek(0)
+        return self.sha256.hexdigest()
+
+    async def claim(self, destination: str) -> bool:
+        """Move the part to its final name; False when identical content was already stored there."""
+        await self.seek(0)
+        stored = await run_in_threadpool(place, self.path, destination)
+        self.path = None
+        return stored
+
+    async def close(self) -> None:
+        await super().close()
+        if self.path is not None:
+            path, self.path = self.path, None
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class SpoolingMultiPartParser(MultiPartParser):
+    """MultiPartParser that writes file parts to SpooledUpload files in the upload directory.
+
+    This relies on private Starlette internals: ``_current_part``,
+    ``_files_to_close_on_error``, ``Request._get_form`` and its
+    ``max_part_size`` argument. They are present in the Starlette that
+    fastapi>=0.136.1 requires (the floor in pyproject.toml and
+    requirements.txt). Re-check this class when upgrading Starlette.
+    """
+
+    def __init__(self, *args, upload_dir: str | None = None, max_upload_size: int = MAX_UPLOAD_SIZE, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.upload_dir = upload_dir or UPLOAD_DIR
+        self.max_upload_size = max_upload_size
+        self._uploads: list[SpooledUpload] = []
+        self._current_size = 0
+
+    def on_headers_finished(self) -> None:
+        super().on_headers_finished()
+        part = self._current_part
+        if part.file is None:
+            return
+        # Replace Starlette's temporary file with one beside the final upload
+        self._files_to_close_on_error.pop().close()
+        os.makedirs(self.upload_dir, exist_ok=True)
+        path = os.path.join(self.upload_dir, f"{PART_PREFIX}{uuid.uuid4().hex}")
+        part.file = SpooledUpload(path, filename=part.file.filename, headers=part.file.headers)
+        self._uploads.append(part.file)
+        self._current_size = 0
+
+    def on_part_data(self, data: bytes, start: int, end: int) -> None:
+        if self._current_part.file is not None:
+            self._current_size += end - start
+            if self._current_size > self.max_upload_size:
+                raise too_large()
+        super().on_part_data(data, start, end)
+
+    async def parse(self) -> FormData:
+        try:
+            return await super().parse()
+        except BaseException:
+            for upload in self._uploads:
+                await upload.close()
+            raise
+
+
+class UploadRequest(Request):
+    async def _get_form(self, *, max_files=1000, max_fields=1000, max_part_size=1024 * 1024) -> FormData:
+        if self._form is None:
+            content_type, _ = parse_options_header(self.headers.get("Content-Type"))
+            if content_type == b"multipart/form-data":
+                parser = SpoolingMultiPartParser(
+                    self.headers, self.stream(),
+                    max_files=max_files, max_fields=max_fields, max_part_size=max_part_size,
+                )
+                try:
+                    self._form = await parser.parse()
+                except MultiPartException as exc:
+                    raise HTTPException(status_code=400, detail=exc.message)
+        return await super()._get_form(max_files=max_files, max_fields=max_fields, max_part_size=max_part_size)
+
+
+class UploadRoute(APIRoute):
+    """APIRoute whose multipart bodies are parsed by SpoolingMultiPartParser."""
+
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def spooling_handler(request: Request):
+            return await handler(UploadRequest(request.scope, request.receive))
+
+        return spooling_handler
@@ -0,0 +1,82 @@
+"""Versioned in-process directory of users for page rendering.
+
+Pages only need each member's id, name, colour and role, and the member list
+changes rarely, so it is kept in memory instead of loading full User rows
+(password hashes included) on every render and HTMX poll. crud bumps the
+version on every user write; USER_DIRECTORY_TTL bounds staleness when another
+process (seed script, a second worker) edits users behind our back.
+
+Entries also carry the session generation, so get_current_user can validate a
+v2 session token without touching the database.
+"""
+import threading
+import time
+from typing import NamedTuple, Optional
+
+from .config import settings
+
+
+class DirectoryUser(NamedTuple):
+    id: int
+    name: str
+    theme_color: Optional[str]
+    role: str
+    session_generation: int
+
+
+_lock = threading.Lock()
+_version = 0
+_cached_version = -1
+_cached_at = 0.0
+_entries: tuple = ()
+_hits = 0
+_misses = 0
+
+
+def invalidate():
+    global _version
+    with _lock:
+        _version += 1
+
+
+def lookup():
+    """Return (version, entries); entries is None when the caller must reload and store()."""
+    global _hits, _misses
+    with _lock:
+        fresh = _cached_version == _version and time.monotonic() - _cached_at < settings.USER_DIRECTORY_TTL
+        if fresh:
+            _hits += 1
+            return _version, _entries
+        _misses += 1
+        return _version, None
+
+
+def find(entries, user_id: int) -> Optional[DirectoryUser]:
+    return next((entry for entry in entries if entry.id == user_id), None)
+
+
+def store(version: int, rows) -> tuple:
+    global _cached_version, _cached_at, _entries
+    entries = tuple(DirectoryUser(*row) for row in rows)
+    with _lock:
+        # A user write since lookup() means these rows may already be stale; serve them once, don't cache
+        if version == _version:
+            _cached_version = version
+            _cached_at = time.monotonic()
+            _entries = entries
+    return entries
+
+
+def stats() -> dict:
+    with _lock:
+        return {"version": _version, "hits": _hits, "misses": _misses, "size": len(_entries)}
+
+
+def reset():
+    global _version, _cached_version, _cached_at, _entries, _hits, _misses
+    with _lock:
+        _version += 1
+        _cached_version = -1
+        _cached_at = 0.0
+        _entries = ()
+        _hits = _misses = 0
@@ -0,0 +1,42 @@
+"""
+Move audit_logs rows older than AUDIT_RETENTION_DAYS into gzip JSONL archives
+under AUDIT_ARCHIVE_DIR and remove them from the database. On PostgreSQL this
+also drops expired monthly partitions and creates the upcoming ones, so run it
+from cron (e.g. daily).
+
+Usage:
+    uv run python archive_audit_logs.py                    # dry-run (count rows that would move)
+    uv run python archive_audit_logs.py --force            # archive and delete
+    uv run python archive_audit_logs.py --days 90 --force  # override the retention window
+"""
+import sys
+
+from app import audit_archive
+from app.config import settings
+from app.database import SessionLocal
+
+
+def main():
+    force = "--force" in sys.argv
+    days = settings.AUDIT_RETENTION_DAYS
+    if "--days" in sys.argv:
+        days = int(sys.argv[sys.argv.index("--days") + 1])
+
+    db = SessionLocal()
+    try:
+        result = audit_archive.archive_old_logs(db, days=days, dry_run=not force)
+    finally:
+        db.close()
+
+    if not force:
+        print(f"Would archive {result['archived']} rows older than {result['cutoff']}. Run with --force to archive.")
+    elif result["archived"]:
+        print(f"Archived {result['archived']} rows to {settings.AUDIT_ARCHIVE_DIR}/{result['archive']}")
+        for name in result["dropped_partitions"]:
+            print(f"  dropped partition  {name}")
+    else:
+        print(f"No audit rows older than {result['cutoff']}.")
+
+
+if __name__ == "__main__":
+    main()
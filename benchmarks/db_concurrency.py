@@ -0,0 +1,112 @@
+"""
+Concurrent load against the polled / aggregate pages, for comparing the
+sync session path with the AsyncSession path (DB_ASYNC).
+
+Usage (run from the repo root, once per mode, against the same database):
+    DATABASE_URL=sqlite:///bench.db DB_ASYNC=0 python benchmarks/db_concurrency.py
+    DATABASE_URL=sqlite:///bench.db DB_ASYNC=1 python benchmarks/db_concurrency.py
+    DATABASE_URL=postgresql://... DB_ASYNC=1 python benchmarks/db_concurrency.py --requests 1000 --concurrency 50
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+
+from app import crud, models, schemas  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "benchpass666"
+PATHS = ["/history", "/my-orders", "/", "/admin"]
+
+
+def seed(orders: int, items_per_order: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        user = crud.get_user_by_name(db, BENCH_USER)
+        if user:
+            return
+        user = crud.create_user(db, schemas.UserCreate(name=BENCH_USER, password=BENCH_PASSWORD))
+        user.role = "admin"
+        db.commit()
+        dishes = [
+            crud.create_dish(db, schemas.DishCreate(name=f"压测菜品{i}", description="bench", created_by=user.id))
+            for i in range(20)
+        ]
+        for n in range(orders):
+            order = models.Order(status="completed" if n < orders - 1 else "open", created_by=user.id)
+            db.add(order)
+            db.flush()
+            for i in range(items_per_order):
+                db.add(models.OrderItem(order_id=order.id, dish_id=dishes[(n + i) % len(dishes)].id, user_id=user.id))
+        db.commit()
+        # Rows above bypass crud, so bring the /history counters in line
+        crud.rebuild_order_stats(db)
+    finally:
+        db.close()
+
+
+async def run(total: int, concurrency: int):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.cookies.set("csrf_token", "bench-csrf")
+        await client.post("/login", data={"name": BENCH_USER, "password": BENCH_PASSWORD, "csrf_token": "bench-csrf"})
+
+        latencies: dict[str, list[float]] = {path: [] for path in PATHS}
+        errors: list[str] = []
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(PATHS[i % len(PATHS)])
+
+        async def worker():
+            while not queue.empty():
+                path = queue.get_nowait()
+                start = time.perf_counter()
+                try:
+                    response = await client.get(path)
+                except Exception as exc:  # pool timeouts surface here on the sync path
+                    errors.append(f"{path}: {type(exc).__name__}")
+                    continue
+                latencies[path].append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    errors.append(f"{path}: HTTP {response.status_code}")
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    mode = "async" if settings.DB_ASYNC else "sync"
+    print(
+        f"mode={mode} requests={total} concurrency={concurrency} "
+        f"elapsed={elapsed:.2f}s rps={total / elapsed:.1f} errors={len(errors)}"
+    )
+    for path, values in latencies.items():
+        if not values:
+            continue
+        values.sort()
+        p95 = values[int(len(values) * 0.95) - 1] if values else 0
+        print(f"  {path:<12} n={len(values):<5} p50={statistics.median(values):7.1f}ms p95={p95:7.1f}ms max={values[-1]:7.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--orders", type=int, default=500)
+    parser.add_argument("--items-per-order", type=int, default=4)
+    args = parser.parse_args()
+    seed(args.orders, args.items_per_order)
+    asyncio.run(run(args.requests, args.concurrency))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Time rendering the home page's dish list with the fragment cache off and
+warm. The template is the real index.html; the dishes are in-memory menu
+snapshot entries, so only Jinja work is measured.
+
+Usage (run from the repo root):
+    python benchmarks/menu_render.py
+    python benchmarks/menu_render.py --dishes 300 --renders 200
+"""
+import argparse
+import os
+import sys
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import crud, fragment_cache  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.dependencies import templates  # noqa: E402
+from app.menu_cache import MenuDish, MenuRecipe  # noqa: E402
+
+
+def make_dishes(count: int) -> list[MenuDish]:
+    now = datetime.now(timezone.utc)
+    return [
+        MenuDish(
+            i, f"菜品{i}", "外焦里嫩，咸甜适中" * 3, None, "荤菜" if i % 2 else "素菜", i % 11, i % 3,
+            MenuRecipe({"cook_time": f"{i % 60}分钟", "difficulty": "中等"}, now) if i % 4 else None, now,
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def render(template, context: dict, renders: int) -> float:
+    started = time.perf_counter()
+    for _ in range(renders):
+        template.render(context)
+    return (time.perf_counter() - started) / renders * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dishes", type=int, default=100)
+    parser.add_argument("--renders", type=int, default=100)
+    args = parser.parse_args()
+
+    dishes = make_dishes(args.dishes)
+    context = {
+        "request": None, "dishes": dishes, "ratings": crud.get_dish_ratings(dishes), "categories": ("荤菜", "素菜"),
+        "search_query": "", "current_category": "", "current_sort": "", "csrf_token": "x", "current_user": None,
+        "url_for": lambda *a, **k: "/",
+    }
+    template = templates.env.get_template("index.html")
+    template.render(context)
+
+    max_bytes = settings.FRAGMENT_CACHE_MAX_BYTES
+    settings.FRAGMENT_CACHE_MAX_BYTES = 0
+    off = render(template, context, args.renders)
+    settings.FRAGMENT_CACHE_MAX_BYTES = max_bytes
+    fragment_cache.reset()
+    template.render(context)
+    warm = render(template, context, args.renders)
+
+    print(f"{args.dishes} dishes, {args.renders} renders")
+    print(f"  fragment cache off : {off:7.2f} ms/render")
+    print(f"  fragment cache warm: {warm:7.2f} ms/render  ({off / warm:.1f}x)")
+    print(f"  {fragment_cache.stats()}")
+
+
+if __name__ == "__main__":
+    main()
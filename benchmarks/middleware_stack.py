@@ -0,0 +1,126 @@
+"""
+Throughput of the per-request middleware stack: the old
+``@app.middleware("http")`` functions (CSRF cookie, replica pin, security
+headers) against the single pure-ASGI SecurityMiddleware. Both stacks wrap
+the same trivial endpoints, so the difference is the middleware overhead.
+
+Usage (run from the repo root):
+    python benchmarks/middleware_stack.py
+    python benchmarks/middleware_stack.py --requests 5000 --concurrency 20
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.responses import HTMLResponse  # noqa: E402
+
+from app.csrf import CSRF_COOKIE_NAME, generate_csrf_token  # noqa: E402
+from app.database import PRIMARY_PIN_COOKIE  # noqa: E402
+from app.middleware import CONTENT_SECURITY_POLICY, SecurityMiddleware  # noqa: E402
+
+PAGE = "<html><body>" + "<p>菜单</p>" * 200 + "</body></html>"
+PATHS = ["/", "/fragment", "/static/css/app.css"]
+STICKY_SECONDS = 5
+
+
+def add_routes(app: FastAPI):
+    @app.get("/", response_class=HTMLResponse)
+    def page():
+        return PAGE
+
+    @app.get("/fragment", response_class=HTMLResponse)
+    def fragment():
+        return "<li>ok</li>"
+
+    @app.get("/static/css/app.css")
+    def asset():
+        return HTMLResponse("body{}", media_type="text/css")
+
+
+def legacy_app() -> FastAPI:
+    """The three BaseHTTPMiddleware functions as they were in app/main.py."""
+    app = FastAPI()
+    add_routes(app)
+
+    @app.middleware("http")
+    async def set_csrf_cookie(request: Request, call_next):
+        csrf_token = request.cookies.get(CSRF_COOKIE_NAME)
+        if not csrf_token:
+            csrf_token = generate_csrf_token()
+            request.state.csrf_token = csrf_token
+        response = await call_next(request)
+        if not request.cookies.get(CSRF_COOKIE_NAME):
+            response.set_cookie(CSRF_COOKIE_NAME, csrf_token, httponly=True, samesite="lax", max_age=86400)
+        return response
+
+    @app.middleware("http")
+    async def pin_reads_to_primary(request: Request, call_next):
+        response = await call_next(request)
+        if request.method not in ("GET", "HEAD", "OPTIONS"):
+            until = int(time.time()) + STICKY_SECONDS
+            response.set_cookie(PRIMARY_PIN_COOKIE, str(until), max_age=STICKY_SECONDS, httponly=True, samesite="lax")
+        return response
+
+    @app.middleware("http")
+    async def security_headers(request: Request, call_next):
+        response = await call_next(request)
+        response.headers["X-Content-Type-Options"] = "nosniff"
+        response.headers["X-Frame-Options"] = "DENY"
+        response.headers["X-XSS-Protection"] = "1; mode=block"
+        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
+        response.headers["Content-Security-Policy"] = CONTENT_SECURITY_POLICY
+        if request.url.path.startswith(("/static/css/", "/static/js/")):
+            response.headers["Cache-Control"] = "public, max-age=86400"
+        elif request.url.path.startswith("/static/uploads/"):
+            response.headers["Cache-Control"] = "public, max-age=3600"
+        return response
+
+    return app
+
+
+def asgi_app() -> FastAPI:
+    app = FastAPI()
+    add_routes(app)
+    app.add_middleware(SecurityMiddleware, replica_sticky_seconds=STICKY_SECONDS)
+    return app
+
+
+async def run(app: FastAPI, total: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.cookies.set(CSRF_COOKIE_NAME, "bench-csrf")
+        queue: asyncio.Queue[str] = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(PATHS[i % len(PATHS)])
+
+        async def worker():
+            while not queue.empty():
+                response = await client.get(queue.get_nowait())
+                assert response.headers["x-frame-options"] == "DENY"
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--concurrency", type=int, default=10)
+    args = parser.parse_args()
+    for name, factory in (("legacy", legacy_app), ("asgi", asgi_app)):
+        app = factory()
+        asyncio.run(run(app, min(args.requests, 200), args.concurrency))  # warm-up
+        elapsed = asyncio.run(run(app, args.requests, args.concurrency))
+        print(f"{name:<7} requests={args.requests} concurrency={args.concurrency} "
+              f"elapsed={elapsed:.2f}s rps={args.requests / elapsed:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Count SQL statements per page render with the user directory cold and warm,
+to show what app.user_directory saves on every render and HTMX poll.
+
+Usage (run from the repo root; counts the sync engine, so leave DB_ASYNC off):
+    DATABASE_URL=sqlite:///bench.db python benchmarks/page_queries.py
+    DATABASE_URL=sqlite:///bench.db python benchmarks/page_queries.py --users 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import crud, schemas, user_directory  # noqa: E402
+from app.config import settings  # noqa: E402
+from app.database import Base, SessionLocal, engine  # noqa: E402
+from app.main import app  # noqa: E402
+
+BENCH_USER = "bench"
+BENCH_PASSWORD = "benchpass666"
+PATHS = ["/", "/order", "/my-orders", "/history"]
+
+
+def seed(users: int):
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        if not crud.get_user_by_name(db, BENCH_USER):
+            crud.create_user(db, schemas.UserCreate(name=BENCH_USER, password=BENCH_PASSWORD))
+        for i in range(users):
+            name = f"bench{i}"
+            if not crud.get_user_by_name(db, name):
+                crud.create_user(db, schemas.UserCreate(name=name, password=BENCH_PASSWORD))
+    finally:
+        db.close()
+
+
+class Counter:
+    def __init__(self):
+        self.total = 0
+        self.users = 0
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.total += 1
+        if statement.lstrip().startswith("SELECT") and "FROM users" in statement:
+            self.users += 1
+
+
+async def measure(client, path: str, warm: bool) -> Counter:
+    # Prime everything else (open order, AI health check) so only the directory differs
+    await client.get(path)
+    if not warm:
+        user_directory.invalidate()
+    counter = Counter()
+    event.listen(engine, "before_cursor_execute", counter)
+    try:
+        await client.get(path)
+    finally:
+        event.remove(engine, "before_cursor_execute", counter)
+    return counter
+
+
+async def run():
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        client.cookies.set("csrf_token", "bench-csrf")
+        await client.post("/login", data={"name": BENCH_USER, "password": BENCH_PASSWORD, "csrf_token": "bench-csrf"})
+        print(f"{'path':<12}{'cold total':>12}{'warm total':>12}{'cold users':>12}{'warm users':>12}{'saved':>8}")
+        for path in PATHS:
+            cold = await measure(client, path, warm=False)
+            warm = await measure(client, path, warm=True)
+            print(f"{path:<12}{cold.total:>12}{warm.total:>12}{cold.users:>12}{warm.users:>12}"
+                  f"{cold.total - warm.total:>8}")
+    print(f"directory: {user_directory.stats()}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="extra members to seed")
+    args = parser.parse_args()
+    if settings.DB_ASYNC:
+        sys.exit("Run with DB_ASYNC off; statements are counted on the sync engine")
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    seed(args.users)
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
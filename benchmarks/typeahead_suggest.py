@@ -0,0 +1,38 @@
+"""
+Per-lookup latency of the in-process typeahead index (app.typeahead) for a
+menu of synthetic dish names.
+
+Usage (run from the repo root):
+    python benchmarks/typeahead_suggest.py
+    python benchmarks/typeahead_suggest.py --dishes 5000 --lookups 5000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app import typeahead  # noqa: E402
+
+QUERIES = ["hsr", "hongshao", "红烧", "rou", "xyz"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dishes", type=int, default=2000)
+    parser.add_argument("--lookups", type=int, default=1000)
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    typeahead.load([(i, f"测试菜{i}号红烧肉") for i in range(args.dishes)])
+    print(f"{args.dishes} dishes indexed in {(time.perf_counter() - started) * 1000:.0f} ms")
+    for query in QUERIES:
+        started = time.perf_counter()
+        for _ in range(args.lookups):
+            typeahead.suggest(query)
+        print(f"  {query!r:12} {(time.perf_counter() - started) / args.lookups * 1e6:8.1f} µs/lookup")
+
+
+if __name__ == "__main__":
+    main()
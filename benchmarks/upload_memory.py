@@ -0,0 +1,116 @@
+"""
+Peak memory while receiving one image upload, comparing Starlette's default
+multipart parsing plus the chunked copy in save_upload_file ("legacy") with
+the disk-spooling UploadRoute ("spool"). The body is fed to the ASGI app in
+64KB chunks, as uvicorn would deliver it. Each mode runs in its own
+subprocess so peak RSS is not shared between them.
+
+Usage (run from the repo root):
+    python benchmarks/upload_memory.py
+    python benchmarks/upload_memory.py --size-mb 5 --repeat 5
+"""
+import argparse
+import asyncio
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fastapi import APIRouter, FastAPI, File, UploadFile  # noqa: E402
+
+from app import uploads  # noqa: E402
+from app.dependencies import save_upload_file  # noqa: E402
+
+CHUNK_SIZE = 64 * 1024
+BOUNDARY = "bench-boundary"
+
+
+def build_app(mode: str, upload_dir: str) -> FastAPI:
+    router = APIRouter(route_class=uploads.UploadRoute) if mode == "spool" else APIRouter()
+
+    @router.post("/upload")
+    async def upload(file: UploadFile = File(...)):
+        return {"url": await save_upload_file(file, upload_dir)}
+
+    app = FastAPI()
+    app.include_router(router)
+    return app
+
+
+def multipart_body(size: int) -> bytes:
+    head = (
+        f"--{BOUNDARY}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="bench.jpg"\r\n'
+        "Content-Type: image/jpeg\r\n\r\n"
+    ).encode()
+    return head + os.urandom(size) + f"\r\n--{BOUNDARY}--\r\n".encode()
+
+
+async def post(app: FastAPI, body: bytes) -> int:
+    offset = 0
+    status = 0
+
+    async def receive():
+        nonlocal offset
+        chunk = body[offset:offset + CHUNK_SIZE]
+        offset += len(chunk)
+        return {"type": "http.request", "body": chunk, "more_body": offset < len(body)}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    scope = {
+        "type": "http", "asgi": {"version": "3.0"}, "http_version": "1.1", "method": "POST",
+        "scheme": "http", "path": "/upload", "raw_path": b"/upload", "query_string": b"", "root_path": "",
+        "headers": [
+            (b"content-type", f"multipart/form-data; boundary={BOUNDARY}".encode()),
+            (b"content-length", str(len(body)).encode()),
+        ],
+        "client": ("127.0.0.1", 1), "server": ("bench", 80),
+    }
+    await app(scope, receive, send)
+    return status
+
+
+def child(mode: str, size: int, repeat: int):
+    with tempfile.TemporaryDirectory() as upload_dir:
+        uploads.UPLOAD_DIR = upload_dir
+        app = build_app(mode, upload_dir)
+        asyncio.run(post(app, multipart_body(1024)))  # warm-up: imports, threadpool
+        body = multipart_body(size)
+        baseline = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        tracemalloc.start()
+        for _ in range(repeat):
+            assert asyncio.run(post(app, body)) == 200
+        _, traced_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_growth = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - baseline
+    print(f"{mode:<7} upload={size // 1024}KB repeat={repeat} "
+          f"python_peak={traced_peak / 1024:.0f}KB rss_growth={rss_growth}KB")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=("legacy", "spool"))
+    args = parser.parse_args()
+    size = int(args.size_mb * 1024 * 1024) - 1024  # stay under MAX_UPLOAD_SIZE with the multipart framing
+    if args.mode:
+        child(args.mode, size, args.repeat)
+        return
+    for mode in ("legacy", "spool"):
+        subprocess.run(
+            [sys.executable, __file__, "--mode", mode, "--size-mb", str(args.size_mb), "--repeat", str(args.repeat)],
+            check=True,
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Write precompressed .br / .gz siblings next to the static assets so
+PrecompressedStaticFiles can serve them without compressing per request.
+Runs in the Docker build after Tailwind; re-run it locally after rebuilding
+CSS. Uploaded images are skipped (already compressed formats).
+
+Usage:
+    uv run python compress_static.py
+    uv run python compress_static.py --min-size 256
+"""
+import gzip
+import os
+import sys
+
+from app.compression import brotli
+
+STATIC_DIR = "static"
+SKIP_DIRS = {"uploads"}
+EXTENSIONS = {".css", ".js", ".svg", ".json", ".txt", ".html", ".map"}
+DEFAULT_MIN_SIZE = 1024
+
+
+def _write(path: str, data: bytes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(data)
+    os.replace(tmp_path, path)
+
+
+def compress_file(path: str) -> list[str]:
+    with open(path, "rb") as src:
+        data = src.read()
+    written = []
+    # mtime=0 keeps the .gz byte-identical across builds
+    _write(path + ".gz", gzip.compress(data, compresslevel=9, mtime=0))
+    written.append(path + ".gz")
+    if brotli is not None:
+        _write(path + ".br", brotli.compress(data, quality=11))
+        written.append(path + ".br")
+    return written
+
+
+def main():
+    min_size = DEFAULT_MIN_SIZE
+    if "--min-size" in sys.argv:
+        min_size = int(sys.argv[sys.argv.index("--min-size") + 1])
+    if brotli is None:
+        print("brotli is not installed; writing .gz only")
+    total = 0
+    for root, dirs, files in os.walk(STATIC_DIR):
+        dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in sorted(files):
+            path = os.path.join(root, name)
+            if os.path.splitext(name)[1] not in EXTENSIONS or os.path.getsize(path) < min_size:
+                continue
+            original = os.path.getsize(path)
+            for variant in compress_file(path):
+                print(f"  {variant} ({original} -> {os.path.getsize(variant)} bytes)")
+                total += 1
+    print(f"Wrote {total} precompressed files.")
+
+
+if __name__ == "__main__":
+    main()
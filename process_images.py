@@ -0,0 +1,59 @@
+"""
+Backfill WebP derivatives (and EXIF-stripped originals) for photos uploaded
+before image processing existed, or re-run it after changing the widths.
+New uploads are processed when they are saved.
+
+Usage:
+    uv run python process_images.py            # only originals without derivatives
+    uv run python process_images.py --force    # reprocess everything
+    uv run python process_images.py --workers 4
+"""
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from app import images
+from app.uploads import PART_PREFIX, UPLOAD_DIR
+
+
+def find_originals(force: bool) -> list[str]:
+    paths = []
+    for name in sorted(os.listdir(UPLOAD_DIR)):
+        path = os.path.join(UPLOAD_DIR, name)
+        if name.startswith((".", PART_PREFIX)) or not os.path.isfile(path) or images.is_derivative(name):
+            continue
+        if force or not images.has_derivatives(path):
+            paths.append(path)
+    return paths
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    if not os.path.isdir(UPLOAD_DIR):
+        print(f"{UPLOAD_DIR} does not exist.")
+        return
+    paths = find_originals(args.force)
+    if not paths:
+        print("Nothing to process.")
+        return
+    processed = failed = 0
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        futures = {pool.submit(images.process_image, path): path for path in paths}
+        for future in as_completed(futures):
+            path = futures[future]
+            try:
+                written = future.result()
+            except Exception as exc:
+                failed += 1
+                print(f"  failed   {path}: {exc}")
+                continue
+            processed += 1
+            print(f"  done     {path} (+{len(written)} derivatives)")
+    print(f"Processed {processed} images, {failed} failed.")
+
+
+if __name__ == "__main__":
+    main()
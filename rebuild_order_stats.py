@@ -0,0 +1,24 @@
+"""
+Recompute the order_stat_counters table behind /history from orders and
+order_items. Migration 007 backfills it once; run this after importing data
+outside the app or if the numbers ever look off.
+
+Usage:
+    uv run python rebuild_order_stats.py
+"""
+from app import crud
+from app.database import SessionLocal
+
+
+def main():
+    db = SessionLocal()
+    try:
+        rows = crud.rebuild_order_stats(db)
+        stats = crud.get_order_stats(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {rows} counter rows: {stats['total_orders']} orders, {stats['total_items']} items.")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,11 @@ os.environ["TESTING"] = "1"
 
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.pool import StaticPool
 
-from app import crud, schemas
+from app import crud, fragment_cache, menu_cache, schemas, typeahead, user_directory
 from app.database import Base, get_db
 from app.main import app
 
@@ -26,6 +26,12 @@ TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engin
 def db():
     # Create the database tables
     Base.metadata.create_all(bind=engine)
+    # In-process caches outlive the dropped tables; ids get reused between tests
+    user_directory.reset()
+    typeahead.reset()
+    menu_cache.reset()
+    fragment_cache.reset()
+    crud.invalidate_order_history_count()
     db = TestingSessionLocal()
     try:
         yield db
@@ -48,6 +54,32 @@ def client(db):
     app.dependency_overrides.clear()
 
 
+class QueryCounter:
+    """Records the SQL run on the test engine inside a ``with`` block."""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self)
+
+    def selects_from(self, table: str):
+        return [s for s in self.statements if s.lstrip().startswith("SELECT") and f"FROM {table}" in s]
+
+
+@pytest.fixture
+def count_queries():
+    """``with count_queries() as counter:`` then ``counter.selects_from("dishes")``."""
+    return QueryCounter
+
+
 def _login(client, db):
     crud.create_user(db, schemas.UserCreate(name="testuser", password="testpass666"))
     token = _csrf(client)
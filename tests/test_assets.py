@@ -0,0 +1,85 @@
+import hashlib
+import os
+
+import pytest
+
+from app import assets
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+@pytest.fixture(autouse=True)
+def fresh_manifest():
+    assets.reset()
+    yield
+    assets.reset()
+
+
+def _digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:assets.HASH_LENGTH]
+
+
+def test_manifest_fingerprints_assets_but_not_uploads():
+    manifest = assets.build_manifest()
+    assert manifest["css/app.css"] == f"css/app.{_digest('static/css/app.css')}.css"
+    assert not any(path.startswith("uploads/") or path.endswith((".gz", ".br")) for path in manifest)
+
+
+def test_asset_url_global():
+    url = assets.asset_url("static/css/tailwind.min.css")
+    assert url == f"/static/css/tailwind.min.{_digest('static/css/tailwind.min.css')}.css"
+    assert assets.asset_url("/static/css/app.css") == assets.asset_url("css/app.css")
+    assert assets.asset_url("css/missing.css") == "/static/css/missing.css"
+
+
+def test_asset_url_rehashes_changed_file(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static/css")
+    with open("static/css/site.css", "w") as f:
+        f.write("a{}")
+    first = assets.asset_url("css/site.css")
+    with open("static/css/site.css", "w") as f:
+        f.write("b{}")
+    os.utime("static/css/site.css", ns=(0, 1))
+    second = assets.asset_url("css/site.css")
+    assert first != second
+    assert assets.original_path(second.removeprefix("/static/")) == "css/site.css"
+    assert assets.original_path(first.removeprefix("/static/")) is None
+
+
+def test_fingerprinted_asset_is_immutable(client, db):
+    url = assets.asset_url("css/app.css")
+    response = client.get(url)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == IMMUTABLE
+    with open("static/css/app.css", "rb") as f:
+        assert response.content == f.read()
+
+    plain = client.get("/static/css/app.css")
+    assert plain.headers["cache-control"] == "public, max-age=86400"
+
+
+def test_only_content_addressed_uploads_are_immutable(client, db, tmp_path, monkeypatch):
+    os.symlink(os.path.abspath("templates"), tmp_path / "templates")
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static/uploads")
+    digest = "ab" * 32
+    for name in (f"{digest}.jpg", f"{digest}.w128.webp", "3f2c9a1e-legacy.jpg"):
+        with open(f"static/uploads/{name}", "wb") as f:
+            f.write(b"x")
+    assert client.get(f"/static/uploads/{digest}.jpg").headers["cache-control"] == IMMUTABLE
+    assert client.get(f"/static/uploads/{digest}.w128.webp").headers["cache-control"] == IMMUTABLE
+    # uuid-named uploads are rewritten in place by process_images.py
+    assert client.get("/static/uploads/3f2c9a1e-legacy.jpg").headers["cache-control"] == assets.REVALIDATE
+
+
+def test_missing_files_are_not_cached(client, db):
+    missing = client.get("/static/uploads/nope.jpg")
+    assert missing.status_code == 404
+    assert "cache-control" not in missing.headers
+    assert client.get("/static/css/app.000000000000.css").status_code == 404
+
+
+def test_pages_link_fingerprinted_css(client, db):
+    assert assets.asset_url("css/app.css") in client.get("/login").text
@@ -0,0 +1,54 @@
+import asyncio
+
+import pytest
+
+from app import async_crud, crud, schemas
+from app.database import Base, to_async_url
+
+
+def test_to_async_url_maps_drivers():
+    assert to_async_url("postgresql://u:p@db/kitchen") == "postgresql+asyncpg://u:p@db/kitchen"
+    assert to_async_url("postgresql+psycopg2://u:p@db/kitchen") == "postgresql+asyncpg://u:p@db/kitchen"
+    assert to_async_url("sqlite:///./dev.db") == "sqlite+aiosqlite:///./dev.db"
+
+
+def test_to_async_url_rejects_unknown_backend():
+    with pytest.raises(ValueError):
+        to_async_url("mysql://u:p@db/kitchen")
+
+
+def test_mirror_passes_through_sync_session(db):
+    user = crud.create_user(db, schemas.UserCreate(name="syncuser", password="testpass666"))
+    found = asyncio.run(async_crud.get_user(db, user.id))
+    assert found.name == "syncuser"
+
+
+def test_mirror_runs_on_async_session(tmp_path):
+    pytest.importorskip("aiosqlite")
+    from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+    async def scenario():
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'async.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        try:
+            async with factory() as session:
+                user = await async_crud.create_user(session, schemas.UserCreate(name="asyncuser", password="testpass666"))
+                await async_crud.create_dish(session, schemas.DishCreate(name="Async Dish", created_by=user.id))
+                order = await async_crud.get_or_create_current_order(session, user.id)
+            async with factory() as session:
+                users = await async_crud.get_users(session)
+                dishes = await async_crud.get_dishes(session)
+                current = await async_crud.get_current_order(session)
+                stats = await async_crud.get_order_stats(session)
+            return users, dishes, current, order, stats
+        finally:
+            await engine.dispose()
+
+    users, dishes, current, order, stats = asyncio.run(scenario())
+    assert [u.name for u in users] == ["asyncuser"]
+    assert dishes[0].name == "Async Dish"
+    assert dishes[0].recipe is None
+    assert current.id == order.id
+    assert stats["total_orders"] == 1
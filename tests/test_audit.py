@@ -0,0 +1,65 @@
+from conftest import TestingSessionLocal, _csrf
+
+from app import audit, crud, models, schemas
+
+
+def _row(action="login", user_id=1):
+    return {
+        "user_id": user_id, "action": action, "table_name": "users", "record_id": user_id,
+        "old_values": None, "new_values": None, "timestamp": audit.event_time(),
+    }
+
+
+def test_sink_batches_and_flushes(db):
+    sink = audit.AuditSink(maxsize=100, batch_size=10, flush_interval=5)
+    sink.start(TestingSessionLocal)
+    try:
+        for i in range(25):
+            assert sink.submit(_row(f"event {i}"))
+        sink.flush()
+        assert db.query(models.AuditLog).count() == 25
+        stats = sink.stats()
+        assert stats["written"] == 25
+        assert stats["batches"] == 3
+        assert stats["depth"] == 0
+    finally:
+        sink.stop()
+
+
+def test_stop_drains_queue(db):
+    sink = audit.AuditSink(maxsize=100, batch_size=50, flush_interval=60)
+    sink.start(TestingSessionLocal)
+    for i in range(5):
+        sink.submit(_row(f"event {i}"))
+    sink.stop()
+    assert not sink.running
+    assert db.query(models.AuditLog).count() == 5
+
+
+def test_submit_refused_when_stopped_or_full(monkeypatch):
+    sink = audit.AuditSink(maxsize=1, batch_size=10, flush_interval=1)
+    assert sink.submit(_row()) is False
+    # Pretend the writer is up but stalled so the queue fills
+    monkeypatch.setattr(audit.AuditSink, "running", property(lambda self: True))
+    assert sink.submit(_row()) is True
+    assert sink.submit(_row()) is False
+    assert sink.stats()["rejected"] == 1
+
+
+def test_async_audit_falls_back_inline_without_sink(db):
+    crud.create_audit_log(db, 0, "登录失败", "users", 0, durability=audit.ASYNC)
+    assert db.query(models.AuditLog).filter(models.AuditLog.action == "登录失败").count() == 1
+
+
+def test_login_audit_goes_through_sink(client, db):
+    crud.create_user(db, schemas.UserCreate(name="testuser", password="testpass666"))
+    audit.sink.start(TestingSessionLocal)
+    try:
+        token = _csrf(client)
+        client.post("/login", data={"name": "testuser", "password": "testpass666", "csrf_token": token})
+        audit.sink.flush()
+        assert audit.sink.stats()["written"] >= 1
+    finally:
+        audit.sink.stop()
+    db.expire_all()
+    assert db.query(models.AuditLog).filter(models.AuditLog.action == "登录成功").count() == 1
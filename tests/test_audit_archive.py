@@ -0,0 +1,62 @@
+import gzip
+import json
+from datetime import datetime, timedelta, timezone
+
+from conftest import _login_admin
+
+from app import audit_archive, crud, models, schemas
+from app.config import settings
+
+
+def _old_log(db, user_id, days_ago, action):
+    db.add(models.AuditLog(
+        user_id=user_id, action=action, table_name="recipes", record_id=1,
+        new_values={"content": {"steps": ["切", "炒"]}},
+        timestamp=datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=days_ago),
+    ))
+    db.commit()
+
+
+def test_archive_moves_old_rows_to_gzip(db, tmp_path):
+    user = crud.create_user(db, schemas.UserCreate(name="archiver", password="testpass666"))
+    _old_log(db, user.id, 400, "旧菜谱")
+    _old_log(db, user.id, 1, "新菜谱")
+
+    dry = audit_archive.archive_old_logs(db, days=180, archive_dir=str(tmp_path), dry_run=True)
+    assert dry["archived"] == 1
+    assert list(tmp_path.iterdir()) == []
+
+    result = audit_archive.archive_old_logs(db, days=180, archive_dir=str(tmp_path))
+    assert result["archived"] == 1
+    with gzip.open(tmp_path / result["archive"], "rt", encoding="utf-8") as f:
+        rows = [json.loads(line) for line in f]
+    assert [r["action"] for r in rows] == ["旧菜谱"]
+    assert rows[0]["new_values"]["content"]["steps"] == ["切", "炒"]
+
+    actions = {log.action for log in db.query(models.AuditLog).all()}
+    assert "旧菜谱" not in actions
+    assert "新菜谱" in actions
+
+
+def test_archive_without_old_rows_writes_nothing(db, tmp_path):
+    result = audit_archive.archive_old_logs(db, days=180, archive_dir=str(tmp_path))
+    assert result["archived"] == 0
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_admin_streams_archive(client, db, tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "AUDIT_ARCHIVE_DIR", str(tmp_path))
+    _login_admin(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    _old_log(db, user.id, 400, "旧菜谱")
+    name = audit_archive.archive_old_logs(db, days=180)["archive"]
+
+    listing = client.get("/admin/audit-archives").json()
+    assert [a["name"] for a in listing] == [name]
+    assert name in client.get("/admin").text
+
+    response = client.get(f"/admin/audit-archives/{name}")
+    assert response.status_code == 200
+    assert json.loads(response.text.splitlines()[0])["action"] == "旧菜谱"
+
+    assert client.get("/admin/audit-archives/..%2F.cookie_secret").status_code == 404
@@ -1,6 +1,6 @@
-from conftest import _csrf
+from conftest import _csrf, _login
 
-from app import crud, schemas
+from app import crud, schemas, security
 
 
 def test_login_success(client, db):
@@ -35,3 +35,61 @@ def test_logout(client, db):
     response = client.post("/logout", data={"csrf_token": token}, follow_redirects=False)
     assert response.status_code == 303
     assert response.headers["location"] == "/login"
+
+
+def test_session_token_round_trip():
+    claims = security.parse_session_claims(
+        security.verify_cookie_value(security.issue_session_token(7, "admin", 3))
+    )
+    assert (claims.user_id, claims.role, claims.generation) == (7, "admin", 3)
+    expired = security.verify_cookie_value(security.issue_session_token(7, "admin", 3, max_age=-1))
+    assert security.parse_session_claims(expired) is None
+    assert security.parse_session_claims("7") is None
+
+
+def test_role_change_revokes_session(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    assert client.get("/", follow_redirects=False).status_code == 200
+
+    crud.update_user(db, user.id, {"role": "admin"}, user.id)
+    response = client.get("/", follow_redirects=False)
+    assert response.status_code == 303
+    assert response.headers["location"] == "/login"
+
+
+def test_theme_change_keeps_session(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.update_user(db, user.id, {"theme_color": "#123456"}, user.id)
+    assert client.get("/", follow_redirects=False).status_code == 200
+
+
+def test_password_change_reissues_own_cookie(client, db):
+    _login(client, db)
+    old_cookie = client.cookies.get("user_id")
+    token = _csrf(client)
+    client.post("/settings", data={"password": "newpass6666", "csrf_token": token}, follow_redirects=False)
+    assert client.get("/", follow_redirects=False).status_code == 200
+
+    client.cookies.clear()
+    client.cookies.set("user_id", old_cookie)
+    assert client.get("/", follow_redirects=False).status_code == 303
+
+
+def test_legacy_cookie_rejected(client, db):
+    user = crud.create_user(db, schemas.UserCreate(name="legacy", password="testpass666"))
+    client.cookies.set("user_id", security.sign_cookie_value(str(user.id)))
+    assert client.get("/", follow_redirects=False).status_code == 303
+
+
+def test_generation_checked_against_primary_when_directory_is_stale(client, db):
+    _login(client, db)
+    assert client.get("/", follow_redirects=False).status_code == 200
+    # Another process bumps the generation; this process's directory still holds the old one
+    user = crud.get_user_by_name(db, "testuser")
+    user.session_generation = (user.session_generation or 0) + 1
+    db.commit()
+    client.cookies.clear()
+    client.cookies.set("user_id", security.issue_session_token(user.id, user.role, user.session_generation))
+    assert client.get("/", follow_redirects=False).status_code == 200
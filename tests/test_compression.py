@@ -0,0 +1,120 @@
+import gzip
+import os
+
+import brotli
+import pytest
+from conftest import _login
+from fastapi import FastAPI
+from fastapi.responses import HTMLResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app import compression, crud, schemas
+from app.compression import CompressionMiddleware, PrecompressedStaticFiles
+
+
+def _raw(client, url, encoding):
+    # Ask httpx not to decode so the test sees the bytes on the wire
+    with client.stream("GET", url, headers={"Accept-Encoding": encoding}) as response:
+        return response, b"".join(response.iter_raw())
+
+
+def test_accepted_encodings():
+    assert compression.accepted_encodings("gzip, deflate, br;q=0") == {"gzip", "deflate"}
+    assert compression.choose_encoding("gzip, br") == "br"
+    assert compression.choose_encoding("gzip") == "gzip"
+    assert compression.choose_encoding("identity") is None
+
+
+def test_pages_are_compressed(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    response, body = _raw(client, "/", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"].lower()
+    assert "红烧肉" in gzip.decompress(body).decode()
+
+    response, body = _raw(client, "/", "br, gzip")
+    assert response.headers["content-encoding"] == "br"
+    assert "红烧肉" in brotli.decompress(body).decode()
+
+
+def test_small_and_unacceptable_responses_pass_through(client):
+    response, body = _raw(client, "/health", "gzip")
+    assert "content-encoding" not in response.headers
+    response, _ = _raw(client, "/login", "identity")
+    assert "content-encoding" not in response.headers
+
+
+def test_compressed_etag_is_weak_and_still_revalidates(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", description="肥而不腻" * 200, created_by=user.id))
+    url = f"/dish-detail/{dish.id}"
+    etag = client.get(url, headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert etag.startswith("W/")
+    assert client.get(url, headers={"Accept-Encoding": "gzip", "If-None-Match": etag}).status_code == 304
+
+
+def test_streaming_body_is_compressed_per_chunk():
+    mini = FastAPI()
+
+    @mini.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"<p>{i}</p>" * 50
+
+        return StreamingResponse(chunks(), media_type="text/html")
+
+    @mini.get("/small")
+    async def small():
+        return HTMLResponse("<p>tiny</p>")
+
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+    with TestClient(mini) as c:
+        response, body = _raw(c, "/stream", "gzip")
+        assert response.headers["content-encoding"] == "gzip"
+        assert "content-length" not in response.headers
+        assert gzip.decompress(body).decode() == "".join(f"<p>{i}</p>" * 50 for i in range(3))
+        response, _ = _raw(c, "/small", "gzip")
+        assert "content-encoding" not in response.headers
+
+
+@pytest.fixture
+def static_app(tmp_path):
+    css = tmp_path / "site.css"
+    css.write_text("body{color:red}" * 100)
+    (tmp_path / "site.css.gz").write_bytes(gzip.compress(css.read_bytes()))
+    (tmp_path / "site.css.br").write_bytes(brotli.compress(css.read_bytes()))
+    mini = FastAPI()
+    mini.mount("/static", PrecompressedStaticFiles(directory=str(tmp_path)), name="static")
+    mini.add_middleware(CompressionMiddleware, minimum_size=100)
+    return TestClient(mini), tmp_path
+
+
+def test_static_serves_precompressed_variant(static_app):
+    client, tmp_path = static_app
+    response, body = _raw(client, "/static/site.css", "gzip, br")
+    assert response.headers["content-encoding"] == "br"
+    assert response.headers["content-type"].startswith("text/css")
+    assert body == (tmp_path / "site.css.br").read_bytes()
+
+    response, body = _raw(client, "/static/site.css", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert body == (tmp_path / "site.css.gz").read_bytes()
+
+
+def test_static_ignores_stale_variant(static_app):
+    client, tmp_path = static_app
+    source = tmp_path / "site.css"
+    stat = source.stat()
+    os.utime(tmp_path / "site.css.br", (stat.st_atime, stat.st_mtime - 60))
+    os.utime(tmp_path / "site.css.gz", (stat.st_atime, stat.st_mtime - 60))
+    response, body = _raw(client, "/static/site.css", "identity")
+    assert "content-encoding" not in response.headers
+    assert body == source.read_bytes()
+    # No fresh sibling: the middleware compresses on the fly instead
+    response, body = _raw(client, "/static/site.css", "gzip")
+    assert response.headers["content-encoding"] == "gzip"
+    assert gzip.decompress(body) == source.read_bytes()
@@ -0,0 +1,72 @@
+from conftest import _login
+
+from app import crud, schemas
+
+
+def _revalidate(client, url, etag):
+    return client.get(url, headers={"If-None-Match": etag})
+
+
+def _setup(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    return user, dish
+
+
+def test_dish_detail_not_modified_until_dish_changes(client, db):
+    user, dish = _setup(client, db)
+    url = f"/dish-detail/{dish.id}"
+    first = client.get(url)
+    etag = first.headers["ETag"]
+    assert first.headers["Cache-Control"] == "private, no-cache"
+
+    unchanged = _revalidate(client, url, etag)
+    assert unchanged.status_code == 304
+    assert unchanged.content == b""
+    assert unchanged.headers["ETag"] == etag
+
+    crud.update_dish(db, dish.id, {"description": "外婆的做法"}, user.id)
+    changed = _revalidate(client, url, etag)
+    assert changed.status_code == 200
+    assert "外婆的做法" in changed.text
+    assert changed.headers["ETag"] != etag
+
+
+def test_recipe_fragments_follow_recipe_edits(client, db):
+    user, dish = _setup(client, db)
+    for url in (f"/recipe-content/{dish.id}", f"/recipe-editor/{dish.id}"):
+        etag = client.get(url).headers["ETag"]
+        assert _revalidate(client, url, etag).status_code == 304
+        crud.create_or_update_recipe(db, dish.id, {"steps": [url]}, user.id)
+        assert _revalidate(client, url, etag).status_code == 200
+
+
+def test_my_orders_poll_not_modified_until_items_change(client, db):
+    user, dish = _setup(client, db)
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    etag = client.get("/my-orders").headers["ETag"]
+    assert _revalidate(client, "/my-orders", etag).status_code == 304
+
+    item = crud.add_order_item(db, schemas.OrderItemCreate(order_id=order.id, dish_id=dish.id, user_id=user.id))
+    response = _revalidate(client, "/my-orders", etag)
+    assert response.status_code == 200
+    etag = response.headers["ETag"]
+
+    crud.update_order_item(db, item.id, {"status": "completed"}, user.id)
+    assert _revalidate(client, "/my-orders", etag).status_code == 200
+
+
+def test_order_page_tags_only_an_existing_order(client, db):
+    _setup(client, db)
+    first = client.get("/order")
+    assert "ETag" not in first.headers
+    etag = client.get("/order").headers["ETag"]
+    assert _revalidate(client, "/order", etag).status_code == 304
+
+
+def test_etag_is_per_user(client, db):
+    user, dish = _setup(client, db)
+    etag = client.get(f"/dish-detail/{dish.id}").headers["ETag"]
+    crud.update_user(db, user.id, {"theme_color": "#ff0000"}, user.id)
+    assert _revalidate(client, f"/dish-detail/{dish.id}", etag).status_code == 200
@@ -0,0 +1,61 @@
+import sqlite3
+
+from conftest import _login_admin
+from sqlalchemy import create_engine, text
+
+from app import db_profile
+from app.config import settings
+
+
+def test_engine_options_postgres_uses_settings():
+    options = db_profile.engine_options("postgresql://u:p@db/kitchen")
+    assert options["poolclass"] is db_profile.InstrumentedQueuePool
+    assert options["pool_size"] == settings.DB_POOL_SIZE
+    assert options["max_overflow"] == settings.DB_MAX_OVERFLOW
+    assert options["pool_timeout"] == settings.DB_POOL_TIMEOUT
+    assert db_profile.engine_options("postgresql://u:p@db/kitchen", is_async=True)["poolclass"] \
+        is db_profile.InstrumentedAsyncQueuePool
+
+
+def test_engine_options_skip_pool_for_memory_sqlite():
+    assert db_profile.engine_options("sqlite:///:memory:") == {}
+    assert db_profile.engine_options("sqlite://") == {}
+
+
+def test_postgres_connect_statements(monkeypatch):
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 1500)
+    monkeypatch.setattr(settings, "DB_APPLICATION_NAME", "kitchen's")
+    assert db_profile.connect_statements("postgresql") == [
+        "SET application_name = 'kitchen''s'",
+        "SET statement_timeout = 1500",
+    ]
+    monkeypatch.setattr(settings, "DB_STATEMENT_TIMEOUT_MS", 0)
+    assert db_profile.connect_statements("postgresql") == ["SET application_name = 'kitchen''s'"]
+
+
+def test_sqlite_file_gets_pragmas_and_pool_stats(tmp_path):
+    url = f"sqlite:///{tmp_path / 'profile.db'}"
+    engine = db_profile.install(create_engine(url, **db_profile.engine_options(url)), "test_sqlite")
+    try:
+        with engine.connect() as conn:
+            assert conn.execute(text("PRAGMA journal_mode")).scalar() == "wal"
+            assert conn.execute(text("PRAGMA synchronous")).scalar() == 1
+            assert conn.execute(text("PRAGMA cache_size")).scalar() == -settings.SQLITE_CACHE_SIZE_KB
+            stats = db_profile.pool_stats()["test_sqlite"]
+            assert stats["checked_out"] == 1
+        stats = db_profile.pool_stats()["test_sqlite"]
+        assert stats["checkouts"] == 1
+        assert stats["checked_out"] == 0
+        assert stats["peak_checked_out"] == 1
+        assert stats["size"] == settings.DB_POOL_SIZE
+    finally:
+        engine.dispose()
+        db_profile._engines.pop("test_sqlite", None)
+    assert sqlite3.connect(tmp_path / "profile.db").execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+
+def test_admin_metrics_reports_pools(client, db):
+    _login_admin(client, db)
+    response = client.get("/admin/metrics")
+    assert response.status_code == 200
+    assert "primary" in response.json()["db_pools"]
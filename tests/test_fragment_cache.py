@@ -0,0 +1,106 @@
+import jinja2
+import pytest
+from conftest import _login
+from sqlalchemy import update
+
+from app import crud, fragment_cache, images, menu_cache, models, schemas
+from app.config import settings
+from app.fragment_cache import FragmentCacheExtension
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache():
+    fragment_cache.reset()
+    yield
+    fragment_cache.reset()
+
+
+def _env(source):
+    calls = []
+    env = jinja2.Environment(loader=jinja2.DictLoader({"page.html": source}), extensions=[FragmentCacheExtension])
+    env.globals["render_card"] = lambda name: calls.append(name) or f"<b>{name}</b>"
+    return env.get_template("page.html"), calls
+
+
+def test_body_rendered_once_per_key():
+    template, calls = _env("{% for d in dishes %}{% cache d.id, d.v %}{{ render_card(d.name) }}{% endcache %}{% endfor %}")
+    dishes = [{"id": 1, "v": 1, "name": "a"}, {"id": 2, "v": 1, "name": "b"}]
+    assert template.render(dishes=dishes) == "<b>a</b><b>b</b>"
+    assert template.render(dishes=dishes) == "<b>a</b><b>b</b>"
+    assert calls == ["a", "b"]
+
+    dishes[0].update(v=2, name="c")
+    assert template.render(dishes=dishes) == "<b>c</b><b>b</b>"
+    assert calls == ["a", "b", "c"]
+    assert fragment_cache.stats()["hits"] == 3
+
+
+def test_single_key_and_separate_tags_do_not_collide():
+    template, calls = _env("{% cache 1 %}{{ render_card('x') }}{% endcache %}{% cache 1 %}{{ render_card('y') }}{% endcache %}")
+    assert template.render() == "<b>x</b><b>y</b>"
+    assert template.render() == "<b>x</b><b>y</b>"
+    assert calls == ["x", "y"]
+
+
+def test_lru_eviction_under_memory_cap(monkeypatch):
+    template, calls = _env("{% cache n %}{{ render_card(n * 'x') }}{% endcache %}")
+    template.render(n=100)
+    monkeypatch.setattr(settings, "FRAGMENT_CACHE_MAX_BYTES", fragment_cache.stats()["bytes"] * 2 + 10)
+    template.render(n=101)
+    template.render(n=100)  # now most recently used
+    template.render(n=102)  # evicts 101
+    stats = fragment_cache.stats()
+    assert stats["evictions"] == 1
+    assert stats["bytes"] <= stats["max_bytes"]
+    calls.clear()
+    template.render(n=100)
+    template.render(n=101)
+    assert calls == ["x" * 101]
+
+
+def test_disabled_when_max_bytes_zero(monkeypatch):
+    monkeypatch.setattr(settings, "FRAGMENT_CACHE_MAX_BYTES", 0)
+    template, calls = _env("{% cache 1 %}{{ render_card('x') }}{% endcache %}")
+    template.render()
+    template.render()
+    assert calls == ["x", "x"]
+    assert fragment_cache.stats()["entries"] == 0
+
+
+def test_home_page_cards_cached_and_refreshed_on_edit(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    crud.create_dish(db, schemas.DishCreate(name="清蒸鱼", created_by=user.id))
+
+    assert "红烧肉" in client.get("/").text
+    assert fragment_cache.stats()["entries"] == 2
+    client.get("/")
+    assert fragment_cache.stats()["hits"] == 2
+
+    crud.update_dish(db, dish.id, {"name": "东坡肉"}, user.id)
+    crud.create_or_update_recipe(db, dish.id, {"cook_time": "90分钟", "difficulty": "困难"}, user.id)
+    page = client.get("/").text
+    assert "东坡肉" in page and "90分钟" in page and ">红烧肉</h3>" not in page
+
+    # A rating leaves updated_at alone; the rating is part of the key too
+    db.execute(
+        update(models.Dish).where(models.Dish.id == dish.id)
+        .values(rating_sum=5, rating_count=1, updated_at=models.Dish.updated_at)
+    )
+    db.commit()
+    menu_cache.invalidate()
+    assert 'title="1 人评分"' in client.get("/").text
+
+
+def test_cached_cards_skip_derivative_lookup(client, db, monkeypatch):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.create_dish(db, schemas.DishCreate(name="红烧肉", image_url="/static/uploads/abc.jpg", created_by=user.id))
+    checks = []
+    monkeypatch.setattr(images, "has_derivatives", lambda path: checks.append(path) or True)
+
+    assert 'srcset="/static/uploads/abc.w128.webp 128w' in client.get("/").text
+    assert checks == ["static/uploads/abc.jpg"]  # once, while building the snapshot
+    client.get("/")
+    assert checks == ["static/uploads/abc.jpg"] and fragment_cache.stats()["hits"] == 1
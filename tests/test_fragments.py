@@ -0,0 +1,64 @@
+import re
+
+from conftest import _login
+
+from app import crud, schemas
+
+
+def _version(html):
+    return re.search(r'hx-get="/[\w/-]+\?v=(\w+)"', html).group(1)
+
+
+def _order_with_item(db):
+    user = crud.get_user_by_name(db, "testuser")
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    item = crud.add_order_item(db, schemas.OrderItemCreate(order_id=order.id, dish_id=dish.id, user_id=user.id))
+    return user, order, item
+
+
+def test_my_orders_items_fragment(client, db):
+    _login(client, db)
+    user, order, item = _order_with_item(db)
+    page = client.get("/my-orders").text
+    version = _version(page)
+
+    unchanged = client.get(f"/my-orders/items?v={version}")
+    assert unchanged.status_code == 204
+    assert unchanged.content == b""
+
+    crud.update_order_item(db, item.id, {"remarks": "少放糖"}, user.id)
+    changed = client.get(f"/my-orders/items?v={version}")
+    assert changed.status_code == 200
+    assert "少放糖" in changed.text
+    assert "<html" not in changed.text
+    assert _version(changed.text) != version
+
+
+def test_order_summary_fragment(client, db):
+    _login(client, db)
+    user, order, item = _order_with_item(db)
+    page = client.get("/order").text
+    version = _version(page[page.index('id="order-summary"') - 5:])
+    assert client.get(f"/order/summary?v={version}").status_code == 204
+
+    crud.delete_order_item(db, item.id, user.id)
+    emptied = client.get(f"/order/summary?v={version}")
+    assert emptied.status_code == 200
+    assert "红烧肉" not in emptied.text
+    assert 'id="order-summary"' in emptied.text
+
+
+def test_fragment_without_version_renders(client, db):
+    _login(client, db)
+    _order_with_item(db)
+    response = client.get("/order/summary")
+    assert response.status_code == 200
+    assert "testuser · 红烧肉" in response.text
+
+
+def test_fragments_do_not_create_orders(client, db):
+    _login(client, db)
+    assert client.get("/order/summary").status_code == 200
+    assert client.get("/my-orders/items").status_code == 200
+    assert crud.get_current_order(db) is None
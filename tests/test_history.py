@@ -1,6 +1,6 @@
 from conftest import _login
 
-from app import crud, schemas
+from app import crud, models, schemas
 
 
 def test_history_page_empty(client, db):
@@ -48,3 +48,46 @@ def test_get_audit_logs(db):
     crud.create_dish(db, schemas.DishCreate(name="Log Dish", created_by=user.id))
     logs = crud.get_audit_logs(db)
     assert len(logs) > 0
+
+
+def _seed_items(db):
+    alice = crud.create_user(db, schemas.UserCreate(name="alice", password="testpass666"))
+    bob = crud.create_user(db, schemas.UserCreate(name="bob", password="testpass666"))
+    pork = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=alice.id))
+    fish = crud.create_dish(db, schemas.DishCreate(name="清蒸鱼", created_by=alice.id))
+    order = crud.create_order(db, schemas.OrderCreate(created_by=alice.id))
+    items = [
+        crud.add_order_item(db, schemas.OrderItemCreate(order_id=order.id, dish_id=dish.id, user_id=user.id, remarks=str(i)))
+        for i, (dish, user) in enumerate([(pork, alice), (pork, bob), (fish, alice)])
+    ]
+    return order, items
+
+
+def test_order_stats_follow_item_changes(db):
+    order, items = _seed_items(db)
+    stats = crud.get_order_stats(db)
+    assert stats["total_orders"] == 1
+    assert stats["total_items"] == 3
+    assert stats["top_dishes"] == [("红烧肉", 2), ("清蒸鱼", 1)]
+    assert stats["active_users"] == [("alice", 2), ("bob", 1)]
+
+    crud.delete_order_item(db, items[0].id, items[0].user_id)
+    stats = crud.get_order_stats(db)
+    assert stats["total_items"] == 2
+    assert sorted(stats["top_dishes"]) == [("清蒸鱼", 1), ("红烧肉", 1)]
+
+    crud.delete_order(db, order.id, items[1].user_id)
+    stats = crud.get_order_stats(db)
+    assert (stats["total_orders"], stats["total_items"]) == (0, 0)
+    assert stats["top_dishes"] == []
+    assert stats["active_users"] == []
+
+
+def test_rebuild_order_stats_matches_incremental(db):
+    _seed_items(db)
+    incremental = crud.get_order_stats(db)
+    db.query(models.OrderStatCounter).delete()
+    db.commit()
+    assert crud.get_order_stats(db)["total_items"] == 0
+    crud.rebuild_order_stats(db)
+    assert crud.get_order_stats(db) == incremental
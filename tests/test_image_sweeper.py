@@ -0,0 +1,104 @@
+import json
+import os
+import time
+
+import pytest
+
+from app import crud, image_sweeper, models, schemas, uploads
+
+OLD = time.time() - 7 * 86400
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    directory = tmp_path / "uploads"
+    directory.mkdir()
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(directory))
+    return directory
+
+
+def _file(directory, name, mtime=OLD):
+    path = directory / name
+    path.write_bytes(b"x" * 10)
+    os.utime(path, (mtime, mtime))
+    return name
+
+
+def _dish(db, directory, image_name):
+    user = crud.get_user_by_name(db, "sweeper") or crud.create_user(
+        db, schemas.UserCreate(name="sweeper", password="testpass666"),
+    )
+    return crud.create_dish(
+        db, schemas.DishCreate(name=image_name, image_url=f"/{directory}/{image_name}", created_by=user.id),
+    )
+
+
+def test_sweep_removes_only_old_orphans(db, upload_dir):
+    kept = [_file(upload_dir, "live.jpg"), _file(upload_dir, "live.w128.webp"), _file(upload_dir, ".gitkeep")]
+    recent = _file(upload_dir, "fresh.jpg", mtime=time.time())
+    orphans = [_file(upload_dir, "gone.png"), _file(upload_dir, "gone.w960.webp"), _file(upload_dir, ".part-abc")]
+    _dish(db, upload_dir, "live.jpg")
+
+    report = image_sweeper.sweep(db, grace_seconds=3600, workers=2)
+
+    assert sorted(os.listdir(upload_dir)) == sorted(kept + [recent])
+    assert report["files"] == sorted(orphans)
+    assert report["deleted"] == 3 and report["freed_bytes"] == 30
+    assert report["recent_skipped"] == 1 and report["referenced"] == 1
+    json.dumps(report)
+    assert image_sweeper.stats()["last_run"]["deleted"] == 3
+
+
+def test_dry_run_keeps_files(db, upload_dir):
+    _file(upload_dir, "gone.png")
+    report = image_sweeper.sweep(db, dry_run=True, grace_seconds=0)
+    assert report["files"] == ["gone.png"] and report["deleted"] == 0
+    assert os.listdir(upload_dir) == ["gone.png"]
+
+
+def test_sweep_releases_zero_count_refs(db, upload_dir):
+    dish = _dish(db, upload_dir, "old.jpg")
+    _file(upload_dir, "old.jpg")
+    crud.update_dish(db, dish.id, {"image_url": f"/{upload_dir}/new.jpg"}, user_id=dish.created_by)
+    _file(upload_dir, "new.jpg")
+
+    report = image_sweeper.sweep(db, grace_seconds=0)
+
+    assert report["files"] == ["old.jpg"] and report["refs_released"] == 1
+    assert [row.image_url for row in db.query(models.UploadRef).all()] == [f"/{upload_dir}/new.jpg"]
+
+
+def test_missing_directory(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path / "nope"))
+    assert image_sweeper.sweep(db)["scanned"] == 0
+
+
+def test_live_set_comes_from_upload_refs(db, upload_dir):
+    _file(upload_dir, "counted.jpg")
+    _file(upload_dir, "uncounted.jpg")
+    crud.bump_upload_refs(db, {f"/{upload_dir}/counted.jpg": 1})
+    db.commit()
+
+    report = image_sweeper.sweep(db, grace_seconds=0)
+
+    assert report["referenced"] == 1
+    assert os.listdir(upload_dir) == ["counted.jpg"]
+
+
+def test_sweep_rechecks_before_deleting(db, upload_dir, monkeypatch):
+    _file(upload_dir, "reused.jpg")
+    _file(upload_dir, "claimed.jpg")
+    _file(upload_dir, "gone.jpg")
+    scan = image_sweeper.find_orphans
+
+    def scan_then_race(directory, referenced, cutoff):
+        found = scan(directory, referenced, cutoff)
+        os.utime(upload_dir / "reused.jpg")  # place() deduplicated onto it
+        crud.bump_upload_refs(db, {f"/{upload_dir}/claimed.jpg": 1})  # a dish saved mid-walk
+        return found
+
+    monkeypatch.setattr(image_sweeper, "find_orphans", scan_then_race)
+    report = image_sweeper.sweep(db, grace_seconds=3600)
+
+    assert sorted(os.listdir(upload_dir)) == ["claimed.jpg", "reused.jpg"]
+    assert report["files"] == ["gone.jpg"]
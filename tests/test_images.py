@@ -0,0 +1,91 @@
+import asyncio
+import os
+
+import pytest
+from conftest import _csrf, _login
+from PIL import Image
+
+from app import images, models, uploads
+from app.config import settings
+from app.routers import dishes
+
+
+def _jpeg(path, size=(2000, 1000), orientation=None):
+    image = Image.new("RGB", size, (200, 80, 40))
+    exif = Image.Exif()
+    if orientation:
+        exif[0x0112] = orientation
+    exif[0x010F] = "PhoneMaker"
+    image.save(path, format="JPEG", exif=exif)
+
+
+def test_process_image_orients_strips_and_resizes(tmp_path):
+    path = str(tmp_path / "photo.jpg")
+    _jpeg(path, orientation=6)  # rotated 90° clockwise
+    written = images.process_image(path)
+    assert written == [images.derivative_path(path, w) for w in sorted(images.DERIVATIVE_WIDTHS.values())]
+    with Image.open(path) as original:
+        assert original.size == (1000, 2000)
+        assert not original.getexif()
+    for width in images.DERIVATIVE_WIDTHS.values():
+        with Image.open(images.derivative_path(path, width)) as variant:
+            assert variant.format == "WEBP"
+            assert variant.size == (width, width * 2)
+
+
+def test_small_image_is_not_upscaled(tmp_path):
+    path = str(tmp_path / "small.png")
+    Image.new("RGBA", (100, 50)).save(path)
+    images.process_image(path)
+    with Image.open(images.derivative_path(path, 960)) as variant:
+        assert variant.size == (100, 50)
+
+
+def test_filters_fall_back_to_original(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("static/uploads")
+    _jpeg("static/uploads/a.jpg")
+    assert images.image_variant("/static/uploads/a.jpg", "thumb") == "/static/uploads/a.jpg"
+    assert images.image_srcset("/static/uploads/a.jpg", "thumb", "card") == ""
+    assert images.image_srcset("https://example.com/a.jpg") == ""
+
+    images.process_image("static/uploads/a.jpg")
+    assert images.image_variant("/static/uploads/a.jpg", "thumb") == "/static/uploads/a.w128.webp"
+    assert images.image_srcset("/static/uploads/a.jpg", "card", "thumb") == (
+        "/static/uploads/a.w128.webp 128w, /static/uploads/a.w320.webp 320w"
+    )
+
+
+def test_unreadable_image_keeps_original(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "IMAGE_WORKERS", 0)
+    path = str(tmp_path / "broken.jpg")
+    with open(path, "wb") as f:
+        f.write(b"not a jpeg")
+    assert asyncio.run(images.process_upload(path)) == []
+    assert os.listdir(tmp_path) == ["broken.jpg"]
+
+
+@pytest.mark.parametrize("workers", [0, 1])
+def test_upload_generates_derivatives(client, db, tmp_path, monkeypatch, workers):
+    monkeypatch.setattr(settings, "IMAGE_WORKERS", workers)
+    monkeypatch.setattr(uploads, "UPLOAD_DIR", str(tmp_path))
+    monkeypatch.setattr(dishes, "UPLOAD_DIR", str(tmp_path))
+    source = tmp_path / "source.jpg"
+    _jpeg(str(source), orientation=6)
+    content = source.read_bytes()
+    source.unlink()
+    _login(client, db)
+    try:
+        response = client.post(
+            "/create-dish",
+            data={"name": "回锅肉", "csrf_token": _csrf(client)},
+            files={"file": ("dish.jpg", content, "image/jpeg")},
+            follow_redirects=False,
+        )
+    finally:
+        images.shutdown()
+    assert response.status_code == 303
+    dish = db.query(models.Dish).filter_by(name="回锅肉").first()
+    stored = os.path.join(tmp_path, os.path.basename(dish.image_url))
+    assert images.has_derivatives(stored)
+    assert len(os.listdir(tmp_path)) == 1 + len(images.DERIVATIVE_WIDTHS)
@@ -0,0 +1,74 @@
+import asyncio
+
+from conftest import _login
+
+from app import crud, menu_cache, schemas
+from app.dependencies import get_menu
+
+
+def _user(db):
+    return crud.create_user(db, schemas.UserCreate(name="chef", password="testpass666"))
+
+
+def test_snapshot_holds_plain_entries(db):
+    user = _user(db)
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", category="家常", created_by=user.id))
+    crud.create_or_update_recipe(db, dish.id, {"cook_time": "40分钟", "difficulty": "中等", "steps": ["炖"]}, user.id)
+    menu = asyncio.run(get_menu(db))
+    assert [d.name for d in menu.dishes] == ["红烧肉"]
+    assert menu.categories == ("家常",)
+    # Only the summary fields of the recipe are kept
+    assert menu.dishes[0].recipe.content == {"cook_time": "40分钟", "difficulty": "中等"}
+    assert menu.ratings[dish.id]["count"] == 0
+
+
+def test_snapshot_reused_until_menu_write(db, count_queries):
+    user = _user(db)
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    first = asyncio.run(get_menu(db))
+    with count_queries() as counter:
+        assert asyncio.run(get_menu(db)) is first
+    assert counter.selects_from("dishes") == []
+
+    crud.update_dish(db, dish.id, {"name": "东坡肉"}, user.id)
+    assert [d.name for d in asyncio.run(get_menu(db)).dishes] == ["东坡肉"]
+
+    crud.create_or_update_recipe(db, dish.id, {"difficulty": "简单"}, user.id)
+    assert asyncio.run(get_menu(db)).dishes[0].recipe.content["difficulty"] == "简单"
+
+    crud.delete_dish(db, dish.id, user.id)
+    assert asyncio.run(get_menu(db)).dishes == ()
+
+
+def test_rating_bumps_menu_version(db):
+    user = _user(db)
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    item = crud.add_order_item(db, schemas.OrderItemCreate(order_id=order.id, dish_id=dish.id, user_id=user.id))
+    asyncio.run(get_menu(db))
+    version = menu_cache.stats()["version"]
+    crud.rate_dish(db, item.id, 4, user.id)
+    assert menu_cache.stats()["version"] == version + 1
+    assert asyncio.run(get_menu(db)).ratings[dish.id]["avg"] == 4.0
+
+
+def test_write_during_reload_is_not_cached(db):
+    _user(db)
+    version, snapshot = menu_cache.lookup()
+    assert snapshot is None
+    menu_cache.invalidate()
+    menu_cache.store(version, [], [], {}, [])
+    assert menu_cache.lookup()[1] is None
+
+
+def test_home_page_served_from_snapshot(client, db, count_queries):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.create_dish(db, schemas.DishCreate(name="回锅肉", category="家常", created_by=user.id))
+    crud.create_dish(db, schemas.DishCreate(name="清蒸鱼", category="海鲜", created_by=user.id))
+    assert "回锅肉" in client.get("/").text
+    with count_queries() as counter:
+        page = client.get("/?cat=海鲜").text
+    assert counter.selects_from("dishes") == []
+    assert "清蒸鱼" in page
+    assert "回锅肉" not in page
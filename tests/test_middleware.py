@@ -0,0 +1,47 @@
+import re
+
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from fastapi.testclient import TestClient
+
+from app.csrf import CSRF_COOKIE_NAME
+from app.middleware import SecurityMiddleware
+
+
+def test_security_headers_on_pages(client, db):
+    response = client.get("/login")
+    assert response.headers["x-frame-options"] == "DENY"
+    assert response.headers["x-content-type-options"] == "nosniff"
+    assert "default-src 'self'" in response.headers["content-security-policy"]
+    assert "strict-transport-security" not in response.headers
+
+
+def test_csrf_cookie_matches_rendered_token(client, db):
+    response = client.get("/login")
+    cookie = response.cookies[CSRF_COOKIE_NAME]
+    assert f'name="csrf_token" value="{cookie}"' in response.text
+    set_cookie = response.headers["set-cookie"].lower()
+    assert "httponly" in set_cookie and "samesite=lax" in set_cookie and "path=/" in set_cookie
+
+
+def test_csrf_cookie_not_reissued(client, db):
+    client.get("/login")
+    response = client.get("/login")
+    assert CSRF_COOKIE_NAME not in response.cookies
+    assert "set-cookie" not in response.headers
+
+
+def test_replaces_headers_set_by_endpoint():
+    mini = FastAPI()
+    mini.add_middleware(SecurityMiddleware, production=True)
+
+    @mini.get("/framed")
+    def framed():
+        return PlainTextResponse("x", headers={"Cache-Control": "no-store", "X-Frame-Options": "SAMEORIGIN"})
+
+    with TestClient(mini) as c:
+        response = c.get("/framed")
+    assert response.headers.get_list("cache-control") == ["no-store"]
+    assert response.headers.get_list("x-frame-options") == ["DENY"]
+    assert response.headers["strict-transport-security"].startswith("max-age=")
+    assert re.search(r"csrf_token=[\w-]+", response.headers["set-cookie"])
@@ -1,4 +1,4 @@
-from conftest import _csrf
+from conftest import _csrf, _login_admin
 
 from app import crud, schemas
 
@@ -24,3 +24,57 @@ def test_order_history_count_increments(db):
     assert crud.get_order_history_count(db) == 0
     crud.create_order(db, schemas.OrderCreate(created_by=user.id))
     assert crud.get_order_history_count(db) == 1
+
+
+def _orders(db, n):
+    user = crud.create_user(db, schemas.UserCreate(name="pager", password="testpass666"))
+    return [crud.create_order(db, schemas.OrderCreate(created_by=user.id)) for _ in range(n)]
+
+
+def test_keyset_pages_walk_forward_and_back(db):
+    created = _orders(db, 45)
+    newest_first = [o.id for o in reversed(created)]
+
+    page1, next1, prev1 = crud.get_order_history_page(db)
+    assert [o.id for o in page1] == newest_first[:20]
+    assert prev1 is None
+
+    page2, next2, prev2 = crud.get_order_history_page(db, after=next1)
+    assert [o.id for o in page2] == newest_first[20:40]
+
+    page3, next3, prev3 = crud.get_order_history_page(db, after=next2)
+    assert [o.id for o in page3] == newest_first[40:]
+    assert next3 is None
+
+    back, _, _ = crud.get_order_history_page(db, before=prev3)
+    assert [o.id for o in back] == newest_first[20:40]
+    back, _, prev_back = crud.get_order_history_page(db, before=prev2)
+    assert [o.id for o in back] == newest_first[:20]
+    assert prev_back is None
+
+
+def test_malformed_cursor_falls_back_to_first_page(db):
+    _orders(db, 3)
+    orders, _, prev_cursor = crud.get_order_history_page(db, after="not-a-cursor")
+    assert len(orders) == 3
+    assert prev_cursor is None
+
+
+def test_cached_count_invalidated_by_order_writes(db):
+    created = _orders(db, 2)
+    assert crud.get_order_history_count_cached(db) == 2
+    crud.delete_order(db, created[0].id, created[0].created_by)
+    assert crud.get_order_history_count_cached(db) == 1
+
+
+def test_admin_pager_uses_cursors(client, db):
+    _login_admin(client, db)
+    _orders(db, 25)
+    response = client.get("/admin")
+    assert "after=" in response.text
+    assert "before=" not in response.text
+    next_cursor = response.text.split("after=", 1)[1].split("&", 1)[0]
+    response = client.get(f"/admin?after={next_cursor}&page=2")
+    assert response.status_code == 200
+    assert "before=" in response.text
+    assert "2/2" in response.text
@@ -0,0 +1,66 @@
+from conftest import _login
+
+from app import crud, schemas
+
+
+def _item(db, order, dish, user, remarks=""):
+    return crud.add_order_item(db, schemas.OrderItemCreate(
+        order_id=order.id, dish_id=dish.id, user_id=user.id, remarks=remarks,
+    ))
+
+
+def test_rate_dish_maintains_aggregates(db):
+    user = crud.create_user(db, schemas.UserCreate(name="rater", password="testpass666"))
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    first, second = _item(db, order, dish, user, "a"), _item(db, order, dish, user, "b")
+
+    crud.rate_dish(db, first.id, 5, user.id)
+    crud.rate_dish(db, second.id, 3, user.id)
+    assert crud.get_dish_rating(db, dish.id) == {"avg": 4.0, "count": 2}
+
+    # Re-rating replaces the vote instead of adding one
+    crud.rate_dish(db, second.id, 4, user.id)
+    assert crud.get_dish_rating(db, dish.id) == {"avg": 4.5, "count": 2}
+
+    crud.delete_order_item(db, first.id, user.id)
+    assert crud.get_dish_rating(db, dish.id) == {"avg": 4.0, "count": 1}
+
+    crud.delete_order(db, order.id, user.id)
+    assert crud.get_dish_rating(db, dish.id) is None
+
+
+def test_bayesian_sort_prefers_many_good_votes(db):
+    user = crud.create_user(db, schemas.UserCreate(name="rater", password="testpass666"))
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    lucky = crud.create_dish(db, schemas.DishCreate(name="一票五星", created_by=user.id))
+    steady = crud.create_dish(db, schemas.DishCreate(name="常年好评", created_by=user.id))
+    unrated = crud.create_dish(db, schemas.DishCreate(name="没人评", created_by=user.id))
+    poor = crud.create_dish(db, schemas.DishCreate(name="翻车菜", created_by=user.id))
+    crud.rate_dish(db, _item(db, order, lucky, user).id, 5, user.id)
+    for i, stars in enumerate([5, 5, 4, 5, 5, 4, 5, 5]):
+        crud.rate_dish(db, _item(db, order, steady, user, str(i)).id, stars, user.id)
+    for i in range(6):
+        crud.rate_dish(db, _item(db, order, poor, user, str(i)).id, 2, user.id)
+
+    dishes = crud.get_dishes(db)
+    ratings = crud.get_dish_ratings(dishes)
+    assert ratings[unrated.id]["avg"] is None
+    assert ratings[lucky.id]["avg"] > ratings[steady.id]["avg"]
+    # The single 5-star vote is pulled towards the menu mean; unrated dishes sit at the mean
+    assert [d.name for d in crud.sort_dishes_by_rating(dishes, ratings)] == ["常年好评", "一票五星", "没人评", "翻车菜"]
+
+
+def test_menu_shows_ratings_and_sorts(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    order = crud.create_order(db, schemas.OrderCreate(created_by=user.id))
+    crud.create_dish(db, schemas.DishCreate(name="甲菜", created_by=user.id))
+    rated = crud.create_dish(db, schemas.DishCreate(name="乙菜", created_by=user.id))
+    crud.rate_dish(db, _item(db, order, rated, user).id, 5, user.id)
+
+    response = client.get("/?sort=rating")
+    assert response.status_code == 200
+    assert response.text.index("乙菜") < response.text.index("甲菜")
+    assert "fa-star" in response.text
+    assert client.get("/order").status_code == 200
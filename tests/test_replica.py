@@ -0,0 +1,91 @@
+import time
+
+import pytest
+from conftest import _login
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from app import crud, database, menu_cache, schemas, user_directory
+from app.database import PRIMARY_PIN_COOKIE, Base
+from app.middleware import SecurityMiddleware
+
+
+@pytest.fixture
+def replica(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    monkeypatch.setattr(database, "ReplicaSessionLocal", factory)
+    session = factory()
+    try:
+        yield session
+    finally:
+        session.close()
+        Base.metadata.drop_all(bind=engine)
+        engine.dispose()
+
+
+def test_read_pages_use_replica(client, db, replica):
+    _login(client, db)
+    crud.create_dish(db, schemas.DishCreate(name="主库红烧肉", created_by=1))
+    crud.create_dish(replica, schemas.DishCreate(name="从库红烧肉", created_by=1))
+
+    resp = client.get("/?q=红烧肉")
+    assert "从库红烧肉" in resp.text
+    assert "主库红烧肉" not in resp.text
+
+
+def test_pin_cookie_reads_from_primary(client, db, replica):
+    _login(client, db)
+    crud.create_dish(db, schemas.DishCreate(name="主库红烧肉", created_by=1))
+    crud.create_dish(replica, schemas.DishCreate(name="从库红烧肉", created_by=1))
+
+    client.cookies.set(PRIMARY_PIN_COOKIE, str(int(time.time()) + 30))
+    resp = client.get("/?q=红烧肉")
+    assert "主库红烧肉" in resp.text
+
+    client.cookies.set(PRIMARY_PIN_COOKIE, str(int(time.time()) - 1))
+    resp = client.get("/?q=红烧肉")
+    assert "从库红烧肉" in resp.text
+
+
+def test_shared_caches_never_filled_from_replica(client, db, replica):
+    _login(client, db)
+    crud.create_dish(db, schemas.DishCreate(name="主库菜", created_by=1))
+    # A lagging replica: no dishes, and no users either
+    client.cookies.set(PRIMARY_PIN_COOKIE, str(int(time.time()) - 1))
+
+    resp = client.get("/")
+    assert resp.status_code == 200
+    assert "主库菜" in resp.text
+    assert [dish.name for dish in menu_cache.lookup()[1].dishes] == ["主库菜"]
+    assert [user.name for user in user_directory.lookup()[1]] == ["testuser"]
+
+
+def test_order_page_creates_order_on_primary(client, db, replica):
+    _login(client, db)
+    resp = client.get("/order")
+    assert resp.status_code == 200
+    assert crud.get_current_order(db) is not None
+    assert crud.get_current_order(replica) is None
+
+
+def test_pin_middleware_sets_cookie_after_writes():
+    mini = FastAPI()
+    mini.add_middleware(SecurityMiddleware, replica_sticky_seconds=5)
+
+    @mini.get("/read")
+    def read():
+        return {}
+
+    @mini.post("/write")
+    def write():
+        return {}
+
+    with TestClient(mini) as c:
+        assert PRIMARY_PIN_COOKIE not in c.get("/read").cookies
+        until = int(c.post("/write").cookies[PRIMARY_PIN_COOKIE])
+        assert until > time.time()
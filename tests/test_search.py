@@ -0,0 +1,62 @@
+from conftest import _login
+
+from app import crud, schemas, search
+
+
+def _dish(db, user, name, description=None):
+    return crud.create_dish(db, schemas.DishCreate(name=name, description=description, created_by=user.id))
+
+
+def test_index_terms_use_cjk_bigrams():
+    assert search.index_terms("红烧肉 Pork") == "红 烧 肉 红烧 烧肉 pork"
+    assert search.match_query("红烧肉") == '"红烧" "烧肉"'
+    assert search.match_query("鱼") == '"鱼"'
+    assert search.match_query('po"rk') == '"po"* "rk"*'
+    assert search.match_query("!!") is None
+
+
+def test_search_ranks_name_over_description(db):
+    user = crud.create_user(db, schemas.UserCreate(name="searcher", password="testpass666"))
+    _dish(db, user, "清蒸鱼", "配红烧肉的汤汁")
+    _dish(db, user, "红烧肉", "外婆的做法")
+    _dish(db, user, "番茄炒蛋")
+    assert [d.name for d in crud.search_dishes(db, "红烧肉")] == ["红烧肉", "清蒸鱼"]
+    assert [d.name for d in crud.search_dishes(db, "外婆")] == ["红烧肉"]
+    assert crud.search_dishes(db, "牛排") == []
+
+
+def test_search_index_follows_dish_writes(db):
+    user = crud.create_user(db, schemas.UserCreate(name="searcher", password="testpass666"))
+    dish = _dish(db, user, "番茄炒蛋")
+    crud.update_dish(db, dish.id, {"name": "西红柿炒蛋"}, user.id)
+    assert crud.search_dishes(db, "番茄") == []
+    assert [d.id for d in crud.search_dishes(db, "西红柿")] == [dish.id]
+
+    crud.delete_dish(db, dish.id, user.id)
+    assert crud.search_dishes(db, "西红柿") == []
+
+
+def test_search_respects_category(db):
+    user = crud.create_user(db, schemas.UserCreate(name="searcher", password="testpass666"))
+    crud.create_dish(db, schemas.DishCreate(name="鱼香肉丝", category="川菜", created_by=user.id))
+    crud.create_dish(db, schemas.DishCreate(name="鱼丸汤", category="汤", created_by=user.id))
+    assert [d.name for d in crud.search_dishes(db, "鱼", "汤")] == ["鱼丸汤"]
+
+
+def test_menu_search_endpoint(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    _dish(db, user, "红烧肉")
+    _dish(db, user, "清蒸鱼")
+    response = client.get("/?q=烧肉")
+    assert "红烧肉" in response.text
+    assert "清蒸鱼" not in response.text
+
+
+def test_filter_links_encode_query_and_category(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.create_dish(db, schemas.DishCreate(name="鱼&肉", category="汤 & 羹", created_by=user.id))
+    page = client.get("/", params={"q": "鱼&肉", "cat": "汤 & 羹"}).text
+    assert "cat=%E6%B1%A4%20%26%20%E7%BE%B9&q=%E9%B1%BC%26%E8%82%89&sort=rating" in page
+    assert "q=鱼&肉" not in page
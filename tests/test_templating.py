@@ -0,0 +1,87 @@
+import asyncio
+import os
+
+import jinja2
+from conftest import _login_admin
+
+from app import templating
+from app.config import settings
+from app.dependencies import templates
+
+
+def test_warm_up_compiles_every_template():
+    names = templating.warm_up(templates.env)
+    expected = sorted(
+        os.path.relpath(os.path.join(root, name), "templates").replace(os.sep, "/")
+        for root, _, files in os.walk("templates")
+        for name in files
+        if name.endswith(".html")
+    )
+    assert sorted(names) == expected
+    assert set(names) <= {name for _, name in templates.env.cache.keys()}
+
+
+def test_auto_reload_only_outside_production(monkeypatch):
+    monkeypatch.setattr(settings, "ENV", "production")
+    assert templating.build_environment().auto_reload is False
+    monkeypatch.setattr(settings, "ENV", "")
+    assert templating.build_environment().auto_reload is True
+
+
+def test_bytecode_cache_persists_compiled_templates(tmp_path, monkeypatch):
+    cache_dir = tmp_path / "jinja_cache"
+    monkeypatch.setattr(settings, "TESTING", "")
+    monkeypatch.setattr(settings, "TEMPLATE_CACHE_DIR", str(cache_dir))
+    env = templating.build_environment()
+    templating.warm_up(env)
+    written = os.listdir(cache_dir)
+    assert len(written) == len(env.list_templates(extensions=["html"]))
+
+    # A fresh worker loads the cached bytecode instead of writing it again
+    fresh = templating.build_environment()
+    compiled = fresh.get_template("error.html")
+    assert compiled.name == "error.html"
+    assert sorted(os.listdir(cache_dir)) == sorted(written)
+
+
+def test_cache_disabled_when_testing_or_unset(monkeypatch):
+    assert templating.build_environment().bytecode_cache is None
+    monkeypatch.setattr(settings, "TESTING", "")
+    monkeypatch.setattr(settings, "TEMPLATE_CACHE_DIR", "")
+    assert templating.build_environment().bytecode_cache is None
+
+
+def _stream_env():
+    env = jinja2.Environment(loader=jinja2.DictLoader({
+        "base.html": "<head></head><header>nav</header>{{ stream_flush() }}<main>{% block content %}{% endblock %}</main>",
+        "list.html": "{% extends 'base.html' %}{% block content %}{% for i in items %}<li>{{ i }}</li>{% endfor %}{% endblock %}",
+    }), autoescape=True)
+    env.globals["stream_flush"] = templating.stream_flush
+    return env
+
+
+async def _collect(response):
+    return [chunk async for chunk in response.body_iterator]
+
+
+def test_streaming_response_flushes_layout_then_chunks():
+    env = _stream_env()
+    response = templating.StreamingTemplateResponse(env, None, "list.html", {"items": range(500)}, chunk_size=1024)
+    chunks = asyncio.run(_collect(response))
+    assert chunks[0] == b"<head></head><header>nav</header>"
+    assert len(chunks) > 5
+    assert all(len(chunk) < 1024 + 32 for chunk in chunks)
+    # Same page as a plain render, where stream_flush() renders nothing
+    assert b"".join(chunks).decode() == env.get_template("list.html").render(items=range(500))
+    assert "content-length" not in response.headers
+
+
+def test_history_and_admin_are_streamed(client, db):
+    _login_admin(client, db)
+    for path in ("/history", "/history?view=timeline", "/admin"):
+        response = client.get(path)
+        assert response.status_code == 200
+        assert "content-length" not in response.headers
+        assert response.text.rstrip().endswith("</html>")
+        assert "\x00" not in response.text
+    assert "\x00" not in client.get("/").text
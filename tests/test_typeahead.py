@@ -0,0 +1,71 @@
+from conftest import _login
+
+from app import crud, schemas, typeahead
+
+
+def _names(query):
+    return [s["name"] for s in typeahead.suggest(query)]
+
+
+def test_suggest_by_name_pinyin_and_initials():
+    typeahead.load([(1, "红烧肉"), (2, "红烧排骨"), (3, "回锅肉"), (4, "重庆鸡公煲")])
+    assert _names("hsr") == ["红烧肉"]
+    assert _names("hs") == ["红烧肉", "红烧排骨"]
+    assert _names("HongShao") == ["红烧肉", "红烧排骨"]
+    assert _names("红烧") == ["红烧肉", "红烧排骨"]
+    assert _names("cq") == ["重庆鸡公煲"]
+    assert _names("gongbao") == ["重庆鸡公煲"]
+    assert _names("rou") == ["红烧肉", "回锅肉"]
+    assert _names("xyz") == []
+    assert _names("  ") == []
+
+
+def test_start_of_name_ranks_first():
+    typeahead.load([(1, "番茄炒蛋"), (2, "炒饭")])
+    assert _names("chao") == ["炒饭", "番茄炒蛋"]
+
+
+def test_upsert_patches_index():
+    typeahead.load([(1, "红烧肉"), (2, "回锅肉")])
+    typeahead.upsert(1, "东坡肉")
+    assert _names("hsr") == []
+    assert _names("dpr") == ["东坡肉"]
+    typeahead.upsert(2, "回锅肉", active=False)
+    assert _names("rou") == ["东坡肉"]
+    assert typeahead.stats()["size"] == 1
+
+
+def test_crud_writes_update_loaded_index(db):
+    user = crud.create_user(db, schemas.UserCreate(name="typer", password="testpass666"))
+    typeahead.load(crud.get_typeahead_rows(db))
+    dish = crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    assert _names("hsr") == ["红烧肉"]
+    crud.update_dish(db, dish.id, {"name": "糖醋排骨"}, user.id)
+    assert _names("hsr") == []
+    assert _names("tcpg") == ["糖醋排骨"]
+    crud.delete_dish(db, dish.id, user.id)
+    assert _names("tcpg") == []
+
+
+def test_suggest_only_ranks_prefix_matches():
+    # Timing lives in benchmarks/typeahead_suggest.py; here: a lookup touches one trie path and its matches only
+    typeahead.load([(i, f"测试菜{i}号糖醋排骨") for i in range(2000)] + [(5000 + i, f"红烧肉{i}") for i in range(3)])
+    node = typeahead._root
+    for ch in "hsr":
+        node = node.children[ch]
+    assert set(node.dishes) == {5000, 5001, 5002}
+    assert [s["id"] for s in typeahead.suggest("hsr")] == [5000, 5001, 5002]
+
+
+def test_suggest_endpoint(client, db):
+    _login(client, db)
+    user = crud.get_user_by_name(db, "testuser")
+    crud.create_dish(db, schemas.DishCreate(name="红烧肉", created_by=user.id))
+    response = client.get("/api/dishes/suggest?q=hsr")
+    assert response.status_code == 200
+    assert [s["name"] for s in response.json()["suggestions"]] == ["红烧肉"]
+
+
+def test_suggest_requires_login(client, db):
+    response = client.get("/api/dishes/suggest?q=hsr", follow_redirects=False)
+    assert response.status_code == 303
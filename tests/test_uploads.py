@@ -0,0 +1,189 @@
+import asyncio
+import hashlib
+import os
+
+import pytest
+from conftest import _csrf, _login
+
+from app import image_sweeper, models, uploads
+from app.config import settings
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\0" * 2048
+
+
+@pytest.fixture
+def upload_dir(tmp_path, monkeypatch):
+    # Uploads keep their relative static/uploads URLs; templates are linked in for error pages
+    os.symlink(os.path.abspath("templates"), tmp_path / "templates")
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(settings, "IMAGE_WORKERS", 0)
+    return tmp_path / uploads.UPLOAD_DIR
+
+
+def _create(client, content: bytes, filename="dish.png", content_type="image/png"):
+    return client.post(
+        "/create-dish",
+        data={"name": "回锅肉", "csrf_token": _csrf(client)},
+        files={"file": (filename, content, content_type)},
+        follow_redirects=False,
+    )
+
+
+def test_upload_is_renamed_into_place(client, db, upload_dir):
+    _login(client, db)
+    response = _create(client, PNG)
+    assert response.status_code == 303
+    dish = db.query(models.Dish).filter_by(name="回锅肉").first()
+    stored = os.path.join(upload_dir, os.path.basename(dish.image_url))
+    with open(stored, "rb") as f:
+        assert f.read() == PNG
+    assert os.listdir(upload_dir) == [os.path.basename(stored)]
+
+
+def test_oversized_upload_rejected_while_streaming(client, db, upload_dir):
+    _login(client, db)
+    response = _create(client, b"\0" * (uploads.MAX_UPLOAD_SIZE + 1))
+    assert response.status_code == 413
+    assert os.listdir(upload_dir) == []
+    assert db.query(models.Dish).filter_by(name="回锅肉").first() is None
+
+
+def test_unclaimed_part_is_removed(client, db, upload_dir):
+    _login(client, db)
+    response = _create(client, b"not an image", filename="notes.txt", content_type="text/plain")
+    assert response.status_code == 400
+    assert os.listdir(upload_dir) == []
+
+
+def test_form_parsed_once(client, db, upload_dir, monkeypatch):
+    calls = []
+    parse = uploads.SpoolingMultiPartParser.parse
+
+    async def counting_parse(self):
+        calls.append(self)
+        return await parse(self)
+
+    monkeypatch.setattr(uploads.SpoolingMultiPartParser, "parse", counting_parse)
+    _login(client, db)
+    assert _create(client, PNG).status_code == 303
+    assert len(calls) == 1
+
+
+def test_large_part_written_in_batches(tmp_path):
+    async def run():
+        upload = uploads.SpooledUpload(str(tmp_path / "part"), filename="a.png")
+        for _ in range(10):
+            await upload.write(b"x" * 64 * 1024)
+        assert len(upload._pending) < uploads.WRITE_BUFFER_SIZE
+        await upload.claim(str(tmp_path / "a.png"))
+        await upload.close()
+
+    asyncio.run(run())
+    assert os.path.getsize(tmp_path / "a.png") == 640 * 1024
+    assert not os.path.exists(tmp_path / "part")
+
+
+def _update(client, dish_id: int, content: bytes):
+    return client.post(
+        f"/update-dish/{dish_id}",
+        data={"name": f"菜{dish_id}", "csrf_token": _csrf(client)},
+        files={"file": ("dish.png", content, "image/png")},
+        follow_redirects=False,
+    )
+
+
+def _ref_count(db, url):
+    row = db.query(models.UploadRef).filter_by(image_url=url).first()
+    return row.ref_count if row else None
+
+
+def test_identical_uploads_share_one_file(client, db, upload_dir):
+    _login(client, db)
+    _create(client, PNG)
+    first = db.query(models.Dish).filter_by(name="回锅肉").first()
+    client.post(
+        "/create-dish",
+        data={"name": "小炒肉", "csrf_token": _csrf(client)},
+        files={"file": ("again.png", PNG, "image/png")},
+        follow_redirects=False,
+    )
+    second = db.query(models.Dish).filter_by(name="小炒肉").first()
+    assert first.image_url == second.image_url
+    assert os.path.basename(first.image_url) == hashlib.sha256(PNG).hexdigest() + ".png"
+    assert len(os.listdir(upload_dir)) == 1
+    assert _ref_count(db, first.image_url) == 2
+
+
+def test_replaced_image_kept_while_still_referenced(client, db, upload_dir):
+    _login(client, db)
+    for name in ("回锅肉", "小炒肉"):
+        client.post(
+            "/create-dish",
+            data={"name": name, "csrf_token": _csrf(client)},
+            files={"file": ("dish.png", PNG, "image/png")},
+            follow_redirects=False,
+        )
+    a, b = db.query(models.Dish).order_by(models.Dish.id).all()
+    shared = a.image_url
+
+    assert _update(client, a.id, PNG + b"a").status_code == 303
+    assert _ref_count(db, shared) == 1
+    assert os.path.exists(os.path.join(upload_dir, os.path.basename(shared)))
+
+    # Unreferenced now, but only the sweeper (with its grace period) deletes files
+    assert _update(client, b.id, PNG + b"b").status_code == 303
+    assert _ref_count(db, shared) == 0
+    assert os.path.exists(os.path.join(upload_dir, os.path.basename(shared)))
+
+    report = image_sweeper.sweep(db, grace_seconds=0)
+    assert report["files"] == [os.path.basename(shared)]
+    assert report["refs_released"] == 1
+    assert _ref_count(db, shared) is None
+    assert len(os.listdir(upload_dir)) == 2
+
+
+def test_release_upload_only_reports_removed_rows(db):
+    from app import crud
+    crud.bump_upload_refs(db, {"/static/uploads/kept.png": 1})
+    db.commit()
+    assert crud.release_upload(db, "/static/uploads/kept.png") is False
+    assert crud.release_upload(db, "/static/uploads/missing.png") is False
+
+
+def test_rebuild_upload_refs(db):
+    from app import crud, schemas
+    user = crud.create_user(db, schemas.UserCreate(name="refs", password="testpass666"))
+    for name in ("a", "b"):
+        crud.create_dish(db, schemas.DishCreate(name=name, image_url="/static/uploads/x.png", created_by=user.id))
+    crud.bump_upload_refs(db, {"/static/uploads/x.png": 5, "/static/uploads/gone.png": -1})
+    db.commit()
+    assert crud.get_unreferenced_uploads(db) == ["/static/uploads/gone.png"]
+    assert crud.rebuild_upload_refs(db) == 1
+    assert _ref_count(db, "/static/uploads/x.png") == 2
+    assert crud.get_unreferenced_uploads(db) == []
+
+
+def test_place_survives_destination_swept_concurrently(tmp_path, monkeypatch):
+    tmp, dest = tmp_path / "part", tmp_path / "abc.png"
+    tmp.write_bytes(PNG)
+    dest.write_bytes(PNG)
+    real_utime = os.utime
+
+    def swept_then_utime(path, *args, **kwargs):
+        os.remove(path)  # the sweeper wins the race between exists() and utime()
+        return real_utime(path, *args, **kwargs)
+
+    monkeypatch.setattr(uploads.os, "utime", swept_then_utime)
+    assert uploads.place(str(tmp), str(dest)) is True
+    assert dest.read_bytes() == PNG
+    assert not tmp.exists()
+
+
+def test_place_reuses_existing_file(tmp_path):
+    tmp, dest = tmp_path / "part", tmp_path / "abc.png"
+    tmp.write_bytes(PNG)
+    dest.write_bytes(PNG)
+    os.utime(dest, (0, 0))
+    assert uploads.place(str(tmp), str(dest)) is False
+    assert not tmp.exists()
+    assert dest.stat().st_mtime > 0
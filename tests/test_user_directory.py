@@ -0,0 +1,55 @@
+import asyncio
+
+from conftest import _login
+
+from app import crud, schemas, user_directory
+from app.config import settings
+from app.dependencies import get_user_directory
+
+
+def test_directory_holds_light_entries(db):
+    crud.create_user(db, schemas.UserCreate(name="alice", password="testpass666"))
+    users = asyncio.run(get_user_directory(db))
+    assert [u.name for u in users] == ["alice"]
+    assert set(users[0]._fields) == {"id", "name", "theme_color", "role", "session_generation"}
+
+
+def test_directory_is_cached_until_user_write(db, count_queries):
+    user = crud.create_user(db, schemas.UserCreate(name="alice", password="testpass666"))
+    asyncio.run(get_user_directory(db))
+    with count_queries() as counter:
+        asyncio.run(get_user_directory(db))
+    assert counter.selects_from("users") == []
+
+    crud.update_user(db, user.id, {"theme_color": "#123456"}, user.id)
+    assert asyncio.run(get_user_directory(db))[0].theme_color == "#123456"
+
+    crud.create_user(db, schemas.UserCreate(name="bob", password="testpass666"))
+    assert [u.name for u in asyncio.run(get_user_directory(db))] == ["alice", "bob"]
+
+    crud.delete_user(db, user.id, user.id)
+    assert [u.name for u in asyncio.run(get_user_directory(db))] == ["bob"]
+
+
+def test_store_skips_rows_loaded_before_a_write(db):
+    version, cached = user_directory.lookup()
+    assert cached is None
+    user_directory.invalidate()
+    user_directory.store(version, [(1, "stale", None, "user", 0)])
+    assert user_directory.lookup()[1] is None
+
+
+def test_zero_ttl_disables_directory(db, monkeypatch):
+    monkeypatch.setattr(settings, "USER_DIRECTORY_TTL", 0)
+    crud.create_user(db, schemas.UserCreate(name="alice", password="testpass666"))
+    asyncio.run(get_user_directory(db))
+    assert user_directory.lookup()[1] is None
+
+
+def test_polled_page_skips_users_query(client, db, count_queries):
+    _login(client, db)
+    client.get("/my-orders")
+    with count_queries() as counter:
+        assert client.get("/my-orders").status_code == 200
+    # Session claims and page chrome both come from the directory
+    assert counter.selects_from("users") == []
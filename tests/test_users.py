@@ -2,7 +2,7 @@ from conftest import _csrf
 from conftest import _login_admin as _login
 
 from app import crud, schemas
-from app.security import sign_cookie_value
+from app.security import issue_session_token
 
 
 def test_users_page(client, db):
@@ -82,7 +82,7 @@ def test_delete_self_is_blocked(client, db):
     db.commit()
     token = "test-csrf-token"
     client.cookies.set("csrf_token", token)
-    client.cookies.set("user_id", sign_cookie_value(str(user.id)))
+    client.cookies.set("user_id", issue_session_token(user.id, user.role, user.session_generation or 0))
     response = client.post(
         f"/delete-user/{user.id}",
         data={"csrf_token": token},